@@ -1,26 +1,72 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File
+import io
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, BackgroundTasks, Request, Response, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Annotated
 from pydantic import BaseModel
 
 # Project-specific imports
 import database, models
-from services import auth_service, recommender_service, resume_service
+from services import auth_service, ingest_service, metrics_service, recommender_service, resume_service, saved_jobs_service
+from services.startup_service import readiness
 
 # --- 1. App and Database Initialization ---
-try:
+readiness.register("database")
+
+def create_tables():
     models.Base.metadata.create_all(bind=database.engine)
     print("✅ Database tables created successfully (if they didn't exist).")
-except Exception as e:
-    print(f"❌ Error creating database tables: {e}")
+
+async def sync_catalog_periodically():
+    """Applies jobs ingested by any worker or by `manage.py ingest` to this worker's catalog and index."""
+    while True:
+        if readiness.serving:
+            try:
+                await asyncio.to_thread(recommender_service.sync_catalog_from_db)
+            except Exception as e:
+                print(f"⚠️ Catalog sync failed: {e}")
+        await asyncio.sleep(recommender_service.CATALOG_SYNC_INTERVAL_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load in the background so the server starts accepting connections (and answering /ready) at once.
+    app.state.startup_tasks = [
+        asyncio.create_task(asyncio.to_thread(resume_service.start_process_pool)),
+        asyncio.create_task(asyncio.to_thread(readiness.run, "database", create_tables)),
+        asyncio.create_task(asyncio.to_thread(recommender_service.load_artifacts)),
+    ]
+    catalog_sync = asyncio.create_task(sync_catalog_periodically())
+    yield
+    catalog_sync.cancel()
 
 app = FastAPI(
     title="AI Job Recommender API",
     description="An advanced API for job recommendations and career insights.",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    """Records every request's latency by route template and collects its stage timings."""
+    token = metrics_service.start_request()
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics_service.finish_request(token, request.method, route.path if route else "unmatched",
+                                       status_code, time.perf_counter() - started)
+
 # --- 2. Pydantic Models for API Data Validation ---
 class UserCreate(BaseModel):
     username: str
@@ -37,8 +83,10 @@ class Token(BaseModel):
     token_type: str
 
 class Job(BaseModel):
+    id: int
     title: str
-    description: str
+    # The start of the description; GET /jobs/{id} has all of it.
+    snippet: str
     score: float
     explanation: str
     company: str | None = None
@@ -47,65 +95,219 @@ class Job(BaseModel):
 class RecommendResponse(BaseModel):
     jobs: List[Job]
 
-class SaveJobRequest(BaseModel):
+class JobDetail(BaseModel):
+    id: int
     title: str
-    description: str
+    description: str | None = None
     company: str | None = None
     location: str | None = None
+
+class SimilarJob(BaseModel):
+    id: int
+    title: str
+    snippet: str
     score: float
-    explanation: str
+    company: str | None = None
+    location: str | None = None
+
+class SimilarJobsResponse(BaseModel):
+    jobs: List[SimilarJob]
 
-class SavedJobResponse(Job):
+class SaveJobRequest(BaseModel):
+    job_id: int
+    score: float | None = None
+    explanation: str | None = None
+
+class SaveJobResponse(BaseModel):
     id: int
+    message: str
+
+class ResumeUploadResponse(BaseModel):
+    job_id: str
+    status: str
+    message: str | None = None
+
+class SavedJobResponse(BaseModel):
+    id: int
+    # Set for jobs saved by reference: their description is served by GET /jobs/{job_id}.
+    job_id: int | None = None
+    title: str
+    description: str | None = None
+    score: float | None = None
+    explanation: str | None = None
+    company: str | None = None
+    location: str | None = None
     class Config:
         from_attributes = True
 
+class SavedJobSummary(BaseModel):
+    id: int
+    job_id: int | None = None
+    title: str
+    score: float | None = None
+    company: str | None = None
+    location: str | None = None
+
+class SavedJobPage(BaseModel):
+    jobs: List[SavedJobSummary]
+    # Pass as `before_id` to fetch the next page; None on the last page.
+    next_cursor: int | None = None
+
+class ScoreBucket(BaseModel):
+    low: float
+    high: float
+    count: int
+
+class GroupCount(BaseModel):
+    name: str
+    count: int
+    average_score: float | None = None
+
+class AnalyticsSummary(BaseModel):
+    total: int
+    average_score: float | None = None
+    min_score: float | None = None
+    max_score: float | None = None
+    score_distribution: List[ScoreBucket]
+    by_company: List[GroupCount]
+    by_location: List[GroupCount]
+
 # --- 3. API Endpoints (Routers) ---
 
 @app.get("/")
 def read_root():
     return {"status": "AI Job Recommender API is running"}
 
+@app.get("/encoder/stats")
+def read_encoder_stats():
+    """Batch size and queue wait distributions of the SBERT micro-batching queue, for tuning."""
+    if recommender_service.text_encoder is None:
+        raise HTTPException(status_code=503, detail="The encoder is still loading.")
+    return recommender_service.text_encoder.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """Request, stage and batching histograms in the Prometheus text format."""
+    return PlainTextResponse(metrics_service.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/ready")
+def read_readiness():
+    """Load balancer readiness probe: 200 once every required artifact has loaded, 503 until then."""
+    report = readiness.report()
+    return JSONResponse(report, status_code=200 if report["serving"] else 503)
+
 # --- Authentication Endpoints ---
 @app.post("/auth/register", response_model=UserResponse)
-def register_user(user: UserCreate, db: Session = Depends(database.get_db)):
-    return auth_service.register_new_user(db=db, username=user.username, password=user.password)
+async def register_user(user: UserCreate, db: AsyncSession = Depends(database.get_async_db)):
+    return await auth_service.register_new_user(db=db, username=user.username, password=user.password)
 
 @app.post("/auth/token", response_model=Token)
-async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: Session = Depends(database.get_db)):
-    return auth_service.login_user(db=db, username=form_data.username, password=form_data.password)
+async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: AsyncSession = Depends(database.get_async_db)):
+    return await auth_service.login_user(db=db, username=form_data.username, password=form_data.password)
 
 # --- Core Recommender Endpoints ---
 @app.post("/recommendations", response_model=RecommendResponse)
-async def get_job_recommendations(current_user: models.User = Depends(auth_service.get_current_user), db: Session = Depends(database.get_db)):
-    return await recommender_service.get_explained_recommendations(db=db, user=current_user)
+async def get_job_recommendations(location: List[str] = Query(default=[]), company: List[str] = Query(default=[]), current_user: auth_service.Principal = Depends(auth_service.get_current_user), db: AsyncSession = Depends(database.get_async_db)):
+    """Recommendations, optionally only among jobs in any of the given locations and companies."""
+    return await recommender_service.get_explained_recommendations(db=db, user=current_user,
+                                                                  filters={"location": location, "company": company})
+
+@app.post("/recommendations/stream")
+async def stream_job_recommendations(location: List[str] = Query(default=[]), company: List[str] = Query(default=[]), current_user: auth_service.Principal = Depends(auth_service.get_current_user), db: AsyncSession = Depends(database.get_async_db)):
+    """
+    The same recommendations as NDJSON: the ranked jobs first, then each explanation as it is
+    generated. A {"type": "error"} line means the remaining explanations won't arrive.
+    """
+    events = await recommender_service.stream_explained_recommendations(db=db, user=current_user,
+                                                                        filters={"location": location, "company": company})
+    return StreamingResponse(events, media_type="application/x-ndjson")
+
+@app.post("/resumes/upload", response_model=ResumeUploadResponse, status_code=202)
+async def upload_resume(background_tasks: BackgroundTasks, file: UploadFile = File(...), current_user: auth_service.Principal = Depends(auth_service.get_current_user), db: Session = Depends(database.get_db)):
+    """Accepts a resume for background processing. Poll /resumes/upload/{job_id} for the result."""
+    if recommender_service.text_encoder is None:
+        raise HTTPException(status_code=503, detail="The resume model is still loading. Please try again shortly.")
+    file_content = await file.read(resume_service.MAX_RESUME_BYTES + 1)
+    if len(file_content) > resume_service.MAX_RESUME_BYTES:
+        raise HTTPException(status_code=413, detail=f"Resume is larger than {resume_service.MAX_RESUME_BYTES // (1024 * 1024)} MB.")
 
-@app.post("/resumes/upload")
-async def upload_resume(file: UploadFile = File(...), current_user: models.User = Depends(auth_service.get_current_user), db: Session = Depends(database.get_db)):
-    file_content = await file.read()
-    return resume_service.parse_and_embed_resume(
+    upload = await run_in_threadpool(resume_service.create_upload, db, current_user.id)
+    background_tasks.add_task(
+        resume_service.process_resume_upload,
+        upload_id=upload.id,
         file_content=file_content,
-        user=current_user,
-        db=db,
-        sbert_model=recommender_service.sbert_model
+        user_id=current_user.id,
+        encoder=recommender_service.text_encoder,
+        on_success=recommender_service.invalidate_user_recommendations
     )
+    return {"job_id": upload.id, "status": upload.status}
 
-@app.post("/jobs/save")
-def save_job(job_data: SaveJobRequest, current_user: models.User = Depends(auth_service.get_current_user), db: Session = Depends(database.get_db)):
-    new_saved_job = models.SavedJob(
-        user_id=current_user.id, title=job_data.title, description=job_data.description,
-        company=job_data.company, location=job_data.location,
-        score=str(job_data.score), explanation=job_data.explanation
-    )
-    db.add(new_saved_job)
-    db.commit()
-    db.refresh(new_saved_job)
-    return {"message": "Job saved successfully!"}
-
-@app.get("/jobs/saved", response_model=List[SavedJobResponse])
-def get_saved_jobs(current_user: models.User = Depends(auth_service.get_current_user), db: Session = Depends(database.get_db)):
-    saved_jobs = db.query(models.SavedJob).filter(models.SavedJob.user_id == current_user.id).order_by(models.SavedJob.id.desc()).all()
-    # Convert score back to float for the response
-    for job in saved_jobs:
-        job.score = float(job.score)
-    return saved_jobs
+@app.get("/resumes/upload/{job_id}", response_model=ResumeUploadResponse)
+def get_resume_upload_status(job_id: str, current_user: auth_service.Principal = Depends(auth_service.get_current_user), db: Session = Depends(database.get_db)):
+    upload = resume_service.get_upload(db, job_id, current_user.id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return {"job_id": upload.id, "status": upload.status, "message": upload.message}
+
+@app.post("/jobs/save", response_model=SaveJobResponse)
+async def save_job(job_data: SaveJobRequest, current_user: auth_service.Principal = Depends(auth_service.get_current_user), db: AsyncSession = Depends(database.get_async_db)):
+    """Saves a recommended job by its id; the description stays in the catalog rather than being copied."""
+    job = recommender_service.get_job(job_data.job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    saved_job = await saved_jobs_service.save_job(db, current_user.id, job, job_data.score, job_data.explanation)
+    return {"id": saved_job.id, "message": "Job saved successfully!"}
+
+@app.post("/jobs/ingest")
+def ingest_jobs(file: UploadFile = File(...), format: str = "jsonl", admin: auth_service.Principal = Depends(auth_service.get_current_admin), db: Session = Depends(database.get_db)):
+    """Streams CSV or JSONL postings into the jobs table and applies them to this worker's live index."""
+    if recommender_service.sbert_model is None:
+        raise HTTPException(status_code=503, detail="The embedding model is still loading. Please try again shortly.")
+    try:
+        postings = ingest_service.read_postings(io.TextIOWrapper(file.file, encoding="utf-8", newline=""), format)
+        stats = ingest_service.ingest_postings(db, postings, recommender_service.sbert_model)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    recommender_service.sync_catalog(db)
+    return stats
+
+@app.get("/jobs/saved", response_model=SavedJobPage)
+async def get_saved_jobs(limit: int = saved_jobs_service.SAVED_JOBS_PAGE_SIZE, before_id: int | None = None, current_user: auth_service.Principal = Depends(auth_service.get_current_user), db: AsyncSession = Depends(database.get_async_db)):
+    """A page of saved jobs, newest first, without the long text fields. Fetch one job's details from /jobs/saved/{id}."""
+    return await saved_jobs_service.list_saved_jobs(db, current_user.id, limit=limit, before_id=before_id)
+
+@app.get("/jobs/saved/{saved_job_id}", response_model=SavedJobResponse)
+async def get_saved_job(saved_job_id: int, current_user: auth_service.Principal = Depends(auth_service.get_current_user), db: AsyncSession = Depends(database.get_async_db)):
+    saved_job = await saved_jobs_service.get_saved_job(db, current_user.id, saved_job_id)
+    if saved_job is None:
+        raise HTTPException(status_code=404, detail="Saved job not found")
+    return saved_job
+
+@app.get("/jobs/{job_id}", response_model=JobDetail)
+def get_job(job_id: int, request: Request, response: Response, current_user: auth_service.Principal = Depends(auth_service.get_current_user)):
+    """One catalog job in full. A client holding its ETag revalidates with If-None-Match and gets a 304."""
+    job = recommender_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    etag = recommender_service.job_etag(job)
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={recommender_service.JOB_DETAIL_MAX_AGE_SECONDS}"}
+    if_none_match = {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}
+    if etag in if_none_match or "*" in if_none_match:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return job
+
+@app.get("/jobs/{job_id}/similar", response_model=SimilarJobsResponse)
+def get_similar_jobs(job_id: int, response: Response, limit: int = Query(10, ge=1, le=50), current_user: auth_service.Principal = Depends(auth_service.get_current_user)):
+    """Jobs most like this one, read from the precomputed neighbour graph."""
+    jobs = recommender_service.get_similar_jobs(job_id, limit)
+    if jobs is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    response.headers["Cache-Control"] = f"private, max-age={recommender_service.JOB_DETAIL_MAX_AGE_SECONDS}"
+    return {"jobs": [recommender_service.job_summary(job) for job in jobs]}
+
+# --- Analytics Endpoints ---
+@app.get("/analytics/summary", response_model=AnalyticsSummary)
+async def get_analytics_summary(current_user: auth_service.Principal = Depends(auth_service.get_current_user), db: AsyncSession = Depends(database.get_async_db)):
+    """Saved-job counts, score statistics and company/location breakdowns, aggregated in SQL."""
+    return await saved_jobs_service.analytics_summary(db, current_user.id)
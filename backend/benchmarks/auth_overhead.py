@@ -0,0 +1,57 @@
+"""
+Measures the per-request cost of authentication (get_current_user) with and without the principal cache.
+Run from the `backend` directory:
+
+    python -m benchmarks.auth_overhead --requests 5000
+    python -m benchmarks.auth_overhead --database-url postgresql://...   # include real network round trips
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--database-url", default=None, help="Defaults to a throwaway SQLite file.")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/auth_bench.sqlite3"
+    import database, models
+    from services import auth_service
+
+    models.User.__table__.create(bind=database.engine, checkfirst=True)
+    db = database.SessionLocal()
+    username = f"bench_{int(time.time())}"
+    auth_service.register_new_user(db, username, "bench-password")
+    token = auth_service.create_access_token({"sub": username})
+
+    async def run(label: str, cache_ttl: float):
+        auth_service.AUTH_CACHE_TTL_SECONDS = cache_ttl
+        auth_service.principal_cache.clear()
+        timings = []
+        async with database.AsyncSessionLocal() as async_db:
+            for _ in range(args.requests):
+                started = time.perf_counter()
+                await auth_service.get_current_user(token=token, db=async_db)
+                timings.append((time.perf_counter() - started) * 1e6)
+        timings.sort()
+        print(f"{label:<24} mean {statistics.fmean(timings):8.1f} µs   "
+              f"p50 {timings[len(timings) // 2]:8.1f} µs   p99 {timings[int(len(timings) * 0.99)]:8.1f} µs")
+
+    async def run_all():
+        await run("uncached (before)", 0)
+        await run("principal cache (after)", 60)
+        await database.async_engine.dispose()
+
+    print(f"get_current_user over {args.requests} requests ({database.async_engine.dialect.name})")
+    asyncio.run(run_all())
+
+    db.query(models.User).filter(models.User.username == username).delete()
+    db.commit()
+    db.close()
+
+if __name__ == "__main__":
+    main()
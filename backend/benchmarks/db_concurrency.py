@@ -0,0 +1,150 @@
+"""
+Concurrent request throughput against the database: blocking sessions, sessions on the thread pool, and async sessions.
+Run from the `backend` directory:
+
+    python -m benchmarks.db_concurrency --requests 2000
+    python -m benchmarks.db_concurrency --query-ms 20 --pool-size 100 --max-overflow 0 --concurrency 32,100
+    python -m benchmarks.db_concurrency --database-url postgresql://... --query-ms 0   # real round trips only
+
+Each simulated request runs --queries-per-request user lookups, each also spending --query-ms in
+the database (a registered sleep function on SQLite, pg_sleep on PostgreSQL) to stand in for the
+network round trip and server time of a hosted database. Three ways of running them from an async
+handler are compared:
+
+    blocking     a sync session called directly, as /recommendations used to: the event loop waits
+    threadpool   a sync session via run_in_threadpool, as FastAPI runs `def` handlers
+    async        an AsyncSession from database.get_async_db
+
+Both engines get the same pool size and overflow (--pool-size, --max-overflow), so the difference
+comes from how requests wait. "loop lag" is the worst delay a 1 ms timer saw while the requests
+ran: how long any other request on the worker would have been stuck.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import tempfile
+import time
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", default="1,8,32,128", help="Comma-separated concurrent client counts.")
+    parser.add_argument("--queries-per-request", type=int, default=2)
+    parser.add_argument("--query-ms", type=float, default=2.0, help="Time each query spends in the database.")
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--max-overflow", type=int, default=20)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--modes", default="blocking,threadpool,async")
+    parser.add_argument("--database-url", default=None, help="Defaults to a throwaway SQLite file.")
+    parser.add_argument("--output", default=None, help="Write the report as JSON.")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/db_bench.sqlite3"
+    for name, value in (("DB_POOL_SIZE", args.pool_size), ("DB_SYNC_POOL_SIZE", args.pool_size),
+                        ("DB_MAX_OVERFLOW", args.max_overflow), ("DB_SYNC_MAX_OVERFLOW", args.max_overflow)):
+        os.environ[name] = str(value)
+    from fastapi.concurrency import run_in_threadpool
+    from sqlalchemy import event, insert, text
+    import database, models
+
+    if database.engine.dialect.name == "sqlite":
+        def add_sleep(dbapi_connection, _):
+            dbapi_connection.create_function("bench_sleep", 1, lambda ms: time.sleep(ms / 1000) or 0)
+        event.listen(database.engine, "connect", add_sleep)
+        event.listen(database.async_engine.sync_engine, "connect", add_sleep)
+        query = text("SELECT id, username, bench_sleep(:ms) FROM users WHERE username = :username")
+    else:
+        query = text("SELECT id, username, pg_sleep(:ms / 1000.0) FROM users WHERE username = :username")
+
+    models.User.__table__.create(bind=database.engine, checkfirst=True)
+    run_id = f"{int(time.time())}_{os.getpid()}"
+    usernames = [f"dbbench_{run_id}_{i}" for i in range(args.users)]
+    with database.SessionLocal() as db:
+        db.execute(insert(models.User), [{"username": u, "hashed_password": "-"} for u in usernames])
+        db.commit()
+
+    def params(i):
+        return {"ms": args.query_ms, "username": usernames[i % len(usernames)]}
+
+    def sync_request(i):
+        with database.SessionLocal() as db:
+            for _ in range(args.queries_per_request):
+                db.execute(query, params(i)).first()
+
+    async def blocking_request(i):
+        sync_request(i)
+
+    async def threadpool_request(i):
+        await run_in_threadpool(sync_request, i)
+
+    async def async_request(i):
+        async with database.AsyncSessionLocal() as db:
+            for _ in range(args.queries_per_request):
+                (await db.execute(query, params(i))).first()
+
+    requests = {"blocking": blocking_request, "threadpool": threadpool_request, "async": async_request}
+
+    async def run(op, concurrency: int) -> dict:
+        counter = itertools.count()
+        latencies, lags = [], []
+        done = asyncio.Event()
+
+        async def worker():
+            while (i := next(counter)) < args.requests:
+                started = time.perf_counter()
+                await op(i)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        async def ticker():
+            while not done.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lags.append((time.perf_counter() - started) * 1000 - 1)
+
+        watch = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await watch
+        values = np.asarray(latencies)
+        return {"concurrency": concurrency, "throughput_rps": len(values) / elapsed,
+                **{f"p{p}_ms": float(np.percentile(values, p)) for p in PERCENTILES},
+                "max_loop_lag_ms": float(max(lags, default=0.0))}
+
+    async def run_all() -> dict:
+        report = {"dialect": database.engine.dialect.name, "requests": args.requests,
+                  "queries_per_request": args.queries_per_request, "query_ms": args.query_ms,
+                  "pool_size": args.pool_size, "max_overflow": args.max_overflow, "modes": {}}
+        print(f"{args.requests} requests x {args.queries_per_request} queries of {args.query_ms} ms "
+              f"({report['dialect']}, pool {args.pool_size} + {args.max_overflow} overflow)")
+        print(f"  {'mode':<11} {'clients':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'loop lag ms':>12}")
+        for mode in args.modes.split(","):
+            await requests[mode](0)  # warm the pool
+            report["modes"][mode] = []
+            for concurrency in (int(c) for c in args.concurrency.split(",")):
+                r = await run(requests[mode], concurrency)
+                report["modes"][mode].append(r)
+                print(f"  {mode:<11} {concurrency:>7} {r['throughput_rps']:9.1f} {r['p50_ms']:9.1f} "
+                      f"{r['p95_ms']:9.1f} {r['p99_ms']:9.1f} {r['max_loop_lag_ms']:12.1f}")
+        await database.async_engine.dispose()
+        return report
+
+    try:
+        report = asyncio.run(run_all())
+    finally:
+        with database.SessionLocal() as db:
+            db.query(models.User).filter(models.User.username.in_(usernames)).delete(synchronize_session=False)
+            db.commit()
+    if args.output:
+        with open(os.path.abspath(args.output), "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.output}.")
+
+if __name__ == "__main__":
+    main()
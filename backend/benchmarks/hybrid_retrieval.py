@@ -0,0 +1,114 @@
+"""
+Compares two-stage retrieval (BM25 candidates, then SBERT scores for those only) with the full dense scan.
+Run from the `backend` directory:
+
+    python -m benchmarks.hybrid_retrieval --jobs 200000
+    python -m benchmarks.hybrid_retrieval --jobs 2000000 --dtype float16 --workdir /tmp/bench_2m
+
+For each candidate count it reports latency per query and two overlaps with the dense top-k: the
+candidates' (could the dense top-k have been found at all?) and the fused ranking's. The catalog,
+resumes and SBERT encoder are the synthetic ones from benchmarks/synthetic.py. A synthetic job's
+embedding is its topic's centroid plus noise its words don't determine, so the overlaps there are a
+floor; the latencies and index sizes carry over to a real catalog of the same size.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+
+from benchmarks import synthetic
+
+def timed_calls(fn, inputs) -> tuple[list, np.ndarray]:
+    results, timings = [], []
+    for item in inputs:
+        started = time.perf_counter()
+        results.append(fn(*item))
+        timings.append((time.perf_counter() - started) * 1000)
+    return results, np.asarray(timings)
+
+def latency(timings: np.ndarray) -> dict:
+    return {"mean_ms": float(timings.mean()), "p50_ms": float(np.percentile(timings, 50)),
+            "p95_ms": float(np.percentile(timings, 95))}
+
+def overlap(truth: list, found: list, k: int) -> float:
+    hits = sum(len(set(t[0].tolist()) & set(f[0].tolist())) for t, f in zip(truth, found) if f is not None)
+    return hits / (k * len(truth))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--candidates", default="500,1000,2000,5000", help="Comma-separated LEXICAL_CANDIDATES to try.")
+    parser.add_argument("--workdir", default=None, help="Keeps the generated catalog and indexes between runs.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the report as JSON.")
+    args = parser.parse_args()
+    if args.output:
+        args.output = os.path.abspath(args.output)
+
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="jobrec_hybrid_"))
+    synthetic.ensure_catalog(os.path.join(workdir, "data"), args.jobs, dim=args.dim, dtype=args.dtype, seed=args.seed)
+    os.chdir(workdir)
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.sqlite3')}")
+    os.environ["RETRIEVAL_MODE"] = "hybrid"
+    from services import job_catalog, lexical_index, recommender_service
+
+    if not os.path.exists(os.path.join("data", lexical_index.LEXICAL_DIR, "meta.json")):
+        print("Building the lexical index...")
+        started = time.perf_counter()
+        lexical_index.BM25Index.build(job_catalog.JobCatalog.open("data")).save("data")
+        print(f"  built in {time.perf_counter() - started:.1f}s")
+    # The baseline is the full dense scan, so the index is exact whatever JOB_INDEX_TYPE says.
+    recommender_service.load_search_artifacts(index_kind="exact")
+    lexical = recommender_service.job_lexical
+    if lexical is None or recommender_service.job_index is None:
+        raise SystemExit("Could not load the search artifacts; see the errors above.")
+
+    rng = np.random.default_rng(args.seed + 1)
+    encoder = synthetic.FakeSentenceEncoder(recommender_service.job_embeddings.shape[1], seed=args.seed)
+    texts = [synthetic.resume_text(rng) for _ in range(args.queries)]
+    embeddings = encoder.encode(texts)
+
+    dense, dense_ms = timed_calls(recommender_service.rank_jobs, [(e, args.k) for e in embeddings])
+    postings = int(lexical.tf_offsets[-1])
+    report = {
+        "jobs": args.jobs, "queries": args.queries, "k": args.k,
+        "dense": latency(dense_ms),
+        "lexical_index": {"terms": len(lexical.terms), "postings": postings, "bytes": lexical.nbytes,
+                          "postings_bytes": int(lexical.postings.nbytes), "int32_postings_bytes": postings * 4},
+        "hybrid": [],
+    }
+    print(f"{args.jobs} jobs, {args.queries} queries, k={args.k}")
+    print(f"  dense scan                 {report['dense']['mean_ms']:8.2f} ms/query (p95 {report['dense']['p95_ms']:.2f})")
+
+    dense_weight = recommender_service.HYBRID_DENSE_WEIGHT
+    for candidates in (int(c) for c in args.candidates.split(",")):
+        recommender_service.LEXICAL_CANDIDATES = candidates
+        inputs = [(e, t, args.k) for e, t in zip(embeddings, texts)]
+        recommender_service.HYBRID_DENSE_WEIGHT = 1.0
+        candidate_only, _ = timed_calls(recommender_service.rank_hybrid_jobs, inputs)
+        recommender_service.HYBRID_DENSE_WEIGHT = dense_weight
+        fused, hybrid_ms = timed_calls(recommender_service.rank_hybrid_jobs, inputs)
+        row = {"candidates": candidates, **latency(hybrid_ms),
+               f"candidate_recall@{args.k}": overlap(dense, candidate_only, args.k),
+               f"fused_overlap@{args.k}": overlap(dense, fused, args.k),
+               "fallbacks": sum(f is None for f in fused)}
+        report["hybrid"].append(row)
+        print(f"  hybrid, {candidates:>6} candidates {row['mean_ms']:8.2f} ms/query (p95 {row['p95_ms']:.2f})   "
+              f"candidate recall {row[f'candidate_recall@{args.k}']:.3f}   fused overlap {row[f'fused_overlap@{args.k}']:.3f}")
+
+    index = report["lexical_index"]
+    print(f"  lexical index {index['bytes'] / 2**20:.1f} MiB; postings {index['postings_bytes'] / 2**20:.1f} MiB "
+          f"vs {index['int32_postings_bytes'] / 2**20:.1f} MiB as int32 rows")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.output}.")
+
+if __name__ == "__main__":
+    main()
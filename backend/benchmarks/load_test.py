@@ -0,0 +1,372 @@
+"""
+Offline load and latency benchmark for the API: p50/p95/p99 and throughput per endpoint and per stage.
+Run from the `backend` directory:
+
+    python -m benchmarks.load_test --jobs 10000 --users 50 --concurrency 8
+    python -m benchmarks.load_test --jobs 2000000 --dtype float16 --index-type ivf --workdir /tmp/bench_2m
+    python -m benchmarks.load_test --save-baseline benchmarks/baseline.json    # record a reference run
+    python -m benchmarks.load_test --baseline benchmarks/baseline.json         # compare against it
+
+Nothing leaves the machine. The job catalog and resumes are synthetic (see benchmarks/synthetic.py),
+SBERT and Gemini are replaced by fakes with configurable latency, the database is a throwaway SQLite
+file (or --database-url for a local Postgres), and the app is served by uvicorn on a loopback port.
+A --workdir keeps the generated catalog, so large catalogs are only generated once.
+"""
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+import numpy as np
+
+from benchmarks import synthetic
+
+PERCENTILES = (50, 95, 99)
+
+# --- 1. Recording ---
+class Recorder:
+    """Latency samples in milliseconds, per endpoint (one per request) and per stage (one per call)."""
+
+    def __init__(self):
+        self.endpoints = defaultdict(list)
+        self.stages = defaultdict(list)
+        self.errors = Counter()
+        self.elapsed = {}
+        self._lock = threading.Lock()
+
+    def add(self, section: str, name: str, ms: float):
+        with self._lock:
+            getattr(self, section)[name].append(ms)
+
+    def timed(self, name: str, fn):
+        """Wraps `fn` (sync or async) so every call adds a sample to stage `name`."""
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self.add("stages", name, (time.perf_counter() - started) * 1000)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.add("stages", name, (time.perf_counter() - started) * 1000)
+        return wrapper
+
+def summarize(samples: list[float], elapsed: float | None = None, errors: int = 0) -> dict:
+    values = np.asarray(samples, dtype=np.float64)
+    summary = {"count": int(values.size), "errors": errors}
+    if values.size:
+        summary["mean_ms"] = float(values.mean())
+        summary.update({f"p{p}_ms": float(np.percentile(values, p)) for p in PERCENTILES})
+        summary["max_ms"] = float(values.max())
+    if elapsed:
+        summary["throughput_rps"] = values.size / elapsed
+    return summary
+
+# --- 2. Instrumenting the App ---
+def instrument(recorder: Recorder, args):
+    """
+    Swaps the model loaders for the offline fakes and wraps the main stages of each request with
+    timers. Must run before `app` is imported, because FastAPI captures dependencies at import.
+    """
+    from services import auth_service, embedding_store, recommender_service, resume_service
+
+    dim = embedding_store.EmbeddingStore.open("data").dim
+    encoder = synthetic.FakeSentenceEncoder(dim, seed=args.seed, latency_ms=args.encoder_latency_ms)
+    encoder.encode = recorder.timed("sbert_encode_batch", encoder.encode)
+    recommender_service._load_sbert_model = lambda: encoder
+    recommender_service._load_llm = lambda: synthetic.fake_llm(args.llm_latency_ms, args.llm_per_job_ms)
+
+    for module, name, stage in [
+        (auth_service, "get_current_user", "authenticate"),
+        (auth_service, "verify_password_async", "verify_password"),
+        (recommender_service, "get_recommendations_for_resume", "rank_or_cache"),
+        (recommender_service, "rank_jobs", "index_search"),
+        (recommender_service, "rank_jobs_async", "index_search"),
+        (recommender_service, "rank_hybrid_jobs", "hybrid_search"),
+        (recommender_service, "_precomputed_ranking", "precomputed_lookup"),
+        (recommender_service, "explain_jobs", "explain_jobs"),
+        (recommender_service, "generate_explanations", "llm_generate"),
+        (resume_service, "save_resume", "save_resume"),
+    ]:
+        setattr(module, name, recorder.timed(stage, getattr(module, name)))
+
+def start_server(app, port: int):
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    return server, thread
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+# --- 3. Workload ---
+async def run_phase(recorder: Recorder, name: str, n_requests: int, concurrency: int, op):
+    """Runs op(0..n_requests-1) from `concurrency` workers, each starting its next request as soon as one finishes."""
+    counter = itertools.count()
+
+    async def worker():
+        while (i := next(counter)) < n_requests:
+            started = time.perf_counter()
+            try:
+                await op(i)
+            except Exception as e:
+                recorder.errors[name] += 1
+                if recorder.errors[name] == 1:
+                    print(f"⚠️ {name} failed: {e!r}")
+                continue
+            recorder.add("endpoints", name, (time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    recorder.elapsed[name] = time.perf_counter() - started
+    print(f"  {name:<24} {n_requests} requests in {recorder.elapsed[name]:.1f}s")
+
+async def run_workload(recorder: Recorder, base_url: str, args):
+    import httpx
+
+    rng = np.random.default_rng(args.seed)
+    run_id = f"{int(time.time())}_{os.getpid()}"
+    usernames = [f"bench_{run_id}_{i}" for i in range(args.users)]
+    resumes = [synthetic.resume_pdf(synthetic.resume_text(rng)) for _ in range(args.users)]
+    tokens = {}
+    recommended = {}  # user -> the jobs of their last recommendation
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        async def call(method, path, user=None, **kwargs):
+            headers = {"Authorization": f"Bearer {tokens[user]}"} if user is not None else None
+            response = await client.request(method, path, headers=headers, **kwargs)
+            response.raise_for_status()
+            return response
+
+        async def register(i):
+            await call("POST", "/auth/register", json={"username": usernames[i], "password": "bench-password"})
+
+        async def login(i):
+            user = i % args.users
+            response = await call("POST", "/auth/token", data={"username": usernames[user], "password": "bench-password"})
+            tokens[user] = response.json()["access_token"]
+
+        async def upload(i):
+            # Measures acceptance (resumes_upload) and time until the background parse is done.
+            started = time.perf_counter()
+            response = await call("POST", "/resumes/upload", user=i,
+                                  files={"file": (f"resume_{i}.pdf", resumes[i], "application/pdf")})
+            recorder.add("endpoints", "resumes_upload", (time.perf_counter() - started) * 1000)
+            upload_id = response.json()["job_id"]
+            while True:
+                started_poll = time.perf_counter()
+                status = (await call("GET", f"/resumes/upload/{upload_id}", user=i)).json()
+                recorder.add("endpoints", "resumes_upload_status", (time.perf_counter() - started_poll) * 1000)
+                if status["status"] == "error":
+                    raise RuntimeError(status["message"])
+                if status["status"] == "done":
+                    return
+                await asyncio.sleep(0.05)
+
+        async def recommend(i):
+            response = await call("POST", "/recommendations", user=i % args.users)
+            jobs = response.json()["jobs"]
+            if not jobs:
+                raise RuntimeError("no recommendations returned")
+            recommended[i % args.users] = jobs
+
+        async def save(i):
+            user = i % args.users
+            job = recommended[user][i // args.users % len(recommended[user])]
+            await call("POST", "/jobs/save", user=user,
+                       json={"job_id": job["id"], "score": job["score"], "explanation": job["explanation"]})
+
+        async def job_detail(i):
+            user = i % args.users
+            job = recommended[user][i // args.users % len(recommended[user])]
+            await call("GET", f"/jobs/{job['id']}", user=user)
+
+        async def similar_jobs(i):
+            user = i % args.users
+            job = recommended[user][i // args.users % len(recommended[user])]
+            await call("GET", f"/jobs/{job['id']}/similar", user=user)
+
+        async def list_saved(i):
+            await call("GET", "/jobs/saved", user=i % args.users)
+
+        print("Running workload...")
+        await run_phase(recorder, "auth_register", args.users, args.concurrency, register)
+        await run_phase(recorder, "auth_token", max(args.requests, args.users), args.concurrency, login)
+        # Recorded per request inside upload(); the phase itself is the end-to-end processing time.
+        await run_phase(recorder, "resume_processing", args.users, args.concurrency, upload)
+        if args.precompute:
+            await asyncio.to_thread(precompute, recorder, args)
+        await run_phase(recorder, "recommendations_cold", args.users, args.concurrency, recommend)
+        await run_phase(recorder, "recommendations_warm", args.requests, args.concurrency, recommend)
+        await run_phase(recorder, "jobs_detail", args.requests, args.concurrency, job_detail)
+        await run_phase(recorder, "jobs_similar", args.requests, args.concurrency, similar_jobs)
+        await run_phase(recorder, "jobs_save", args.requests, args.concurrency, save)
+        await run_phase(recorder, "jobs_saved", args.requests, args.concurrency, list_saved)
+
+def precompute(recorder: Recorder, args):
+    """Runs the batch precompute against the server's loaded index, so cold requests can read its table."""
+    import database
+    from services import precompute_service, recommender_service
+    started = time.perf_counter()
+    db = database.SessionLocal()
+    try:
+        precompute_service.precompute_recommendations(db, recommender_service.job_index,
+                                                      recommender_service.job_catalog_store,
+                                                      recommender_service.catalog_version)
+    finally:
+        db.close()
+    recorder.add("stages", "precompute_all_users", (time.perf_counter() - started) * 1000)
+
+# --- 4. Reporting ---
+def build_report(recorder: Recorder, args, started_at: float) -> dict:
+    endpoints = {name: summarize(samples, recorder.elapsed.get(name), recorder.errors.get(name, 0))
+                 for name, samples in recorder.endpoints.items()}
+    stages = {name: summarize(samples) for name, samples in recorder.stages.items()}
+    config = {key: getattr(args, key) for key in
+              ("jobs", "dtype", "index_type", "retrieval", "users", "requests", "concurrency", "llm_latency_ms",
+               "llm_per_job_ms", "encoder_latency_ms", "precompute", "seed")}
+    config["database"] = "postgresql" if args.database_url else "sqlite"
+    return {"config": config, "started_at": started_at, "endpoints": endpoints, "stages": stages}
+
+def print_report(report: dict):
+    header = f"{'':<26}{'count':>7}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}"
+    for section in ("endpoints", "stages"):
+        print(f"\n{section.title()}\n{header}")
+        for name, s in report[section].items():
+            if not s["count"]:
+                print(f"{name:<26}{0:>7}{s['errors']:>5}")
+                continue
+            throughput = f"{s['throughput_rps']:>9.1f}" if "throughput_rps" in s else f"{'':>9}"
+            print(f"{name:<26}{s['count']:>7}{s['errors']:>5}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{throughput}")
+
+def compare(report: dict, baseline: dict, tolerance: float, min_delta_ms: float = 1.0) -> list[str]:
+    """Prints each latency percentile and throughput against the baseline; returns the regressions."""
+    if report["config"] != baseline.get("config"):
+        print("\n⚠️ Baseline was recorded with a different configuration:")
+        for key in sorted(set(report["config"]) | set(baseline.get("config", {}))):
+            if report["config"].get(key) != baseline.get("config", {}).get(key):
+                print(f"    {key}: {baseline.get('config', {}).get(key)} -> {report['config'].get(key)}")
+
+    regressions = []
+    print(f"\nChange vs baseline (regression threshold {tolerance:.0%})")
+    for section in ("endpoints", "stages"):
+        for name, current in report[section].items():
+            previous = baseline.get(section, {}).get(name)
+            if not previous or not current["count"] or not previous.get("count"):
+                continue
+            changes = []
+            for p in PERCENTILES:
+                key = f"p{p}_ms"
+                change = (current[key] - previous[key]) / previous[key] if previous[key] else 0.0
+                changes.append(f"p{p} {change:+7.1%}")
+                # Sub-millisecond stages swing by large percentages on noise alone.
+                if change > tolerance and current[key] - previous[key] > min_delta_ms:
+                    regressions.append(f"{section}/{name} {key}: {previous[key]:.1f} -> {current[key]:.1f}")
+            if "throughput_rps" in current and previous.get("throughput_rps"):
+                change = (current["throughput_rps"] - previous["throughput_rps"]) / previous["throughput_rps"]
+                changes.append(f"req/s {change:+7.1%}")
+                if -change > tolerance:
+                    regressions.append(f"{section}/{name} throughput: {previous['throughput_rps']:.1f} -> {current['throughput_rps']:.1f}")
+            print(f"  {name:<26}" + "   ".join(changes))
+    if regressions:
+        print("\n❌ Regressions:\n  " + "\n  ".join(regressions))
+    else:
+        print("\n✅ No regressions beyond the threshold.")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=10_000, help="Synthetic catalog size (10k to millions).")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension of a newly generated catalog.")
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--index-type", default="exact", help="JOB_INDEX_TYPE for the run.")
+    parser.add_argument("--retrieval", choices=["dense", "hybrid"], default="dense", help="RETRIEVAL_MODE for the run.")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per repeated-request phase.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--llm-per-job-ms", type=float, default=0.0, help="Extra fake LLM latency per job in a batch.")
+    parser.add_argument("--encoder-latency-ms", type=float, default=5.0, help="Fake SBERT latency per batch.")
+    parser.add_argument("--precompute", action="store_true", help="Run the batch precompute before the cold requests.")
+    parser.add_argument("--database-url", default=None, help="e.g. a local Postgres; defaults to a throwaway SQLite file.")
+    parser.add_argument("--workdir", default=None, help="Keeps the generated catalog between runs.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", default=None, help="Write the report as JSON.")
+    parser.add_argument("--baseline", default=None, help="Compare against a report saved earlier.")
+    parser.add_argument("--save-baseline", default=None, help="Write this run's report as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Relative slowdown that counts as a regression.")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this.")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on any regression.")
+    args = parser.parse_args()
+    started_at = time.time()
+    for key in ("output", "baseline", "save_baseline"):
+        if getattr(args, key):
+            setattr(args, key, os.path.abspath(getattr(args, key)))
+
+    # The app reads its artifacts from ./data, so the run happens inside the work directory.
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="jobrec_bench_"))
+    synthetic.ensure_catalog(os.path.join(workdir, "data"), args.jobs, dim=args.dim, dtype=args.dtype, seed=args.seed)
+    os.chdir(workdir)
+
+    sqlite_path = os.path.join(workdir, "bench.sqlite3")
+    cache_path = os.path.join(workdir, "explanation_cache.sqlite3")
+    for path in (sqlite_path, cache_path):
+        if os.path.exists(path):
+            os.remove(path)
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{sqlite_path}"
+    os.environ["EXPLANATION_CACHE_PATH"] = cache_path
+    os.environ["JOB_INDEX_TYPE"] = args.index_type
+    os.environ["RETRIEVAL_MODE"] = args.retrieval
+
+    recorder = Recorder()
+    instrument(recorder, args)
+    import app
+    from services.startup_service import readiness
+
+    port = free_port()
+    server, thread = start_server(app.app, port)
+    print(f"Waiting for the server on port {port} to load its artifacts...")
+    while not readiness.serving:
+        if readiness.state == "degraded":
+            raise SystemExit(f"Server failed to load: {readiness.report()}")
+        time.sleep(0.2)
+
+    try:
+        asyncio.run(run_workload(recorder, f"http://127.0.0.1:{port}", args))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    report = build_report(recorder, args, started_at)
+    print_report(report)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"✅ Report written to {path}.")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.min_delta_ms)
+        if regressions and args.fail_on_regression:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Throughput of exact search: the single-pass ExactIndex against ShardedExactIndex at several thread
+counts and batch sizes, and concurrent clients with and without BatchingSearcher.
+Run from the `backend` directory, ideally with BLAS limited to one thread per shard:
+
+    OPENBLAS_NUM_THREADS=1 OMP_NUM_THREADS=1 python -m benchmarks.sharded_search --jobs 1000000
+    python -m benchmarks.sharded_search --jobs 2000000 --dtype float16 --threads 1,8,16,32 --workdir /tmp/bench_2m
+
+Every sharded result is checked against ExactIndex, so a speedup can't come from a wrong answer.
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+
+from benchmarks import synthetic
+
+def throughput(fn, n_queries: int) -> dict:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    return {"qps": n_queries / elapsed, "mean_ms": elapsed * 1000 / n_queries}
+
+def run_clients(search, queries: np.ndarray, k: int, clients: int) -> dict:
+    """`clients` threads splitting `queries` between them, each waiting on its own searches."""
+    latencies = []
+    lock = threading.Lock()
+
+    def client(part):
+        for query in part:
+            started = time.perf_counter()
+            search(query, k)
+            with lock:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=client, args=(part,)) for part in np.array_split(queries, clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {"qps": len(queries) / elapsed, "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95))}
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--threads", default=",".join(str(t) for t in (1, 2, 4, 8, 16, 32, 64) if t <= cores),
+                        help="Comma-separated shard thread counts (default: powers of two up to the core count).")
+    parser.add_argument("--batch-sizes", default="1,8,32")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients for the batching comparison.")
+    parser.add_argument("--workdir", default=None, help="Keeps the generated catalog between runs.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the report as JSON.")
+    args = parser.parse_args()
+
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="jobrec_sharded_"))
+    data_dir = os.path.join(workdir, "data")
+    synthetic.ensure_catalog(data_dir, args.jobs, dim=args.dim, dtype=args.dtype, seed=args.seed)
+    from services import embedding_store, index_service
+
+    vectors = embedding_store.EmbeddingStore.open(data_dir).vectors
+    queries = index_service.sample_queries(vectors, args.queries, seed=args.seed)
+    exact = index_service.ExactIndex(vectors, normalized=True)
+    truth = [exact.search(q, args.k)[0] for q in queries]
+    report = {"jobs": args.jobs, "dtype": args.dtype, "k": args.k, "cores": cores,
+              "exact": throughput(lambda: [exact.search(q, args.k) for q in queries], len(queries)),
+              "sharded": [], "concurrent": {}}
+    print(f"{args.jobs} x {vectors.shape[1]} {args.dtype} jobs, {len(queries)} queries, k={args.k}, {cores} cores")
+    print(f"  exact, one query at a time          {report['exact']['qps']:9.1f} queries/s")
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    largest = None
+    for threads in (int(t) for t in args.threads.split(",")):
+        index = largest = index_service.ShardedExactIndex(vectors, normalized=True, threads=threads)
+        for batch in batch_sizes:
+            found = []
+            result = throughput(lambda: found.extend(
+                rows for start in range(0, len(queries), batch)
+                for rows, _ in index.search_batch(queries[start:start + batch], args.k)), len(queries))
+            if any(set(f.tolist()) != set(t.tolist()) for f, t in zip(found, truth)):
+                raise SystemExit(f"❌ Sharded search with {threads} threads disagrees with exact search.")
+            report["sharded"].append({"threads": threads, "shards": len(index.shards), "batch": batch, **result})
+            print(f"  sharded, {threads:>3} threads, batch {batch:>3}  {result['qps']:9.1f} queries/s")
+
+    searcher = index_service.BatchingSearcher(largest)
+    report["concurrent"] = {
+        "clients": args.clients,
+        "direct": run_clients(largest.search, queries, args.k, args.clients),
+        "batched": run_clients(searcher.search, queries, args.k, args.clients),
+    }
+    for mode in ("direct", "batched"):
+        r = report["concurrent"][mode]
+        print(f"  {args.clients} clients, {mode:<8}            {r['qps']:9.1f} queries/s   p50 {r['p50_ms']:.1f} ms   p95 {r['p95_ms']:.1f} ms")
+    if args.output:
+        with open(os.path.abspath(args.output), "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.output}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Synthetic, seeded stand-ins for the benchmark: a job catalog of any size written straight into the
+data/ artifact formats, resumes (as text and as PDFs), and offline fakes of the SBERT model and
+the Gemini chat model.
+
+Jobs and resumes are drawn from a fixed set of topics. A job's embedding sits near its topic's
+centroid, and the fake encoder maps text to the centroids of the topics its words belong to, so
+resumes rank jobs of their own topic first, the same way real embeddings would.
+"""
+import asyncio
+import json
+import os
+import re
+import shutil
+import time
+import zlib
+import numpy as np
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from services import embedding_store, facet_index, job_catalog, lexical_index
+
+TOPICS = {
+    "Data Scientist": "python pandas statistics regression sklearn experimentation sql forecasting",
+    "Machine Learning Engineer": "pytorch tensorflow deployment mlops kubernetes embeddings transformers training",
+    "Backend Engineer": "java go microservices postgres kafka grpc scalability caching",
+    "Frontend Engineer": "react typescript css accessibility webpack design components browser",
+    "DevOps Engineer": "terraform aws ci cd docker monitoring linux automation",
+    "Data Engineer": "spark airflow etl warehouse dbt streaming pipelines bigquery",
+    "Mobile Developer": "kotlin swift android ios flutter offline push performance",
+    "Security Engineer": "threat modeling pentesting iam siem incident cryptography compliance",
+    "Product Manager": "roadmap stakeholders discovery metrics prioritization launches strategy",
+    "QA Engineer": "selenium test automation regression cypress quality bugs coverage",
+    "Embedded Engineer": "c firmware rtos microcontrollers drivers hardware debugging",
+    "Cloud Architect": "azure gcp networking cost governance migration multicloud",
+}
+COMPANIES = [f"Company {i}" for i in range(200)]
+LOCATIONS = ["Bengaluru", "Hyderabad", "Pune", "Mumbai", "Delhi", "Chennai", "Remote", "London", "Berlin", "New York"]
+FILLER = "team build collaborate ownership fast paced growth culture hybrid experience years strong".split()
+CHUNK_ROWS = 100_000
+
+def _topic_words():
+    return [words.split() for words in TOPICS.values()]
+
+def topic_centroids(dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((len(TOPICS), dim)).astype(np.float32)
+    return centroids / np.linalg.norm(centroids, axis=1, keepdims=True)
+
+# --- 1. Job Catalog ---
+def _job_text(rng, topic: int, words) -> tuple[str, str]:
+    title = list(TOPICS)[topic]
+    picked = rng.choice(words[topic], size=6).tolist() + rng.choice(FILLER, size=6).tolist()
+    rng.shuffle(picked)
+    return title, f"We are hiring a {title}. " + " ".join(picked) + "."
+
+def write_synthetic_catalog(data_dir: str, rows: int, dim: int = 384, dtype: str = "float32", seed: int = 0) -> dict:
+    """
+    Writes `rows` jobs as the columnar catalog and the memory-mapped embedding store, one chunk at a
+    time, so multi-million-row catalogs never have to fit in memory as Python objects.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = topic_centroids(dim, seed)
+    words = _topic_words()
+    os.makedirs(data_dir, exist_ok=True)
+    root = os.path.join(data_dir, job_catalog.CATALOG_DIR)
+    os.makedirs(root, exist_ok=True)
+
+    raw_path = os.path.join(data_dir, "synthetic_embeddings.raw")
+    raw = np.lib.format.open_memmap(raw_path, mode="w+", dtype=dtype, shape=(rows, dim))
+    offsets = {name: np.zeros(rows + 1, dtype=np.int64) for name in job_catalog.COLUMNS}
+    blobs = {name: open(os.path.join(root, f"{name}.blob"), "wb") for name in job_catalog.COLUMNS}
+    try:
+        for start in range(0, rows, CHUNK_ROWS):
+            n = min(CHUNK_ROWS, rows - start)
+            topics = rng.integers(0, len(TOPICS), size=n)
+            noise = rng.standard_normal((n, dim)).astype(np.float32) * 0.08
+            raw[start:start + n] = centroids[topics] + noise
+            columns = {name: [] for name in job_catalog.COLUMNS}
+            for topic in topics:
+                title, description = _job_text(rng, topic, words)
+                columns["title"].append(title)
+                columns["description"].append(description)
+                columns["company"].append(COMPANIES[rng.integers(len(COMPANIES))])
+                columns["location"].append(LOCATIONS[rng.integers(len(LOCATIONS))])
+            for name, values in columns.items():
+                encoded = [v.encode("utf-8") for v in values]
+                lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=n)
+                offsets[name][start + 1:start + n + 1] = offsets[name][start] + np.cumsum(lengths)
+                blobs[name].write(b"".join(encoded))
+    finally:
+        for f in blobs.values():
+            f.close()
+    raw.flush()
+
+    ids = np.arange(rows, dtype=np.int64)
+    np.save(os.path.join(root, "ids.npy"), ids)
+    for name in job_catalog.COLUMNS:
+        np.save(os.path.join(root, f"{name}.offsets.npy"), offsets[name])
+        np.save(os.path.join(root, f"{name}.nulls.npy"), np.zeros(rows, dtype=bool))
+    meta = {
+        "version": job_catalog.FORMAT_VERSION,
+        "rows": rows,
+        "columns": list(job_catalog.COLUMNS),
+        "blob_sizes": {name: int(offsets[name][-1]) for name in job_catalog.COLUMNS},
+    }
+    with open(os.path.join(root, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    embedding_store.write_store(data_dir, raw, ids, dtype=dtype)
+    del raw
+    os.remove(raw_path)
+    return {"rows": rows, "dim": dim, "dtype": dtype}
+
+def ensure_catalog(data_dir: str, rows: int, dim: int = 384, dtype: str = "float32", seed: int = 0) -> bool:
+    """
+    Generates the catalog unless `data_dir` already holds one of `rows` jobs, and then drops the
+    indexes prebuilt for the previous one. Returns whether it generated.
+    """
+    meta_path = os.path.join(data_dir, job_catalog.CATALOG_DIR, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f)["rows"] == rows:
+                return False
+    print(f"Generating a synthetic catalog of {rows} jobs in {data_dir}...")
+    write_synthetic_catalog(data_dir, rows, dim=dim, dtype=dtype, seed=seed)
+    for name in os.listdir(data_dir):
+        path = os.path.join(data_dir, name)
+        if name.startswith("job_index"):
+            os.remove(path)
+        elif name in (facet_index.FACETS_DIR, lexical_index.LEXICAL_DIR):
+            shutil.rmtree(path)
+    return True
+
+# --- 2. Resumes ---
+def resume_text(rng, n_topics: int = 2) -> str:
+    words = _topic_words()
+    topics = rng.choice(len(TOPICS), size=n_topics, replace=False)
+    lines = [f"Experienced {list(TOPICS)[topics[0]]} with {rng.integers(1, 15)} years of experience."]
+    for topic in topics:
+        lines.append("Skills: " + ", ".join(rng.choice(words[topic], size=5, replace=False)))
+    lines.append("Summary: " + " ".join(rng.choice(FILLER, size=12)))
+    return "\n".join(lines)
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def resume_pdf(text: str) -> bytes:
+    """A minimal one-page PDF with `text` set line by line, which pdfplumber extracts back."""
+    content = ["BT", "/F1 11 Tf", "14 TL", "50 780 Td"]
+    for line in text.splitlines():
+        content.append(f"({_pdf_escape(line)}) Tj T*")
+    content.append("ET")
+    stream = "\n".join(content).encode("latin-1", "replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    positions = []
+    for number, body in enumerate(objects, start=1):
+        positions.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for position in positions:
+        out += b"%010d 00000 n \n" % position
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+# --- 3. Model Fakes ---
+class FakeSentenceEncoder:
+    """
+    Stands in for SentenceTransformer.encode: a text's embedding is the mean centroid of the topics
+    its words come from plus a small deterministic noise. `latency_ms` is charged per batch.
+    """
+
+    def __init__(self, dim: int = 384, seed: int = 0, latency_ms: float = 0.0):
+        self.centroids = topic_centroids(dim, seed)
+        self.dim = dim
+        self.latency = latency_ms / 1000
+        self.word_topics = {word: i for i, words in enumerate(_topic_words()) for word in words}
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        topics = [self.word_topics[w] for w in re.findall(r"[a-z]+", text.lower()) if w in self.word_topics]
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        vector = rng.standard_normal(self.dim).astype(np.float32) * 0.05
+        if topics:
+            vector += self.centroids[topics].mean(axis=0)
+        return vector
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False, convert_to_numpy: bool = True):
+        if self.latency:
+            time.sleep(self.latency)
+        single = isinstance(texts, str)
+        vectors = np.stack([self._encode_one(t) for t in ([texts] if single else texts)])
+        return vectors[0] if single else vectors
+
+_BATCH_JOB_RE = re.compile(r"\bJob (\d+):")
+
+def fake_llm(latency_ms: float = 800.0, per_job_ms: float = 0.0):
+    """
+    A chat-model stand-in for the explanation chains. It sleeps `latency_ms` (plus `per_job_ms` per
+    job in a batch prompt) and answers batch prompts with the JSON array the parser expects.
+    """
+
+    def respond(prompt) -> tuple[float, AIMessage]:
+        text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+        jobs = [int(n) for n in _BATCH_JOB_RE.findall(text)]
+        if jobs:
+            content = json.dumps([{"job": n, "explanation": f"Synthetic explanation for job {n}."} for n in jobs])
+        else:
+            content = "Synthetic explanation: the candidate's skills overlap with this role."
+        return (latency_ms + per_job_ms * len(jobs)) / 1000, AIMessage(content=content)
+
+    def invoke(prompt):
+        delay, message = respond(prompt)
+        time.sleep(delay)
+        return message
+
+    async def ainvoke(prompt):
+        delay, message = respond(prompt)
+        await asyncio.sleep(delay)
+        return message
+
+    return RunnableLambda(invoke, afunc=ainvoke, name="fake_llm")
@@ -1,5 +1,7 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -8,17 +10,71 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# --- Connection Pool Configuration ---
+# Request handlers use the async engine; the sync engine serves scripts, background tasks and
+# the few handlers that still run on the thread pool. Each worker can hold up to
+# pool size + overflow connections per engine, so keep workers x both totals under the
+# database's connection limit (Supabase's is per plan).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_SYNC_POOL_SIZE = int(os.getenv("DB_SYNC_POOL_SIZE", "5"))
+DB_SYNC_MAX_OVERFLOW = int(os.getenv("DB_SYNC_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+# Replace connections before the server or a proxy drops them for being idle too long.
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+# Test each connection with a cheap round trip when it is checked out, so a dropped one is
+# replaced instead of failing the request.
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Prepared statements asyncpg keeps per connection. Set 0 behind a transaction-mode pooler
+# (PgBouncer, or Supabase's on port 6543), which can't keep them between transactions.
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
 # Modify the URL for SQLAlchemy if it's a Supabase URL
-if DATABASE_URL and DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg2://", 1)
+SYNC_DATABASE_URL = DATABASE_URL
+if SYNC_DATABASE_URL and SYNC_DATABASE_URL.startswith("postgresql://"):
+    SYNC_DATABASE_URL = SYNC_DATABASE_URL.replace("postgresql://", "postgresql+psycopg2://", 1)
 
 # Add SSL requirement for cloud databases
-if "supabase" in str(DATABASE_URL):
-    DATABASE_URL = f"{DATABASE_URL}?sslmode=require"
+if "supabase" in str(SYNC_DATABASE_URL):
+    SYNC_DATABASE_URL = f"{SYNC_DATABASE_URL}?sslmode=require"
+
+def _pool_options(url, pool_size: int, max_overflow: int) -> dict:
+    """Pool settings for an engine; in-memory SQLite has a single connection and takes none."""
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {"pool_size": pool_size, "max_overflow": max_overflow, "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+            "pool_recycle": DB_POOL_RECYCLE_SECONDS, "pool_pre_ping": DB_POOL_PRE_PING}
+
+def async_url(database_url: str):
+    """`database_url` for an async driver (asyncpg or aiosqlite), plus the connect_args it needs."""
+    url = make_url(database_url)
+    connect_args = {}
+    if url.get_backend_name() == "postgresql":
+        # asyncpg takes SSL as a connect argument, not libpq's sslmode.
+        sslmode = url.query.get("sslmode")
+        url = url.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+        if sslmode or "supabase" in str(url.host):
+            connect_args["ssl"] = sslmode or "require"
+        url = url.update_query_dict({"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)})
+        if DB_STATEMENT_CACHE_SIZE == 0:
+            connect_args["statement_cache_size"] = 0
+            # A pooler may hand the next transaction another server connection, where a reused
+            # statement name could already exist.
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{os.urandom(8).hex()}__"
+    elif url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url, connect_args
 
 try:
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(SYNC_DATABASE_URL,
+                           **_pool_options(make_url(SYNC_DATABASE_URL), DB_SYNC_POOL_SIZE, DB_SYNC_MAX_OVERFLOW))
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    ASYNC_DATABASE_URL, async_connect_args = async_url(DATABASE_URL)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, connect_args=async_connect_args,
+                                       **_pool_options(ASYNC_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW))
+    # expire_on_commit=False: attributes stay readable after commit without an implicit (and,
+    # under asyncio, impossible) lazy reload.
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
     Base = declarative_base()
     print("✅ Database engine created successfully.")
 except Exception as e:
@@ -30,4 +86,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """Dependency to get an async DB session for a request; queries don't block the event loop."""
+    async with AsyncSessionLocal() as db:
+        yield db
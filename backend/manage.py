@@ -0,0 +1,248 @@
+"""
+Maintenance commands for the recommender's offline artifacts.
+Run from the `backend` directory, e.g. `python manage.py build-index --type ivf`.
+"""
+import argparse
+import json
+import os
+import time
+import joblib
+import numpy as np
+
+from services import embedding_store, facet_index, index_service, job_catalog, lexical_index, neighbor_graph
+
+DATA_DIR = "data"
+
+def load_job_embeddings():
+    """The job embeddings, from the memory-mapped store when it exists."""
+    if os.path.exists(os.path.join(DATA_DIR, embedding_store.EMBEDDINGS_FILE)):
+        return embedding_store.EmbeddingStore.open(DATA_DIR).vectors
+    return joblib.load(os.path.join(DATA_DIR, "job_embeddings.pkl"))
+
+# --- Index Commands ---
+def build_index(args):
+    """Builds an ANN index from the job embeddings and saves it next to them so workers can load it at startup."""
+    embeddings = load_job_embeddings()
+    kind = index_service.resolve_index_type(len(embeddings), args.type)
+    if kind not in index_service.PREBUILT_FILES:
+        print(f"'{kind}' indexes are built in-process at startup; nothing to save.")
+        return
+    options = {
+        "ivf": {"n_lists": args.n_lists, "nprobe": args.nprobe},
+        "hnsw": {"ef": args.ef},
+        "int8": {"rerank": args.rerank},
+    }[kind]
+    index = index_service.INDEX_TYPES[kind].build(embeddings, **{k: v for k, v in options.items() if v})
+    path = os.path.join(DATA_DIR, index_service.PREBUILT_FILES[kind])
+    index.save(path)
+    print(f"✅ Saved {kind} index over {len(index)} jobs to {path}.")
+
+def recall_report(args):
+    """Compares an index's top-k against exact search and writes the report as JSON."""
+    embeddings = load_job_embeddings()
+    kind = index_service.resolve_index_type(len(embeddings), args.type)
+    index = index_service.load_or_build_index(embeddings, kind=kind, data_dir=DATA_DIR)
+    queries = np.load(args.queries) if args.queries else None
+    report = index_service.recall_report(index, embeddings, queries=queries, k=args.k)
+
+    print(f"{report['index']} index, {report['rows']} jobs, {report['queries']} queries, "
+          f"exact search {report['exact_mean_ms']:.2f} ms/query")
+    if report["index_bytes"]:
+        print(f"  index memory {report['index_bytes'] / 2**20:.1f} MiB vs "
+              f"{report['float32_bytes'] / 2**20:.1f} MiB for float32 vectors")
+    for row in report["results"]:
+        print("  " + ", ".join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+                               for key, value in row.items()))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Report written to {args.output}.")
+
+# --- Artifact Conversion Commands ---
+def convert_embeddings(args):
+    """Rewrites job_embeddings.pkl as a memory-mappable store, keyed by the jobs_df index."""
+    embeddings = joblib.load(os.path.join(DATA_DIR, "job_embeddings.pkl"))
+    jobs_df = joblib.load(os.path.join(DATA_DIR, "jobs_df.pkl"))
+    if len(jobs_df) != len(embeddings):
+        raise SystemExit(f"jobs_df has {len(jobs_df)} rows but there are {len(embeddings)} embeddings.")
+    ids = jobs_df.index.to_numpy() if jobs_df.index.dtype.kind in "iu" else np.arange(len(jobs_df))
+    path = embedding_store.write_store(DATA_DIR, embeddings, ids, dtype=args.dtype)
+    print(f"✅ Wrote {len(embeddings)} x {embeddings.shape[1]} {args.dtype} embeddings to {path}.")
+
+def convert_jobs(args):
+    """Rewrites jobs_df.pkl as the columnar, memory-mappable job catalog."""
+    jobs_df = joblib.load(os.path.join(DATA_DIR, "jobs_df.pkl"))
+    path = job_catalog.write_catalog(DATA_DIR, jobs_df)
+    print(f"✅ Wrote {len(jobs_df)} jobs to {path}.")
+
+def build_facets(args):
+    """Builds the company/location filter indexes over the columnar catalog so workers don't at startup."""
+    catalog = job_catalog.JobCatalog.open(DATA_DIR)
+    facets = facet_index.JobFacets.build(catalog, columns=tuple(args.columns) if args.columns else facet_index.FACET_COLUMNS)
+    path = facets.save(DATA_DIR)
+    for name, facet in facets.facets.items():
+        bitmaps = sum(1 for kind, _, _ in facet.terms.values() if kind == "bitmap")
+        print(f"  {name}: {len(facet.terms)} values, {bitmaps} as bitmaps")
+    print(f"✅ Wrote facet indexes over {len(catalog)} jobs to {path}.")
+
+def build_lexical(args):
+    """Builds the BM25 index over job titles and descriptions used by RETRIEVAL_MODE=hybrid."""
+    catalog = job_catalog.JobCatalog.open(DATA_DIR)
+    index = lexical_index.BM25Index.build(catalog)
+    path = index.save(DATA_DIR)
+    postings = int(index.tf_offsets[-1])
+    print(f"  {len(index.terms)} terms, {postings} postings in {index.postings.nbytes / 2**20:.1f} MiB "
+          f"({index.postings.nbytes / max(postings, 1):.2f} bytes per posting)")
+    print(f"✅ Wrote the lexical index over {len(catalog)} jobs to {path}.")
+
+def build_neighbors(args):
+    """Precomputes every job's nearest jobs so "more like this" is a lookup, not a search."""
+    if os.path.exists(os.path.join(DATA_DIR, embedding_store.EMBEDDINGS_FILE)):
+        store = embedding_store.EmbeddingStore.open(DATA_DIR)
+        embeddings, normalized = store.vectors, store.normalized
+    else:
+        embeddings, normalized = load_job_embeddings(), False
+    started = time.perf_counter()
+
+    def progress(done, total):
+        elapsed = time.perf_counter() - started
+        print(f"  {done}/{total} jobs, {elapsed:.0f}s elapsed, ~{elapsed * (total - done) / done:.0f}s left", end="\r")
+
+    graph = neighbor_graph.NeighborGraph.build(embeddings, k=args.k, normalized=normalized, threads=args.threads,
+                                               query_rows=args.query_rows, progress=progress)
+    path = graph.save(DATA_DIR)
+    print(f"\n  {len(graph)} jobs x {graph.k} neighbours in {graph.nbytes / 2**20:.1f} MiB, "
+          f"built in {time.perf_counter() - started:.1f}s")
+    print(f"✅ Wrote the job neighbour graph to {path}.")
+
+# --- Catalog Database Commands ---
+def seed_jobs(args):
+    """Copies the offline catalog into the jobs table so ingestion can update or delete those jobs."""
+    import database, models
+    from services import ingest_service
+    models.Base.metadata.create_all(bind=database.engine)
+    if os.path.exists(os.path.join(DATA_DIR, job_catalog.CATALOG_DIR, "meta.json")):
+        catalog = job_catalog.JobCatalog.open(DATA_DIR)
+    else:
+        catalog = job_catalog.JobCatalog.from_dataframe(joblib.load(os.path.join(DATA_DIR, "jobs_df.pkl")))
+    db = database.SessionLocal()
+    try:
+        seeded = ingest_service.seed_jobs(db, catalog, load_job_embeddings())
+    finally:
+        db.close()
+    print(f"✅ Seeded {seeded} jobs into the jobs table.")
+
+def ingest(args):
+    """Ingests a CSV or JSONL file of postings. Running servers pick the changes up on their next catalog sync."""
+    import database, models
+    from sentence_transformers import SentenceTransformer
+    from services import ingest_service
+    models.Base.metadata.create_all(bind=database.engine)
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "jsonl")
+    sbert_model = SentenceTransformer(os.path.join(DATA_DIR, "minilm_model"))
+    db = database.SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8", newline="") as f:
+            stats = ingest_service.ingest_postings(db, ingest_service.read_postings(f, fmt), sbert_model,
+                                                   batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"✅ Ingested {args.path}: {stats}")
+
+def migrate(args):
+    """Upgrades tables created by earlier versions in place; new tables are created at server startup."""
+    import database
+    from services import ingest_service, precompute_service, saved_jobs_service
+    applied = (ingest_service.migrate_jobs(database.engine) + saved_jobs_service.migrate_saved_jobs(database.engine)
+               + precompute_service.migrate_precomputed(database.engine))
+    for change in applied:
+        print(f"  {change}")
+    print(f"✅ Database schema is up to date ({len(applied)} changes applied).")
+
+# --- Batch Recommendation Commands ---
+def precompute(args):
+    """Ranks the catalog for every user's resume and stores the results for /recommendations to serve."""
+    import database, models
+    from services import precompute_service, recommender_service
+    models.Base.metadata.create_all(bind=database.engine)
+    # Exact search: batch ranking is one blocked matrix multiply per chunk of resumes.
+    recommender_service.load_search_artifacts(index_kind=args.type)
+    if recommender_service.job_index is None:
+        raise SystemExit("Could not load the job catalog and search index; see the errors above.")
+    db = database.SessionLocal()
+    try:
+        version = recommender_service.sync_catalog(db)
+        stats = precompute_service.precompute_recommendations(
+            db, recommender_service.job_index, recommender_service.job_catalog_store, version,
+            top_n=args.top_n, chunk_size=args.chunk_size,
+        )
+    finally:
+        db.close()
+    print(f"✅ Precomputed recommendations against catalog version {version}: {stats}")
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Job Recommender maintenance commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("build-index", help="Prebuild the job search index into data/.")
+    cmd.add_argument("--type", default=None, help="auto, exact, ivf, hnsw or int8 (defaults to JOB_INDEX_TYPE).")
+    cmd.add_argument("--n-lists", type=int, default=None, help="IVF list count (default: sqrt of catalog size).")
+    cmd.add_argument("--nprobe", type=int, default=None, help="Default IVF lists probed per query.")
+    cmd.add_argument("--ef", type=int, default=None, help="Default HNSW search breadth.")
+    cmd.add_argument("--rerank", type=int, default=None, help="Default int8 shortlist re-scored exactly.")
+    cmd.set_defaults(func=build_index)
+
+    cmd = commands.add_parser("recall-report", help="Measure index recall and latency against exact search.")
+    cmd.add_argument("--type", default=None, help="auto, exact, ivf, hnsw or int8 (defaults to JOB_INDEX_TYPE).")
+    cmd.add_argument("--k", type=int, default=10)
+    cmd.add_argument("--queries", default=None, help="Optional .npy of query embeddings, e.g. real resumes.")
+    cmd.add_argument("--output", default=os.path.join(DATA_DIR, "index_recall_report.json"))
+    cmd.set_defaults(func=recall_report)
+
+    cmd = commands.add_parser("convert-embeddings", help="Convert job_embeddings.pkl to the memory-mapped store.")
+    cmd.add_argument("--dtype", choices=["float32", "float16"], default="float32",
+                     help="float16 halves the file at a small cost in score precision.")
+    cmd.set_defaults(func=convert_embeddings)
+
+    cmd = commands.add_parser("convert-jobs", help="Convert jobs_df.pkl to the columnar job catalog.")
+    cmd.set_defaults(func=convert_jobs)
+
+    cmd = commands.add_parser("build-facets", help="Build the location/company filter indexes into data/.")
+    cmd.add_argument("--columns", nargs="+", default=None, help="Catalog columns to index (defaults to FACET_COLUMNS).")
+    cmd.set_defaults(func=build_facets)
+
+    cmd = commands.add_parser("build-lexical", help="Build the BM25 candidate index into data/ (RETRIEVAL_MODE=hybrid).")
+    cmd.set_defaults(func=build_lexical)
+
+    cmd = commands.add_parser("build-neighbors", help="Precompute each job's nearest jobs into data/ for /jobs/{id}/similar.")
+    cmd.add_argument("--k", type=int, default=neighbor_graph.NEIGHBORS_K, help="Neighbours stored per job.")
+    cmd.add_argument("--threads", type=int, default=index_service.SEARCH_THREADS,
+                     help="Chunks searched in parallel (default: JOB_INDEX_THREADS or one per core).")
+    cmd.add_argument("--query-rows", type=int, default=neighbor_graph.NEIGHBORS_QUERY_ROWS,
+                     help="Jobs per chunk, searched as one batch.")
+    cmd.set_defaults(func=build_neighbors)
+
+    cmd = commands.add_parser("seed-jobs", help="Copy the offline job catalog into the jobs table.")
+    cmd.set_defaults(func=seed_jobs)
+
+    cmd = commands.add_parser("ingest", help="Add, update or delete jobs from a CSV or JSONL file.")
+    cmd.add_argument("path")
+    cmd.add_argument("--format", choices=["csv", "jsonl"], default=None, help="Defaults to the file extension.")
+    cmd.add_argument("--batch-size", type=int, default=1000, help="Postings per commit and SBERT batch.")
+    cmd.set_defaults(func=ingest)
+
+    cmd = commands.add_parser("migrate", help="Upgrade existing tables to the current schema.")
+    cmd.set_defaults(func=migrate)
+
+    cmd = commands.add_parser("precompute", help="Precompute every user's recommendations, e.g. nightly.")
+    cmd.add_argument("--top-n", type=int, default=10,
+                     help="Jobs stored per user; requests for more fall back to a live search.")
+    cmd.add_argument("--chunk-size", type=int, default=1024,
+                     help="Resumes ranked per matrix multiply and commit.")
+    cmd.add_argument("--type", default="exact", help="Index to rank with (default exact).")
+    cmd.set_defaults(func=precompute)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, Boolean, DateTime, Index, JSON
 from sqlalchemy.orm import relationship
 from database import Base
 from sqlalchemy.dialects.postgresql import ARRAY
 
+# Embeddings are Postgres float arrays; SQLite (local runs and benchmarks) stores them as JSON lists.
+FloatArray = ARRAY(Float).with_variant(JSON(), "sqlite")
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
@@ -14,27 +18,70 @@ class Resume(Base):
     __tablename__ = "resumes"
     id = Column(Integer, primary_key=True, index=True)
     raw_text = Column(Text)
-    embedding = Column(ARRAY(Float))
+    embedding = Column(FloatArray)
     user_id = Column(Integer, ForeignKey("users.id"))
     owner = relationship("User", back_populates="resume")
 
+class ResumeUpload(Base):
+    """Progress of a background resume parse, polled by the client after uploading."""
+    __tablename__ = "resume_uploads"
+    id = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    status = Column(String, default="queued")  # queued, processing, done or error
+    message = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
 class Job(Base):
     __tablename__ = "jobs"
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     description = Column(Text)
-    embedding = Column(ARRAY(Float))
+    embedding = Column(FloatArray)
     company = Column(String, nullable=True)
     location = Column(String, nullable=True)
+    # Ingestion bookkeeping: the source's id, a hash to skip unchanged rows, and the
+    # catalog version that last touched the row so workers can pull only what changed.
+    external_id = Column(String, unique=True, index=True, nullable=True)
+    content_hash = Column(String, nullable=True)
+    catalog_version = Column(Integer, index=True, default=0)
+    is_deleted = Column(Boolean, default=False)
+
+class CatalogState(Base):
+    __tablename__ = "catalog_state"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0)
+    # The highest offline catalog id copied into the jobs table by seed-jobs. Until the catalog is
+    # seeded, the id sequence can hand ingested jobs ids the catalog already uses.
+    seeded_max_id = Column(Integer, nullable=True)
+
+class PrecomputedRecommendation(Base):
+    """One ranked job per row, written for every user by `manage.py precompute`."""
+    __tablename__ = "precomputed_recommendations"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    job_id = Column(Integer)
+    score = Column(Float)
+    # Served only while all three still match: the catalog the ranking was computed against,
+    # the resume it was computed from and the retrieval pipeline that ranked it.
+    catalog_version = Column(Integer)
+    resume_hash = Column(String)
+    retrieval_mode = Column(String, nullable=True)
+    computed_at = Column(DateTime(timezone=True))
 
 # --- ADD THIS NEW TABLE ---
 class SavedJob(Base):
     __tablename__ = "saved_jobs"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
+    # The catalog job this is. Not a foreign key: the catalog can be served without seeding the
+    # jobs table. Rows saved before it existed have no job_id and keep their own description.
+    job_id = Column(Integer, nullable=True)
     title = Column(String)
     description = Column(Text)
     company = Column(String, nullable=True)
     location = Column(String, nullable=True)
-    score = Column(String) # Storing score as string
-    explanation = Column(Text)
\ No newline at end of file
+    score = Column(Float)  # was a String column; `manage.py migrate` converts existing tables
+    explanation = Column(Text)
+
+    # Serves the newest-first, keyset-paginated saved-jobs list straight from the index.
+    __table_args__ = (Index("ix_saved_jobs_user_id_id", "user_id", "id"),)
\ No newline at end of file
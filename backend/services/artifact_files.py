@@ -0,0 +1,42 @@
+import contextlib
+import json
+import os
+import numpy as np
+
+# Running workers memory-map the artifacts under data/, and rebuilding them is routine. Overwriting
+# a mapped file in place truncates the pages a worker is reading (SIGBUS, or torn reads), so every
+# file is written beside its target and renamed over it: workers keep the old, now unlinked, file
+# until they reopen. Each artifact removes its metadata file first and writes it last, so a worker
+# starting mid-rebuild finds no metadata rather than a mix of old and new arrays.
+
+@contextlib.contextmanager
+def atomic_write(path: str, mode: str = "wb"):
+    """Opens `path`.tmp for writing and renames it over `path` once the block completes."""
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, mode) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+def save_array(path: str, array: np.ndarray):
+    """np.save, published atomically."""
+    with atomic_write(path) as f:
+        np.save(f, array)
+
+def save_raw(path: str, array: np.ndarray):
+    """The array's bytes with no header (for np.memmap), published atomically."""
+    with atomic_write(path) as f:
+        np.asarray(array).tofile(f)
+
+def save_json(path: str, value, **kwargs):
+    with atomic_write(path, "w") as f:
+        json.dump(value, f, **kwargs)
+
+def invalidate(path: str):
+    """Removes an artifact's metadata file before its arrays are replaced."""
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
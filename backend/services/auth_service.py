@@ -1,13 +1,20 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from argon2 import PasswordHasher
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
 import os
 from dotenv import load_dotenv
 
 import database, models
+from services.cache_service import TTLCache
+from services.metrics_service import stage
 
 load_dotenv()
 
@@ -15,6 +22,14 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "a_very_secret_key_for_dev")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Comma-separated usernames allowed to call catalog maintenance endpoints.
+ADMIN_USERNAMES = {name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip()}
+# Authenticated principals are cached per token so requests skip the users-table lookup.
+# 0 disables the cache.
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "50000"))
+# Each Argon2 hash uses ~64 MB, so hashing runs on a small dedicated pool rather than unbounded threads.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
 
 # --- Password Hashing with Argon2 ---
 ph = PasswordHasher()
@@ -28,6 +43,15 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return ph.hash(password)
 
+password_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
+
+async def verify_password_async(plain_password, hashed_password):
+    """verify_password on the hashing pool, so login storms don't stall the event loop."""
+    with stage("auth.verify_password"):
+        return await asyncio.get_running_loop().run_in_executor(
+            password_hash_executor, verify_password, plain_password, hashed_password
+        )
+
 # --- JWT Token Creation ---
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -38,40 +62,77 @@ def create_access_token(data: dict):
 # --- Dependency to get current user ---
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as endpoints see it: just the fields they need, safe to cache and share."""
+    id: int
+    username: str
+
+# token -> (Principal, token expiry as a unix timestamp). Entries are never invalidated, only
+# expire: nothing changes a user's id or username, or deletes an account. A path that does must
+# drop that user's entries, or the old principal is served for up to AUTH_CACHE_TTL_SECONDS.
+principal_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(database.get_async_db)):
+    cached = principal_cache.get(token)
+    if cached is not None and cached[1] > time.time():
+        return cached[0]
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with stage("auth.decode_token"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(models.User).filter(models.User.username == username).first()
+    with stage("auth.user_query"):
+        user = (await db.execute(
+            select(models.User.id, models.User.username).where(models.User.username == username)
+        )).first()
     if user is None:
         raise credentials_exception
-    return user
+
+    principal = Principal(id=user.id, username=user.username)
+    if AUTH_CACHE_TTL_SECONDS > 0:
+        expires_at = float(payload.get("exp", 0))
+        # Never cache past the token's own expiry.
+        principal_cache.set(token, (principal, expires_at), ttl=min(AUTH_CACHE_TTL_SECONDS, expires_at - time.time()))
+    return principal
+
+def get_current_admin(current_user: Principal = Depends(get_current_user)):
+    if current_user.username not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
 
 # --- NEW: User Registration Function ---
-def register_new_user(db: Session, username: str, password: str):
-    db_user = db.query(models.User).filter(models.User.username == username).first()
+async def register_new_user(db: AsyncSession, username: str, password: str):
+    with stage("auth.user_query"):
+        db_user = (await db.execute(select(models.User.id).where(models.User.username == username))).first()
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    hashed_password = get_password_hash(password)
+    with stage("auth.hash_password"):
+        hashed_password = await asyncio.get_running_loop().run_in_executor(
+            password_hash_executor, get_password_hash, password
+        )
     new_user = models.User(username=username, hashed_password=hashed_password)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 # --- NEW: User Login Function ---
-def login_user(db: Session, username: str, password: str):
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+async def login_user(db: AsyncSession, username: str, password: str):
+    with stage("auth.user_query"):
+        user = (await db.execute(
+            select(models.User.username, models.User.hashed_password).where(models.User.username == username)
+        )).first()
+    if not user or not await verify_password_async(password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Incorrect username or password")
     access_token = create_access_token(data={"sub": user.username})
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
@@ -0,0 +1,76 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from services.metrics_service import Histogram, registry
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+QUEUE_WAIT_BUCKETS_SECONDS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+class MicroBatcher:
+    """
+    Collects items submitted concurrently from any thread and hands them to `fn` in batches.
+    A batch is dispatched when it reaches `max_batch_size` or when its oldest item has waited
+    `max_wait_ms`, and runs on a dedicated executor with `workers` threads. While every worker
+    is busy, new items keep queueing, so batches grow exactly when the service is under load.
+    `fn` takes a list of items and returns a list of results in the same order.
+    """
+
+    def __init__(self, fn, max_batch_size: int = 32, max_wait_ms: float = 5.0, workers: int = 1, name: str = "batcher"):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait = Histogram(QUEUE_WAIT_BUCKETS_SECONDS)
+        # Also exported on /metrics, labelled with the batcher's name.
+        registry.histogram("microbatch_batch_size", "Items per dispatched batch.",
+                           BATCH_SIZE_BUCKETS).attach(self.batch_sizes, batcher=name)
+        registry.histogram("microbatch_queue_wait_seconds", "Time items wait in the queue before their batch runs.",
+                           QUEUE_WAIT_BUCKETS_SECONDS).attach(self.queue_wait, batcher=name)
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        threading.Thread(target=self._dispatch, name=f"{name}-dispatch", daemon=True).start()
+
+    def submit(self, item) -> Future:
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def _dispatch(self):
+        while True:
+            self._slots.acquire()
+            batch = [self._queue.get()]
+            deadline = batch[0][2] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch):
+        try:
+            started = time.perf_counter()
+            self.batch_sizes.observe(len(batch))
+            for _, _, enqueued_at in batch:
+                self.queue_wait.observe(started - enqueued_at)
+            try:
+                results = self.fn([item for item, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                return
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._queue.qsize(),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+        }
@@ -0,0 +1,87 @@
+import os
+import struct
+import numpy as np
+
+# --- File Format ---
+# job_embeddings.emb:      64-byte header, then rows * dim contiguous little-endian floats.
+# job_embeddings.ids.npy:  int64 job id for each row.
+# The header is: magic, format version, dtype code, normalized flag, rows, dim, data offset.
+MAGIC = b"JOBEMB\x00\x00"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIIQIQ")
+HEADER_SIZE = 64
+DTYPES = {0: np.dtype("<f4"), 1: np.dtype("<f2")}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+WRITE_CHUNK_ROWS = 65536
+
+EMBEDDINGS_FILE = "job_embeddings.emb"
+IDS_FILE = "job_embeddings.ids.npy"
+
+class EmbeddingStore:
+    """
+    Job embeddings opened through numpy.memmap. Every worker maps the same file, so the
+    OS page cache holds one shared copy, and opening costs the same for any catalog size.
+    """
+
+    def __init__(self, vectors: np.ndarray, ids: np.ndarray, normalized: bool, path: str | None = None):
+        self.vectors = vectors
+        self.ids = ids
+        self.normalized = normalized
+        self.path = path
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1]
+
+    @classmethod
+    def open(cls, data_dir: str = "data"):
+        path = os.path.join(data_dir, EMBEDDINGS_FILE)
+        with open(path, "rb") as f:
+            magic, version, dtype_code, normalized, rows, dim, offset = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a job embedding store.")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path} uses format version {version}; this build reads up to {FORMAT_VERSION}.")
+        vectors = np.memmap(path, dtype=DTYPES[dtype_code], mode="r", offset=offset, shape=(rows, dim))
+        ids = np.load(os.path.join(data_dir, IDS_FILE), mmap_mode="r")
+        if ids.shape[0] != rows:
+            raise ValueError(f"{IDS_FILE} has {ids.shape[0]} ids for {rows} embeddings.")
+        return cls(vectors, ids, bool(normalized), path)
+
+    def get(self, rows) -> np.ndarray:
+        """Float32 copies of the given rows, whatever the on-disk dtype."""
+        return np.asarray(self.vectors[rows], dtype=np.float32)
+
+def write_store(data_dir: str, embeddings: np.ndarray, ids: np.ndarray | None = None,
+                dtype: str = "float32", normalize: bool = True):
+    """Writes embeddings in the store format, chunk by chunk so the input is never copied whole."""
+    dtype = np.dtype(dtype).newbyteorder("<")
+    if dtype not in DTYPE_CODES:
+        raise ValueError("Embedding store supports float32 and float16.")
+    rows, dim = embeddings.shape
+    ids = np.arange(rows, dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+    if ids.shape[0] != rows:
+        raise ValueError(f"Got {ids.shape[0]} ids for {rows} embeddings.")
+
+    path = os.path.join(data_dir, EMBEDDINGS_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, DTYPE_CODES[dtype], int(normalize), rows, dim, HEADER_SIZE)
+                .ljust(HEADER_SIZE, b"\x00"))
+        for start in range(0, rows, WRITE_CHUNK_ROWS):
+            chunk = np.asarray(embeddings[start:start + WRITE_CHUNK_ROWS], dtype=np.float32)
+            if normalize:
+                norms = np.linalg.norm(chunk, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                chunk = chunk / norms
+            f.write(chunk.astype(dtype).tobytes())
+    ids_path = os.path.join(data_dir, IDS_FILE)
+    with open(f"{ids_path}.tmp", "wb") as f:
+        np.save(f, ids)
+    # Rename last, so a worker starting mid-conversion never maps a half-written file.
+    os.replace(f"{ids_path}.tmp", ids_path)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,36 @@
+import asyncio
+import os
+import numpy as np
+from dotenv import load_dotenv
+
+from services.batching import MicroBatcher
+
+load_dotenv()
+
+# --- Configuration ---
+ENCODER_MAX_BATCH_SIZE = int(os.getenv("ENCODER_MAX_BATCH_SIZE", "32"))
+ENCODER_MAX_WAIT_MS = float(os.getenv("ENCODER_MAX_WAIT_MS", "5"))
+# Each worker runs one batch at a time; torch already spreads a batch over several cores.
+ENCODER_WORKERS = int(os.getenv("ENCODER_WORKERS", "1"))
+
+class BatchingEncoder(MicroBatcher):
+    """
+    Coalesces concurrent SBERT encode calls into batches on a dedicated executor, so requests
+    never run inference on the event loop and concurrent uploads share one forward pass.
+    """
+
+    def __init__(self, model, max_batch_size: int = ENCODER_MAX_BATCH_SIZE,
+                 max_wait_ms: float = ENCODER_MAX_WAIT_MS, workers: int = ENCODER_WORKERS):
+        self.model = model
+        super().__init__(self._encode_batch, max_batch_size, max_wait_ms, workers, name="sbert")
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(texts, batch_size=len(texts), show_progress_bar=False, convert_to_numpy=True)
+
+    def encode(self, text: str) -> np.ndarray:
+        """Blocking encode for worker threads and scripts."""
+        return self.submit(text).result()
+
+    async def encode_async(self, text: str) -> np.ndarray:
+        """Encode from a request handler without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(text))
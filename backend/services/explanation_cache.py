@@ -0,0 +1,136 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+from services.cache_service import TTLCache
+
+# Expired rows are deleted from the disk tier on a write at most this often.
+PURGE_INTERVAL_SECONDS = 3600
+
+class _OwnerCancelled(Exception):
+    """Set on in-flight keys whose generating request was cancelled; their waiters generate them instead."""
+
+class ExplanationCache:
+    """
+    Two-tier cache for LLM explanations: an in-memory LRU in front of a SQLite file that
+    survives restarts and is shared by every worker on the host. Concurrent requests for
+    the same key in this process share a single in-flight LLM call.
+    """
+
+    def __init__(self, path: str | None, maxsize: int = 20000, ttl: float = 7 * 24 * 3600):
+        self.ttl = ttl
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._next_purge = 0.0
+        if path:
+            try:
+                self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS explanations "
+                    "(key TEXT PRIMARY KEY, explanation TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS ix_explanations_created_at ON explanations (created_at)")
+            except sqlite3.Error as e:
+                print(f"⚠️ Explanation cache at {path} unavailable ({e}). Using memory only.")
+                self._conn = None
+
+    # --- Disk tier ---
+    def _disk_get_many(self, keys: list[str]) -> dict[str, str]:
+        if self._conn is None or not keys:
+            return {}
+        oldest = time.time() - self.ttl
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, explanation FROM explanations WHERE created_at >= ? AND key IN ({placeholders})",
+                [oldest, *keys],
+            ).fetchall()
+        return dict(rows)
+
+    def _disk_put_many(self, items: dict[str, str]):
+        if self._conn is None or not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO explanations (key, explanation, created_at) VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in items.items()],
+            )
+            if now >= self._next_purge:
+                # Reads already skip expired rows; this keeps them from piling up in the file.
+                self._conn.execute("DELETE FROM explanations WHERE created_at < ?", (now - self.ttl,))
+                self._next_purge = now + PURGE_INTERVAL_SECONDS
+
+    # --- Lookup with single-flight ---
+    async def get_cached_many(self, keys: list[str]) -> list[str | None]:
+        """The cached value of each key, from memory or disk, or None; nothing is generated."""
+        results = [self.memory.get(key) for key in keys]
+        missing = [i for i, value in enumerate(results) if value is None]
+        if missing:
+            found = await asyncio.to_thread(self._disk_get_many, [keys[i] for i in missing])
+            for i in missing:
+                if keys[i] in found:
+                    results[i] = found[keys[i]]
+                    self.memory.set(keys[i], results[i])
+        return results
+
+    async def get_or_compute_many(self, keys: list[str], compute):
+        """
+        Returns one value per key. Misses that no other request is already generating are
+        passed to `compute(positions)` together, so a batched explanation stays one LLM call.
+        """
+        results = await self.get_cached_many(keys)
+        loop = asyncio.get_running_loop()
+        pending = [i for i, value in enumerate(results) if value is None]
+        while pending:
+            owned, waiting = [], []
+            for i in pending:
+                key = keys[i]
+                if (value := self.memory.get(key)) is not None:
+                    results[i] = value
+                elif key in self._in_flight:
+                    waiting.append((i, self._in_flight[key]))
+                else:
+                    self._in_flight[key] = loop.create_future()
+                    owned.append(i)
+
+            if owned:
+                await self._compute_owned(keys, owned, results, compute)
+
+            pending = []
+            for i, future in waiting:
+                try:
+                    # Shielded: a waiter being cancelled must not cancel the owner's future.
+                    results[i] = await asyncio.shield(future)
+                except _OwnerCancelled:
+                    pending.append(i)  # nobody is generating it any more; claim it next round
+        return results
+
+    async def _compute_owned(self, keys: list[str], owned: list[int], results: list, compute):
+        try:
+            values = await compute(owned)
+        except BaseException as e:
+            # Including cancellation (a client disconnecting mid-stream): the keys must leave
+            # _in_flight, or every later request for them would wait forever.
+            error = e if isinstance(e, Exception) else _OwnerCancelled()
+            for i in owned:
+                future = self._in_flight.pop(keys[i])
+                future.set_exception(error)
+                future.exception()  # mark retrieved so an unawaited future doesn't log a warning
+            raise
+        fresh = {}
+        for i, value in zip(owned, values):
+            results[i] = value
+            fresh[keys[i]] = value
+            self.memory.set(keys[i], value)
+            self._in_flight.pop(keys[i]).set_result(value)
+        await asyncio.to_thread(self._disk_put_many, fresh)
+
+def default_cache_path(data_dir: str = "data") -> str | None:
+    path = os.getenv("EXPLANATION_CACHE_PATH", os.path.join(data_dir, "explanation_cache.sqlite3"))
+    return path or None
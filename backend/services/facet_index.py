@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+from services import artifact_files
+
+load_dotenv()
+
+# --- Configuration ---
+# Catalog columns that can be filtered on.
+FACET_COLUMNS = tuple(c.strip() for c in os.getenv("FACET_COLUMNS", "company,location").split(",") if c.strip())
+FACETS_DIR = "job_facets"
+
+# --- File Format ---
+# data/job_facets/<facet>.json          row count, and per value: [kind, slot, row count]
+# data/job_facets/<facet>.rows.npy      int32 rows of every "list" value, back to back
+# data/job_facets/<facet>.offsets.npy   int64 start of each "list" value in rows.npy, + 1 end entry
+# data/job_facets/<facet>.bitmaps.npy   uint8 packed bitmaps of the "bitmap" values, one per row
+# A value that matches more than 1/32 of the catalog is cheaper as a bitmap (rows / 8 bytes) than
+# as a row list (4 bytes per match), so common values get bitmaps and the long tail gets lists.
+FORMAT_VERSION = 1
+BITMAP_MIN_FRACTION = 1 / 32
+
+def normalize_value(value) -> str | None:
+    if value is None or value != value:  # value != value catches NaN
+        return None
+    value = " ".join(str(value).split()).casefold()
+    return value or None
+
+def _bit_test(packed: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Which of `rows` are set in a np.packbits bitmap, touching only their bytes."""
+    return ((packed[rows >> 3] >> (7 - (rows & 7))) & 1).astype(bool)
+
+def _is_member(rows: np.ndarray, sorted_rows: np.ndarray) -> np.ndarray:
+    if not len(sorted_rows):
+        return np.zeros(len(rows), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_rows, rows), len(sorted_rows) - 1)
+    return sorted_rows[positions] == rows
+
+# --- 1. One Facet ---
+class FacetIndex:
+    """Inverted index from a column's normalized values to the catalog rows holding them."""
+
+    def __init__(self, name: str, n_rows: int, terms: dict, rows: np.ndarray, offsets: np.ndarray, bitmaps: np.ndarray):
+        self.name = name
+        self.n_rows = n_rows
+        self.terms = terms  # value -> (kind, slot, count)
+        self.rows = rows
+        self.offsets = offsets
+        self.bitmaps = bitmaps
+
+    @classmethod
+    def build(cls, name: str, column, n_rows: int):
+        """Builds the index from a catalog StringColumn, grouping raw byte strings before decoding any."""
+        blob = column.blob.tobytes()
+        offsets = np.asarray(column.offsets)
+        nulls = np.asarray(column.nulls)
+        raw_codes, codes = {}, np.empty(n_rows, dtype=np.int64)
+        for row in range(n_rows):
+            value = b"" if nulls[row] else blob[offsets[row]:offsets[row + 1]]
+            codes[row] = raw_codes.setdefault(value, len(raw_codes))
+
+        # Raw spellings that normalize to the same value ("Remote", " remote") share one term.
+        normalized, term_of_raw = {}, np.empty(len(raw_codes), dtype=np.int64)
+        for raw, code in raw_codes.items():
+            value = normalize_value(raw.decode("utf-8")) if raw else None
+            term_of_raw[code] = -1 if value is None else normalized.setdefault(value, len(normalized))
+        term_codes = term_of_raw[codes]
+
+        order = np.argsort(term_codes, kind="stable")  # rows stay sorted within each term
+        counts = np.bincount(term_codes[term_codes >= 0], minlength=len(normalized))
+        starts = np.searchsorted(term_codes[order], np.arange(len(normalized)))
+        terms, lists, bitmaps = {}, [], []
+        list_offsets = [0]
+        for value, term in normalized.items():
+            matched = order[starts[term]:starts[term] + counts[term]]
+            if counts[term] >= BITMAP_MIN_FRACTION * n_rows:
+                mask = np.zeros(n_rows, dtype=bool)
+                mask[matched] = True
+                terms[value] = ("bitmap", len(bitmaps), int(counts[term]))
+                bitmaps.append(np.packbits(mask))
+            else:
+                terms[value] = ("list", len(lists), int(counts[term]))
+                lists.append(matched.astype(np.int32))
+                list_offsets.append(list_offsets[-1] + len(matched))
+        rows = np.concatenate(lists) if lists else np.empty(0, dtype=np.int32)
+        packed = np.stack(bitmaps) if bitmaps else np.empty((0, (n_rows + 7) // 8), dtype=np.uint8)
+        return cls(name, n_rows, terms, rows, np.asarray(list_offsets, dtype=np.int64), packed)
+
+    def term(self, value: str):
+        """("list", sorted rows) or ("bitmap", packed bits) for a value, or None if no job has it."""
+        entry = self.terms.get(normalize_value(value))
+        if entry is None:
+            return None
+        kind, slot, count = entry
+        if kind == "bitmap":
+            return ("bitmap", self.bitmaps[slot], count)
+        return ("list", np.asarray(self.rows[self.offsets[slot]:self.offsets[slot + 1]], dtype=np.int64), count)
+
+    def match_any(self, values: list[str]):
+        """The rows matching any of `values`, as a list when every term is one, else as a bitmap."""
+        terms = [t for t in (self.term(v) for v in values) if t is not None]
+        if not terms:
+            return ("list", np.empty(0, dtype=np.int64), 0)
+        if len(terms) == 1:
+            return terms[0]
+        if all(kind == "list" for kind, _, _ in terms):
+            rows = np.unique(np.concatenate([rows for _, rows, _ in terms]))
+            return ("list", rows, len(rows))
+        packed = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        for kind, data, _ in terms:
+            if kind == "bitmap":
+                packed |= data
+            else:
+                np.bitwise_or.at(packed, data >> 3, (128 >> (data & 7)).astype(np.uint8))
+        return ("bitmap", packed, sum(count for _, _, count in terms))
+
+    def save(self, root: str):
+        # Workers may have the current arrays mapped, so they are replaced, never overwritten in place.
+        artifact_files.invalidate(os.path.join(root, f"{self.name}.json"))
+        for suffix in ("rows", "offsets", "bitmaps"):
+            artifact_files.save_array(os.path.join(root, f"{self.name}.{suffix}.npy"), getattr(self, suffix))
+        # The JSON goes last: a facet without it is incomplete and won't be opened.
+        artifact_files.save_json(os.path.join(root, f"{self.name}.json"),
+                                 {"version": FORMAT_VERSION, "rows": self.n_rows, "terms": self.terms})
+
+    @classmethod
+    def load(cls, root: str, name: str):
+        with open(os.path.join(root, f"{name}.json")) as f:
+            meta = json.load(f)
+        if meta["version"] > FORMAT_VERSION:
+            raise ValueError(f"Facet index format {meta['version']} is newer than this build reads ({FORMAT_VERSION}).")
+        load = lambda suffix: np.load(os.path.join(root, f"{name}.{suffix}.npy"), mmap_mode="r")
+        terms = {value: tuple(entry) for value, entry in meta["terms"].items()}
+        return cls(name, meta["rows"], terms, load("rows"), load("offsets"), load("bitmaps"))
+
+# --- 2. Filters Across Facets ---
+class JobFacets:
+    """
+    The facet indexes of a catalog plus the facet values of jobs ingested since it was written.
+    `select` turns filters (facet -> accepted values) into the sorted rows matching all of them.
+    """
+
+    def __init__(self, facets: dict[str, FacetIndex], n_rows: int):
+        self.facets = facets
+        self.n_rows = n_rows
+        self._extra: dict[tuple[str, str], list[int]] = {}  # (facet, value) -> live rows
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, catalog, columns=FACET_COLUMNS):
+        return cls({name: FacetIndex.build(name, catalog.columns[name], len(catalog)) for name in columns}, len(catalog))
+
+    @classmethod
+    def open(cls, data_dir: str, columns=FACET_COLUMNS):
+        root = os.path.join(data_dir, FACETS_DIR)
+        facets = {name: FacetIndex.load(root, name) for name in columns}
+        n_rows = next(iter(facets.values())).n_rows if facets else 0
+        return cls(facets, n_rows)
+
+    def save(self, data_dir: str) -> str:
+        root = os.path.join(data_dir, FACETS_DIR)
+        os.makedirs(root, exist_ok=True)
+        for facet in self.facets.values():
+            facet.save(root)
+        return root
+
+    def add(self, row: int, job: dict):
+        """Indexes a job appended to the live catalog (rows past the base catalog)."""
+        with self._lock:
+            for name in self.facets:
+                value = normalize_value(job.get(name))
+                if value is not None:
+                    self._extra.setdefault((name, value), []).append(row)
+
+    def select(self, filters: dict[str, list[str]]) -> np.ndarray:
+        """
+        Sorted rows matching every filtered facet (any of its values). Starts from the most
+        selective facet and only tests those rows against the others, so the work shrinks
+        with the filter; bitmaps are only combined whole when every facet is a common value.
+        """
+        sets = []
+        for name, values in filters.items():
+            if not values:
+                continue
+            if name not in self.facets:
+                raise ValueError(f"Unknown filter '{name}'. Filterable fields: {', '.join(self.facets)}.")
+            kind, data, count = self.facets[name].match_any(values)
+            live = [row for v in values for row in self._extra.get((name, normalize_value(v)), [])]
+            sets.append((count + len(live), kind, data, np.asarray(sorted(set(live)), dtype=np.int64)))
+        if not sets:
+            raise ValueError("No filter values given.")
+        sets.sort(key=lambda s: s[0])
+
+        _, kind, data, live = sets[0]
+        all_bitmaps = all(s[1] == "bitmap" for s in sets)
+        if kind == "list":
+            rows = np.concatenate([data, live])
+        elif all_bitmaps:
+            # Every facet is a common value: AND the bitmaps a byte at a time, then unpack once.
+            packed = data.copy()
+            for _, _, other, _ in sets[1:]:
+                packed &= other
+            rows = np.concatenate([np.flatnonzero(np.unpackbits(packed, count=self.n_rows)), live])
+        else:
+            rows = np.concatenate([np.flatnonzero(np.unpackbits(data, count=self.n_rows)), live])
+        for _, kind, data, live in sets[1:]:
+            if not len(rows):
+                break
+            base = rows < self.n_rows
+            keep = np.ones(len(rows), dtype=bool) if all_bitmaps else np.zeros(len(rows), dtype=bool)
+            if kind == "list":
+                keep[base] = _is_member(rows[base], data)
+            elif not all_bitmaps:
+                keep[base] = _bit_test(data, rows[base])
+            keep[~base] = _is_member(rows[~base], live)
+            rows = rows[keep]
+        return rows.astype(np.int64)
@@ -0,0 +1,656 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from dotenv import load_dotenv
+
+from services.batching import MicroBatcher
+
+load_dotenv()
+
+# --- Configuration ---
+# "auto" uses exact search for small catalogs and IVF once brute force stops being cheap.
+JOB_INDEX_TYPE = os.getenv("JOB_INDEX_TYPE", "auto")
+AUTO_IVF_MIN_ROWS = int(os.getenv("JOB_INDEX_AUTO_IVF_MIN_ROWS", "50000"))
+IVF_DEFAULT_NPROBE = int(os.getenv("JOB_INDEX_NPROBE", "8"))
+HNSW_DEFAULT_EF = int(os.getenv("JOB_INDEX_EF", "64"))
+INT8_DEFAULT_RERANK = int(os.getenv("JOB_INDEX_RERANK", "100"))
+ASSIGN_CHUNK_ROWS = 65536
+# Sharded exact search: threads scoring shards in parallel (default: one per core).
+SEARCH_THREADS = int(os.getenv("JOB_INDEX_THREADS", "0")) or os.cpu_count() or 1
+SHARD_MIN_ROWS = 16384
+# Concurrent request-path searches are coalesced into one batched search.
+SEARCH_MAX_BATCH_SIZE = int(os.getenv("SEARCH_MAX_BATCH_SIZE", "32"))
+SEARCH_MAX_WAIT_MS = float(os.getenv("SEARCH_MAX_WAIT_MS", "1"))
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "2"))
+
+# --- 1. Shared Helpers ---
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Returns float32 unit-length rows so a dot product equals cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first, without sorting the whole array."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+def _keep_top_k(rows: np.ndarray, scores: np.ndarray, k: int):
+    """Per query (row of the arrays), the k best candidates, unordered."""
+    if scores.shape[1] <= k:
+        return rows, scores
+    keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(rows, keep, axis=1), np.take_along_axis(scores, keep, axis=1)
+
+def _sort_top_k(rows: np.ndarray, scores: np.ndarray):
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(rows, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+def blocked_top_k(queries: np.ndarray, vectors: np.ndarray, k: int, block_rows: int = ASSIGN_CHUNK_ROWS,
+                  exclude: np.ndarray | None = None):
+    """
+    Exact top-k rows of `vectors` for a whole batch of normalized queries: one matrix multiply per
+    block of rows, folding each block into a running top-k, so memory stays at queries x block_rows.
+    Rows set in the boolean mask `exclude` score -inf. Returns (rows, scores), each shaped
+    (n_queries, k), best first.
+    """
+    n_queries, n_rows = queries.shape[0], vectors.shape[0]
+    k = min(k, n_rows)
+    best_rows = np.empty((n_queries, 0), dtype=np.int64)
+    best_scores = np.empty((n_queries, 0), dtype=np.float32)
+    for start in range(0, n_rows, block_rows):
+        block = np.asarray(vectors[start:start + block_rows], dtype=np.float32)
+        block_scores = queries @ block.T
+        if exclude is not None:
+            block_scores[:, exclude[start:start + len(block)]] = -np.inf
+        scores = np.hstack([best_scores, block_scores])
+        rows = np.hstack([best_rows, np.broadcast_to(np.arange(start, start + len(block)), (n_queries, len(block)))])
+        best_rows, best_scores = _keep_top_k(rows, scores, k)
+    return _sort_top_k(best_rows, best_scores)
+
+def subset_top_k(vectors: np.ndarray, rows: np.ndarray, q: np.ndarray, k: int, normalized: bool = True):
+    """
+    Exact top-k among `rows` of `vectors` for one normalized query. Only those rows are read, a
+    chunk at a time, so the cost follows the size of the subset rather than of the catalog.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    scores = np.empty(len(rows), dtype=np.float32)
+    for start in range(0, len(rows), ASSIGN_CHUNK_ROWS):
+        chunk = np.asarray(vectors[rows[start:start + ASSIGN_CHUNK_ROWS]], dtype=np.float32)
+        scores[start:start + len(chunk)] = (chunk if normalized else normalize(chunk)) @ q
+    best = top_k(scores, k)
+    return rows[best], scores[best]
+
+def search_many(index, queries: np.ndarray, k: int, **params) -> list:
+    """[(rows, scores)] per query, using the index's batched search when it has one."""
+    if hasattr(index, "search_batch"):
+        return index.search_batch(queries, k, **params)
+    return [index.search(query, k, **params) for query in queries]
+
+# --- 2. Exact (Brute-Force) Index ---
+class ExactIndex:
+    """Scores every job. Always correct, and the reference the other indexes are measured against."""
+    kind = "exact"
+    # Searches take `exclude`, a boolean mask of rows to skip, so LiveIndex needn't over-fetch.
+    supports_exclude = True
+
+    def __init__(self, embeddings: np.ndarray, normalized: bool = False):
+        # Pre-normalized vectors (e.g. a memory-mapped store) are used in place rather than copied.
+        self.vectors = embeddings if normalized else normalize(embeddings)
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, normalized: bool = False, **_):
+        return cls(embeddings, normalized)
+
+    def score(self, query: np.ndarray) -> np.ndarray:
+        q = normalize(query)[0]
+        if self.vectors.dtype == np.float32:
+            return self.vectors @ q
+        # Up-cast half-precision rows a chunk at a time instead of copying the whole matrix.
+        scores = np.empty(self.vectors.shape[0], dtype=np.float32)
+        for start in range(0, self.vectors.shape[0], ASSIGN_CHUNK_ROWS):
+            chunk = self.vectors[start:start + ASSIGN_CHUNK_ROWS]
+            scores[start:start + len(chunk)] = chunk.astype(np.float32) @ q
+        return scores
+
+    def search(self, query: np.ndarray, k: int, exclude: np.ndarray | None = None, **_):
+        scores = self.score(query)
+        if exclude is not None:
+            scores[exclude] = -np.inf
+        best = top_k(scores, k)
+        return best, scores[best]
+
+    def search_batch(self, queries: np.ndarray, k: int, exclude: np.ndarray | None = None, **_):
+        rows, scores = blocked_top_k(normalize(queries), self.vectors, k, exclude=exclude)
+        return list(zip(rows, scores))
+
+    def search_subset(self, query: np.ndarray, k: int, rows: np.ndarray, **_):
+        """Exact search restricted to `rows` (e.g. the jobs matching a filter)."""
+        return subset_top_k(self.vectors, rows, normalize(query)[0], k)
+
+    def default_sweep(self):
+        return [{}]
+
+class ShardedExactIndex(ExactIndex):
+    """
+    Exact search with the catalog split into contiguous shards that are scored in parallel on a
+    thread pool. NumPy's matrix products release the GIL, so shards run on separate cores; each
+    keeps only its own top-k (argpartition, no full sort) and just those are merged. A batch of
+    queries costs one matrix product per block of a shard, which is what BatchingSearcher feeds it.
+    With many shards, set OPENBLAS_NUM_THREADS / OMP_NUM_THREADS=1 so BLAS doesn't oversubscribe the cores.
+    """
+    kind = "sharded"
+
+    def __init__(self, embeddings: np.ndarray, normalized: bool = False, threads: int = SEARCH_THREADS):
+        super().__init__(embeddings, normalized)
+        n_rows = self.vectors.shape[0]
+        n_shards = max(1, min(threads, n_rows // SHARD_MIN_ROWS))
+        bounds = np.linspace(0, n_rows, n_shards + 1).astype(np.int64)
+        self.shards = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+        self._executor = (ThreadPoolExecutor(max_workers=n_shards, thread_name_prefix="index-shard")
+                          if n_shards > 1 else None)
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, normalized: bool = False, threads: int = SEARCH_THREADS, **_):
+        return cls(embeddings, normalized, threads)
+
+    def search(self, query: np.ndarray, k: int, exclude: np.ndarray | None = None, **_):
+        return self.search_batch(normalize(query), k, exclude)[0]
+
+    def search_batch(self, queries: np.ndarray, k: int, exclude: np.ndarray | None = None, **_):
+        if self._executor is None:
+            return super().search_batch(queries, k, exclude)
+        queries = normalize(queries)
+
+        def shard_top_k(bounds):
+            start, end = bounds
+            rows, scores = blocked_top_k(queries, self.vectors[start:end], k,
+                                         exclude=None if exclude is None else exclude[start:end])
+            return rows + start, scores
+
+        parts = list(self._executor.map(shard_top_k, self.shards))
+        rows, scores = _keep_top_k(np.hstack([p[0] for p in parts]), np.hstack([p[1] for p in parts]), k)
+        return list(zip(*_sort_top_k(rows, scores)))
+
+# --- 3. Inverted-File (IVF) Index ---
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid for every row, computed in chunks to bound the temporary score matrix."""
+    assignments = np.empty(vectors.shape[0], dtype=np.int32)
+    for start in range(0, vectors.shape[0], ASSIGN_CHUNK_ROWS):
+        chunk = vectors[start:start + ASSIGN_CHUNK_ROWS]
+        assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+class IVFIndex:
+    """
+    Spherical k-means partitions the catalog into lists. A query only scores the jobs in
+    its `nprobe` closest lists, so raising `nprobe` trades latency for recall.
+    """
+    kind = "ivf"
+
+    def __init__(self, centroids, vectors, ids, offsets, nprobe: int = IVF_DEFAULT_NPROBE):
+        self.centroids = centroids
+        self.vectors = vectors  # rows grouped by list, so each probed list is a contiguous slice
+        self.ids = ids
+        self.offsets = offsets
+        self.nprobe = nprobe
+        self._positions = None  # catalog row -> position in `vectors`, built on first subset search
+
+    def __len__(self):
+        return self.ids.shape[0]
+
+    @property
+    def n_lists(self):
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, n_lists: int | None = None, n_iter: int = 10,
+              seed: int = 0, nprobe: int = IVF_DEFAULT_NPROBE, **_):
+        vectors = normalize(embeddings)
+        n_rows = vectors.shape[0]
+        n_lists = min(n_lists or max(1, int(np.sqrt(n_rows))), n_rows)
+        rng = np.random.default_rng(seed)
+
+        # Train on a sample; a few hundred points per list is plenty for stable centroids.
+        sample = vectors[rng.choice(n_rows, size=min(n_rows, n_lists * 256), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = _assign(sample, centroids)
+            order = np.argsort(assignments, kind="stable")
+            counts = np.bincount(assignments, minlength=n_lists)
+            sums = np.zeros_like(centroids)
+            non_empty = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[non_empty]
+            sums[non_empty] = np.add.reduceat(sample[order], starts, axis=0)
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample.shape[0], size=int(empty.sum()))]
+            centroids = normalize(sums)
+
+        assignments = _assign(vectors, centroids)
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.searchsorted(assignments[order], np.arange(n_lists + 1)).astype(np.int64)
+        return cls(centroids, vectors[order], order.astype(np.int64), offsets, nprobe)
+
+    def search(self, query: np.ndarray, k: int, nprobe: int | None = None, **_):
+        q = normalize(query)[0]
+        nprobe = max(1, min(nprobe or self.nprobe, self.n_lists))
+        probed = top_k(self.centroids @ q, nprobe)
+
+        ids, scores = [], []
+        for lst in probed:
+            start, end = self.offsets[lst], self.offsets[lst + 1]
+            if start == end:
+                continue
+            ids.append(self.ids[start:end])
+            scores.append(self.vectors[start:end] @ q)
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        ids, scores = np.concatenate(ids), np.concatenate(scores)
+        best = top_k(scores, k)
+        return ids[best], scores[best]
+
+    def search_subset(self, query: np.ndarray, k: int, rows: np.ndarray, nprobe: int | None = None, **_):
+        """
+        Search restricted to `rows`. A subset smaller than what `nprobe` lists hold on average is
+        scored exactly, which is both cheaper and exact; a larger one is probed as usual with the
+        rows outside it masked out, falling back to exact scoring if the probed lists hold too few.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        nprobe = max(1, min(nprobe or self.nprobe, self.n_lists))
+        if self._positions is None:
+            positions = np.empty(len(self), dtype=np.int64)
+            positions[self.ids] = np.arange(len(self))
+            self._positions = positions
+        q = normalize(query)[0]
+        if len(rows) * self.n_lists <= len(self) * nprobe:
+            found, scores = subset_top_k(self.vectors, self._positions[rows], q, k)
+            return self.ids[found], scores
+
+        mask = np.zeros(len(self), dtype=bool)
+        mask[rows] = True
+        ids, scores = [], []
+        for lst in top_k(self.centroids @ q, nprobe):
+            start, end = self.offsets[lst], self.offsets[lst + 1]
+            keep = np.flatnonzero(mask[self.ids[start:end]]) + start
+            if len(keep):
+                ids.append(self.ids[keep])
+                scores.append(self.vectors[keep] @ q)
+        if sum(len(i) for i in ids) < min(k, len(rows)):
+            found, exact_scores = subset_top_k(self.vectors, self._positions[rows], q, k)
+            return self.ids[found], exact_scores
+        ids, scores = np.concatenate(ids), np.concatenate(scores)
+        best = top_k(scores, k)
+        return ids[best], scores[best]
+
+    def default_sweep(self):
+        return [{"nprobe": p} for p in (1, 2, 4, 8, 16, 32, 64, 128) if p <= self.n_lists]
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            np.savez(f, centroids=self.centroids, vectors=self.vectors, ids=self.ids,
+                     offsets=self.offsets, nprobe=np.int64(self.nprobe))
+
+    @classmethod
+    def load(cls, path: str, **_):
+        data = np.load(path)
+        return cls(data["centroids"], data["vectors"], data["ids"], data["offsets"], int(data["nprobe"]))
+
+# --- 4. HNSW Index (optional, requires hnswlib) ---
+class HNSWIndex:
+    """Graph-based index backed by hnswlib. Raising `ef` trades latency for recall."""
+    kind = "hnsw"
+
+    def __init__(self, graph, ef: int = HNSW_DEFAULT_EF):
+        self.graph = graph
+        self.ef = ef
+
+    def __len__(self):
+        return self.graph.get_current_count()
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, m: int = 16, ef_construction: int = 200,
+              ef: int = HNSW_DEFAULT_EF, **_):
+        import hnswlib
+        vectors = normalize(embeddings)
+        graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        graph.init_index(max_elements=vectors.shape[0], ef_construction=ef_construction, M=m)
+        graph.add_items(vectors, np.arange(vectors.shape[0]))
+        return cls(graph, ef)
+
+    def search(self, query: np.ndarray, k: int, ef: int | None = None, **_):
+        k = min(k, len(self))
+        self.graph.set_ef(max(ef or self.ef, k))
+        labels, distances = self.graph.knn_query(normalize(query), k=k)
+        # hnswlib's "ip" distance is 1 - dot product.
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+    def default_sweep(self):
+        return [{"ef": ef} for ef in (16, 32, 64, 128, 256)]
+
+    def save(self, path: str):
+        self.graph.save_index(path)
+
+    @classmethod
+    def load(cls, path: str, dim: int = 384, **_):
+        import hnswlib
+        graph = hnswlib.Index(space="ip", dim=dim)
+        graph.load_index(path)
+        return cls(graph)
+
+# --- 5. Scalar-Quantized (int8) Index ---
+INT8_SCORE_CHUNK_ROWS = 16384
+
+class Int8Index:
+    """
+    Keeps one int8 code per dimension of each normalized job vector (a quarter of float32) and
+    scores the whole catalog on those codes. The best `rerank` candidates are then re-scored
+    with the exact float vectors, which are only read for that shortlist. Backed by the
+    memory-mapped embedding store, they stay on disk and in the shared page cache. The
+    returned scores are exact cosine similarities, and raising `rerank` trades latency for agreement.
+    """
+    kind = "int8"
+
+    def __init__(self, codes, scales, exact_vectors, normalized: bool = False, rerank: int = INT8_DEFAULT_RERANK):
+        self.codes = codes
+        self.scales = scales
+        self.exact_vectors = exact_vectors
+        self.normalized = normalized
+        self.rerank = rerank
+
+    def __len__(self):
+        return self.codes.shape[0]
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.scales.nbytes
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, normalized: bool = False, rerank: int = INT8_DEFAULT_RERANK, **_):
+        n_rows, dim = embeddings.shape
+        # Symmetric per-dimension scales: the largest magnitude in each dimension maps to 127.
+        max_abs = np.zeros(dim, dtype=np.float32)
+        for start in range(0, n_rows, ASSIGN_CHUNK_ROWS):
+            chunk = normalize(embeddings[start:start + ASSIGN_CHUNK_ROWS])
+            np.maximum(max_abs, np.abs(chunk).max(axis=0), out=max_abs)
+        scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+
+        codes = np.empty((n_rows, dim), dtype=np.int8)
+        for start in range(0, n_rows, ASSIGN_CHUNK_ROWS):
+            chunk = normalize(embeddings[start:start + ASSIGN_CHUNK_ROWS])
+            codes[start:start + len(chunk)] = np.clip(np.rint(chunk / scales), -127, 127)
+        return cls(codes, scales, embeddings, normalized, rerank)
+
+    def search(self, query: np.ndarray, k: int, rerank: int | None = None, **_):
+        q = normalize(query)[0]
+        # Fold the scales into the query once, so each chunk is just codes @ folded.
+        folded = q * self.scales
+        approx = np.empty(self.codes.shape[0], dtype=np.float32)
+        for start in range(0, self.codes.shape[0], INT8_SCORE_CHUNK_ROWS):
+            chunk = self.codes[start:start + INT8_SCORE_CHUNK_ROWS]
+            approx[start:start + len(chunk)] = chunk.astype(np.float32) @ folded
+
+        # Sorted row order keeps the exact-vector reads sequential in the memory map.
+        shortlist = np.sort(top_k(approx, max(k, rerank or self.rerank)))
+        exact_rows = np.asarray(self.exact_vectors[shortlist], dtype=np.float32)
+        if not self.normalized:
+            exact_rows = normalize(exact_rows)
+        scores = exact_rows @ q
+        best = top_k(scores, k)
+        return shortlist[best], scores[best]
+
+    def search_subset(self, query: np.ndarray, k: int, rows: np.ndarray, rerank: int | None = None, **_):
+        """Search restricted to `rows`: codes of the subset only, then the usual exact rerank."""
+        rows = np.asarray(rows, dtype=np.int64)
+        q = normalize(query)[0]
+        shortlist_size = max(k, rerank or self.rerank)
+        if len(rows) > shortlist_size:
+            folded = q * self.scales
+            approx = np.empty(len(rows), dtype=np.float32)
+            for start in range(0, len(rows), INT8_SCORE_CHUNK_ROWS):
+                chunk = self.codes[rows[start:start + INT8_SCORE_CHUNK_ROWS]]
+                approx[start:start + len(chunk)] = chunk.astype(np.float32) @ folded
+            rows = np.sort(rows[top_k(approx, shortlist_size)])
+        return subset_top_k(self.exact_vectors, rows, q, k, normalized=self.normalized)
+
+    def default_sweep(self):
+        return [{"rerank": r} for r in (10, 20, 50, 100, 200, 500)]
+
+    def save(self, path: str):
+        np.save(path, self.codes)
+        np.save(_int8_scales_path(path), self.scales)
+
+    @classmethod
+    def load(cls, path: str, embeddings: np.ndarray = None, normalized: bool = False, **_):
+        # Memory-mapped, so every worker shares one copy of the codes.
+        return cls(np.load(path, mmap_mode="r"), np.load(_int8_scales_path(path)), embeddings, normalized)
+
+def _int8_scales_path(path: str) -> str:
+    return path[:-len(".npy")] + ".scales.npy"
+
+INDEX_TYPES = {"exact": ExactIndex, "sharded": ShardedExactIndex, "ivf": IVFIndex, "hnsw": HNSWIndex, "int8": Int8Index}
+PREBUILT_FILES = {"ivf": "job_index_ivf.npz", "hnsw": "job_index_hnsw.bin", "int8": "job_index_int8.npy"}
+
+# --- 6. Loading ---
+def resolve_index_type(n_rows: int, kind: str | None = None) -> str:
+    kind = (kind or JOB_INDEX_TYPE).lower()
+    if kind == "auto":
+        return "ivf" if n_rows >= AUTO_IVF_MIN_ROWS else "exact"
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{kind}'. Expected one of: auto, {', '.join(INDEX_TYPES)}.")
+    return kind
+
+def load_or_build_index(embeddings: np.ndarray, kind: str | None = None, data_dir: str = "data",
+                        normalized: bool = False):
+    """
+    Loads a prebuilt index from `data_dir` when one matches the catalog, otherwise builds one in-process.
+    `normalized` says the embeddings are already unit length, so exact search can use them without a copy.
+    """
+    kind = resolve_index_type(len(embeddings), kind)
+    cls = INDEX_TYPES[kind]
+    prebuilt_path = os.path.join(data_dir, PREBUILT_FILES[kind]) if kind in PREBUILT_FILES else None
+    try:
+        if prebuilt_path and os.path.exists(prebuilt_path):
+            index = cls.load(prebuilt_path, dim=embeddings.shape[1], embeddings=embeddings, normalized=normalized)
+            if len(index) == len(embeddings):
+                return index
+            print(f"⚠️ Prebuilt {kind} index at {prebuilt_path} is stale ({len(index)} rows vs {len(embeddings)}). Rebuilding.")
+        return cls.build(embeddings, normalized=normalized)
+    except ImportError as e:
+        print(f"⚠️ {kind} index unavailable ({e}). Falling back to exact search.")
+        return ExactIndex(embeddings, normalized)
+
+# --- 7. Recall vs. Exact Report ---
+def sample_queries(embeddings: np.ndarray, n_queries: int = 200, noise: float = 0.05, seed: int = 0):
+    """Perturbed catalog rows, so queries land near (but not exactly on) real jobs, like a resume does."""
+    rng = np.random.default_rng(seed)
+    rows = normalize(embeddings[rng.choice(len(embeddings), size=min(n_queries, len(embeddings)), replace=False)])
+    return normalize(rows + rng.normal(scale=noise, size=rows.shape).astype(np.float32))
+
+def recall_report(index, embeddings: np.ndarray, queries: np.ndarray | None = None, k: int = 10, sweep=None):
+    """Measures recall@k and mean latency of `index` against exact search for each search setting in `sweep`."""
+    queries = sample_queries(embeddings) if queries is None else normalize(queries)
+    exact = index if isinstance(index, ExactIndex) else ExactIndex(embeddings)
+
+    start = time.perf_counter()
+    truth = [set(exact.search(q, k)[0].tolist()) for q in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    results = []
+    for params in sweep or index.default_sweep():
+        hits = 0
+        start = time.perf_counter()
+        found = [index.search(q, k, **params)[0] for q in queries]
+        latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        for expected, got in zip(truth, found):
+            hits += len(expected.intersection(got.tolist()))
+        results.append({**params, f"recall@{k}": hits / (k * len(queries)), "mean_ms": latency_ms})
+
+    return {"index": index.kind, "rows": len(embeddings), "queries": len(queries), "k": k,
+            "exact_mean_ms": exact_ms, "index_bytes": getattr(index, "nbytes", None),
+            "float32_bytes": len(embeddings) * embeddings.shape[1] * 4, "results": results}
+
+# --- 8. Live Updates ---
+class LiveIndex:
+    """
+    Wraps a built index so ingested jobs apply without a rebuild: added rows go to a small
+    exact-search segment and removed rows are filtered out of the base index's results.
+    State is swapped as a whole on each update, so searches never see a half-applied change.
+    `vectors` (the catalog embeddings) lets filtered searches score a subset exactly when the
+    base index has no subset search of its own.
+    """
+
+    def __init__(self, base, vectors: np.ndarray | None = None, normalized: bool = False):
+        self.base = base
+        self.vectors = vectors
+        self.normalized = normalized
+        self._lock = threading.Lock()
+        dim = base.vectors.shape[1] if hasattr(base, "vectors") else 0
+        # (delta row ids, delta vectors, boolean mask of removed base rows or None, removed count)
+        self._state = (np.empty(0, dtype=np.int64), np.empty((0, dim), dtype=np.float32), None, 0)
+
+    @property
+    def kind(self):
+        return self.base.kind
+
+    def __len__(self):
+        delta_rows, _, _, n_removed = self._state
+        return len(self.base) + len(delta_rows) - n_removed
+
+    def add(self, rows, vectors):
+        rows = np.asarray(rows, dtype=np.int64)
+        with self._lock:
+            delta_rows, delta_vectors, removed, n_removed = self._state
+            vectors = normalize(vectors)
+            if delta_vectors.shape[1] != vectors.shape[1]:
+                delta_vectors = delta_vectors.reshape(0, vectors.shape[1])
+            self._state = (np.concatenate([delta_rows, rows]), np.vstack([delta_vectors, vectors]), removed, n_removed)
+
+    def remove(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        with self._lock:
+            delta_rows, delta_vectors, removed, n_removed = self._state
+            keep = ~np.isin(delta_rows, rows)
+            base_rows = rows[rows < len(self.base)]
+            if len(base_rows):
+                removed = np.zeros(len(self.base), dtype=bool) if removed is None else removed.copy()
+                removed[base_rows] = True
+                n_removed = int(np.count_nonzero(removed))
+            self._state = (delta_rows[keep], delta_vectors[keep], removed, n_removed)
+
+    def vector(self, row: int) -> np.ndarray:
+        """The normalized embedding of catalog `row`, from the added rows or else from `vectors`."""
+        delta_rows, delta_vectors, _, _ = self._state
+        found = np.flatnonzero(delta_rows == row)
+        if len(found):
+            return delta_vectors[found[-1]]
+        return normalize(np.asarray(self.vectors[row], dtype=np.float32))[0]
+
+    def _search_base(self, queries: np.ndarray, k: int, removed, n_removed: int, **params) -> list:
+        """Per query, the base index's best k rows that haven't been removed."""
+        if not n_removed:
+            return search_many(self.base, queries, k, **params)
+        if getattr(self.base, "supports_exclude", False):
+            results = search_many(self.base, queries, k, exclude=removed, **params)
+            return [(rows[~removed[rows]], scores[~removed[rows]]) for rows, scores in results]
+        # The approximate indexes can't skip rows, so over-fetch, and widen only for the queries
+        # whose results were mostly removed: the cost follows the removed rows near each query's
+        # top, not how many have piled up since the build.
+        results = [None] * len(queries)
+        pending, fetch = list(range(len(queries))), min(k + min(n_removed, k), len(self.base))
+        while pending:
+            retry = []
+            for i, (rows, scores) in zip(pending, search_many(self.base, queries[pending], fetch, **params)):
+                keep = ~removed[rows]
+                if keep.sum() >= k or len(rows) < fetch or fetch >= len(self.base):
+                    results[i] = (rows[keep][:k], scores[keep][:k])
+                else:
+                    retry.append(i)
+            pending, fetch = retry, min(fetch * 2, len(self.base))
+        return results
+
+    def _merge_delta(self, rows, scores, delta_rows, delta_scores, k: int):
+        if len(delta_rows):
+            rows = np.concatenate([rows, delta_rows])
+            scores = np.concatenate([scores, delta_scores])
+        best = top_k(scores, k)
+        return rows[best], scores[best]
+
+    def search(self, query: np.ndarray, k: int, **params):
+        return self.search_batch(normalize(query), k, **params)[0]
+
+    def search_batch(self, queries: np.ndarray, k: int, **params):
+        delta_rows, delta_vectors, removed, n_removed = self._state
+        queries = normalize(queries)
+        results = self._search_base(queries, k, removed, n_removed, **params)
+        delta_scores = queries @ delta_vectors.T if len(delta_rows) else np.empty((len(queries), 0), dtype=np.float32)
+        return [self._merge_delta(rows, scores, delta_rows, delta_scores[i], k)
+                for i, (rows, scores) in enumerate(results)]
+
+    def search_subset(self, query: np.ndarray, k: int, rows: np.ndarray, **params):
+        """Search restricted to the sorted catalog `rows`, which may include rows added since the build."""
+        delta_rows, delta_vectors, removed, _ = self._state
+        rows = np.asarray(rows, dtype=np.int64)
+        base_rows = rows[rows < len(self.base)]
+        if removed is not None:
+            base_rows = base_rows[~removed[base_rows]]
+        q = normalize(query)[0]
+
+        if not len(base_rows):
+            found, scores = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        elif hasattr(self.base, "search_subset"):
+            found, scores = self.base.search_subset(q, k, base_rows, **params)
+        elif self.vectors is not None:
+            found, scores = subset_top_k(self.vectors, base_rows, q, k, normalized=self.normalized)
+        else:
+            # Nothing to score the subset with directly: rank everything and keep the subset.
+            found, scores = self.base.search(q, len(self.base), **params)
+            keep = np.isin(found, base_rows)
+            found, scores = found[keep][:k], scores[keep][:k]
+
+        in_subset = np.isin(delta_rows, rows)
+        return self._merge_delta(found, scores, delta_rows[in_subset], delta_vectors[in_subset] @ q, k)
+
+    def default_sweep(self):
+        return self.base.default_sweep()
+
+# --- 9. Batching Concurrent Searches ---
+class BatchingSearcher(MicroBatcher):
+    """
+    Coalesces concurrent searches into one `search_many` call on a dedicated executor, so the
+    exact indexes answer a burst of requests with one matrix product instead of one pass each,
+    and the event loop never runs a search itself.
+    """
+
+    def __init__(self, index, max_batch_size: int = SEARCH_MAX_BATCH_SIZE,
+                 max_wait_ms: float = SEARCH_MAX_WAIT_MS, workers: int = SEARCH_WORKERS):
+        self.index = index
+        super().__init__(self._search_batch, max_batch_size, max_wait_ms, workers, name="search")
+
+    def _search_batch(self, items: list[tuple[np.ndarray, int]]) -> list:
+        k = max(top_n for _, top_n in items)
+        results = search_many(self.index, np.stack([query for query, _ in items]), k)
+        return [(rows[:top_n], scores[:top_n]) for (rows, scores), (_, top_n) in zip(results, items)]
+
+    def search(self, query: np.ndarray, k: int):
+        """Blocking search for worker threads and scripts."""
+        return self.submit((np.asarray(query, dtype=np.float32).ravel(), k)).result()
+
+    async def search_async(self, query: np.ndarray, k: int):
+        """Search from a request handler without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit((np.asarray(query, dtype=np.float32).ravel(), k)))
@@ -0,0 +1,210 @@
+import csv
+import hashlib
+import json
+import os
+from typing import Iterable, Iterator
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+import numpy as np
+
+import models
+
+load_dotenv()
+
+# --- Configuration ---
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+INGEST_ENCODE_BATCH_SIZE = int(os.getenv("INGEST_ENCODE_BATCH_SIZE", "128"))
+POSTING_FIELDS = ("title", "description", "company", "location")
+
+# --- 1. Reading Postings ---
+def read_postings(lines: Iterable[str], fmt: str) -> Iterator[dict]:
+    """
+    Streams postings from CSV (with a header row) or JSONL. Each posting needs an `external_id`;
+    an optional `op` column set to "delete" removes the job instead of adding or updating it.
+    """
+    if fmt == "csv":
+        rows = csv.DictReader(lines)
+    elif fmt == "jsonl":
+        rows = (json.loads(line) for line in lines if line.strip())
+    else:
+        raise ValueError(f"Unsupported posting format '{fmt}'. Use csv or jsonl.")
+    for row in rows:
+        if not row.get("external_id"):
+            raise ValueError(f"Posting without an external_id: {row}")
+        row["external_id"] = str(row["external_id"])
+        row["op"] = (row.get("op") or "upsert").lower()
+        yield row
+
+def content_hash(posting: dict) -> str:
+    payload = "\x1f".join(str(posting.get(field) or "") for field in POSTING_FIELDS)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def job_text(posting: dict) -> str:
+    """The text a job's embedding is computed from."""
+    return f"{posting.get('title') or ''}. {posting.get('description') or ''}"
+
+# --- 2. Catalog Versioning ---
+def current_catalog_version(db: Session) -> int:
+    state = db.query(models.CatalogState).filter(models.CatalogState.id == 1).first()
+    return state.version if state else 0
+
+def seeded_max_id(db: Session) -> int | None:
+    """The highest catalog id seed-jobs has copied into the jobs table, or None if it hasn't run."""
+    state = db.query(models.CatalogState).filter(models.CatalogState.id == 1).first()
+    return state.seeded_max_id if state else None
+
+def next_catalog_version(db: Session) -> int:
+    """Increments the catalog version. The row lock serializes concurrent ingestions, so versions commit in order."""
+    state = db.query(models.CatalogState).filter(models.CatalogState.id == 1).with_for_update().first()
+    if state is None:
+        state = models.CatalogState(id=1, version=0)
+        db.add(state)
+    state.version += 1
+    db.flush()
+    return state.version
+
+# --- 3. Ingestion ---
+def _ingest_chunk(db: Session, chunk: list[dict], sbert_model, stats: dict):
+    existing = {
+        job.external_id: job
+        for job in db.query(models.Job).filter(models.Job.external_id.in_([p["external_id"] for p in chunk]))
+    }
+    changes = []
+    for posting in chunk:
+        job = existing.get(posting["external_id"])
+        if posting["op"] == "delete":
+            if job is not None and not job.is_deleted:
+                changes.append(("deleted", job, posting))
+            else:
+                stats["unchanged"] += 1
+            continue
+        digest = content_hash(posting)
+        if job is not None and not job.is_deleted and job.content_hash == digest:
+            stats["unchanged"] += 1
+            continue
+        op = "updated"
+        if job is None:
+            job = models.Job(external_id=posting["external_id"])
+            db.add(job)
+            existing[posting["external_id"]] = job
+            op = "added"
+        changes.append((op, job, posting))
+
+    if not changes:
+        return
+
+    # One large SBERT batch per chunk, only for rows whose content changed, and done before
+    # taking the catalog version lock so other ingestions aren't held up by inference.
+    upserts = [(job, posting) for op, job, posting in changes if op != "deleted"]
+    vectors = []
+    if upserts:
+        vectors = sbert_model.encode([job_text(posting) for _, posting in upserts],
+                                     batch_size=INGEST_ENCODE_BATCH_SIZE, show_progress_bar=False)
+
+    version = next_catalog_version(db)
+    for op, job, _ in changes:
+        job.catalog_version = version
+        job.is_deleted = op == "deleted"
+        stats[op] += 1
+    for (job, posting), vector in zip(upserts, vectors):
+        for field in POSTING_FIELDS:
+            setattr(job, field, posting.get(field) or None)
+        job.content_hash = content_hash(posting)
+        job.embedding = vector.tolist()
+    db.commit()
+    stats["catalog_version"] = version
+
+def ingest_postings(db: Session, postings: Iterable[dict], sbert_model, batch_size: int = INGEST_BATCH_SIZE) -> dict:
+    """
+    Applies a stream of postings to the jobs table in chunks. Each chunk with changes is committed
+    under its own catalog version, which is what running workers sync against.
+    """
+    if seeded_max_id(db) is None:
+        # New rows take ids from the table's sequence; before seeding, those are catalog jobs' ids.
+        raise ValueError("The jobs table hasn't been seeded from the catalog yet. Run `python manage.py seed-jobs` first.")
+    stats = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0, "catalog_version": current_catalog_version(db)}
+    chunk = []
+    try:
+        for posting in postings:
+            chunk.append(posting)
+            if len(chunk) >= batch_size:
+                _ingest_chunk(db, chunk, sbert_model, stats)
+                chunk = []
+        if chunk:
+            _ingest_chunk(db, chunk, sbert_model, stats)
+    except Exception:
+        db.rollback()
+        raise
+    return stats
+
+def seed_jobs(db: Session, catalog, embeddings, batch_size: int = INGEST_BATCH_SIZE) -> int:
+    """
+    Copies the offline catalog artifacts into the jobs table (catalog version 0), keeping their ids,
+    so later ingestion can update or delete those jobs by external_id.
+    """
+    seeded = 0
+    for start in range(0, len(catalog), batch_size):
+        rows = range(start, min(start + batch_size, len(catalog)))
+        for row, job in zip(rows, catalog.rows(rows)):
+            db.merge(models.Job(
+                id=job["id"], external_id=str(job["id"]), title=job["title"], description=job["description"],
+                company=job["company"], location=job["location"], content_hash=content_hash(job),
+                embedding=[float(x) for x in embeddings[row]], catalog_version=0, is_deleted=False,
+            ))
+        db.commit()
+        seeded += len(rows)
+    if db.bind.dialect.name == "postgresql":
+        # Explicit ids don't advance the sequence; move it past them so new rows don't collide.
+        db.execute(text("SELECT setval(pg_get_serial_sequence('jobs', 'id'), (SELECT MAX(id) FROM jobs))"))
+    state = db.query(models.CatalogState).filter(models.CatalogState.id == 1).with_for_update().first()
+    if state is None:
+        state = models.CatalogState(id=1, version=0)
+        db.add(state)
+    state.seeded_max_id = int(np.max(catalog.ids)) if len(catalog) else 0
+    db.commit()
+    return seeded
+
+# --- 4. Schema Migration ---
+_JOB_COLUMNS = {
+    "external_id": "VARCHAR",
+    "content_hash": "VARCHAR",
+    "catalog_version": "INTEGER DEFAULT 0",
+    "is_deleted": "BOOLEAN DEFAULT FALSE",
+}
+_JOB_INDEXES = {
+    "ix_jobs_external_id": "CREATE UNIQUE INDEX ix_jobs_external_id ON jobs (external_id)",
+    "ix_jobs_catalog_version": "CREATE INDEX ix_jobs_catalog_version ON jobs (catalog_version)",
+}
+_CATALOG_STATE_COLUMNS = {
+    "seeded_max_id": "INTEGER",
+}
+
+def migrate_jobs(engine) -> list[str]:
+    """
+    Adds the ingestion columns and their indexes to a jobs table created before ingestion existed.
+    Existing rows get catalog version 0 and stay live. Safe to run more than once.
+    """
+    applied = []
+    inspector = inspect(engine)
+    if inspector.has_table("catalog_state"):
+        columns = {c["name"] for c in inspector.get_columns("catalog_state")}
+        with engine.begin() as conn:
+            for name, definition in _CATALOG_STATE_COLUMNS.items():
+                if name not in columns:
+                    conn.execute(text(f"ALTER TABLE catalog_state ADD COLUMN {name} {definition}"))
+                    applied.append(f"catalog_state.{name} added")
+    if not inspector.has_table("jobs"):
+        return applied
+    with engine.begin() as conn:
+        columns = {c["name"] for c in inspector.get_columns("jobs")}
+        for name, definition in _JOB_COLUMNS.items():
+            if name not in columns:
+                conn.execute(text(f"ALTER TABLE jobs ADD COLUMN {name} {definition}"))
+                applied.append(f"jobs.{name} added")
+        indexes = {ix["name"] for ix in inspector.get_indexes("jobs")}
+        for name, statement in _JOB_INDEXES.items():
+            if name not in indexes:
+                conn.execute(text(statement))
+                applied.append(f"index {name} created")
+    return applied
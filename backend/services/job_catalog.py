@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+import numpy as np
+
+from services import artifact_files
+
+# --- File Format ---
+# data/job_catalog/meta.json               format version, row count, column names
+# data/job_catalog/ids.npy                 int64 job id for each row
+# data/job_catalog/<column>.offsets.npy    int64 byte offsets, rows + 1 entries
+# data/job_catalog/<column>.blob           the column's UTF-8 values, back to back
+# data/job_catalog/<column>.nulls.npy      bool, True where the value is missing
+FORMAT_VERSION = 1
+CATALOG_DIR = "job_catalog"
+COLUMNS = ("title", "description", "company", "location")
+
+def _encode_column(values):
+    """Packs a column of strings into (offsets, blob, nulls)."""
+    nulls = np.array([v is None or v != v for v in values], dtype=bool)  # v != v catches NaN
+    encoded = [b"" if null else str(v).encode("utf-8") for v, null in zip(values, nulls)]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8), nulls
+
+class StringColumn:
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray, nulls: np.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+        self.nulls = nulls
+
+    def __getitem__(self, row: int) -> str | None:
+        if self.nulls[row]:
+            return None
+        return self.blob[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+
+class JobCatalog:
+    """
+    Job metadata as column arrays. On disk every array is memory-mapped, so opening is cheap,
+    workers share pages, and fetching a row by id decodes only that row's strings.
+    """
+
+    def __init__(self, ids: np.ndarray, columns: dict[str, StringColumn]):
+        self.ids = ids
+        self.columns = columns
+
+    def __len__(self):
+        return self.ids.shape[0]
+
+    @classmethod
+    def open(cls, data_dir: str = "data"):
+        root = os.path.join(data_dir, CATALOG_DIR)
+        with open(os.path.join(root, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["version"] > FORMAT_VERSION:
+            raise ValueError(f"Job catalog format {meta['version']} is newer than this build reads ({FORMAT_VERSION}).")
+        columns = {}
+        for name in meta["columns"]:
+            columns[name] = StringColumn(
+                np.load(os.path.join(root, f"{name}.offsets.npy"), mmap_mode="r"),
+                np.memmap(os.path.join(root, f"{name}.blob"), dtype=np.uint8, mode="r")
+                if meta["blob_sizes"][name] else np.empty(0, dtype=np.uint8),
+                np.load(os.path.join(root, f"{name}.nulls.npy"), mmap_mode="r"),
+            )
+        return cls(np.load(os.path.join(root, "ids.npy"), mmap_mode="r"), columns)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """An in-memory catalog built from the legacy jobs_df pickle."""
+        ids = df.index.to_numpy(dtype=np.int64) if df.index.dtype.kind in "iu" else np.arange(len(df), dtype=np.int64)
+        columns = {}
+        for name in COLUMNS:
+            values = df[name].tolist() if name in df.columns else [None] * len(df)
+            columns[name] = StringColumn(*_encode_column(values))
+        return cls(ids, columns)
+
+    def row(self, row: int) -> dict:
+        job = {name: column[row] for name, column in self.columns.items()}
+        job["id"] = int(self.ids[row])
+        return job
+
+    def rows(self, rows) -> list[dict]:
+        return [self.row(int(r)) for r in rows]
+
+class LiveJobCatalog:
+    """
+    A catalog plus the jobs ingested since it was written. New and changed jobs get fresh row
+    numbers after the base rows; the old row of a changed or deleted job is simply no longer
+    mapped to its id (the search index stops returning it).
+    """
+
+    def __init__(self, base: JobCatalog):
+        self.base = base
+        self._extra: list[dict] = []
+        self._id_rows: dict[int, int | None] = {}  # overrides on top of the base id -> row mapping
+        self._base_index = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.base) + len(self._extra)
+
+    def row(self, row: int) -> dict:
+        if row < len(self.base):
+            return self.base.row(row)
+        return dict(self._extra[row - len(self.base)])
+
+    def rows(self, rows) -> list[dict]:
+        return [self.row(int(r)) for r in rows]
+
+    def _base_row_for_id(self, job_id: int) -> int | None:
+        if self._base_index is None:
+            ids = np.asarray(self.base.ids)
+            if len(ids) < 2 or bool(np.all(ids[1:] > ids[:-1])):
+                # Catalogs are normally written in id order: binary search, nothing to build.
+                self._base_index = "sorted"
+            else:
+                self._base_index = dict(zip(ids.tolist(), range(len(ids))))
+        if self._base_index == "sorted":
+            row = int(np.searchsorted(self.base.ids, job_id))
+            return row if row < len(self.base) and self.base.ids[row] == job_id else None
+        return self._base_index.get(job_id)
+
+    def job_id(self, row: int) -> int:
+        if row < len(self.base):
+            return int(self.base.ids[row])
+        return self._extra[row - len(self.base)]["id"]
+
+    def row_for_id(self, job_id: int) -> int | None:
+        if job_id in self._id_rows:
+            return self._id_rows[job_id]
+        return self._base_row_for_id(job_id)
+
+    def upsert(self, job: dict) -> tuple[int, int | None]:
+        """Appends a new version of a job. Returns (new row, previous row or None)."""
+        with self._lock:
+            previous = self.row_for_id(job["id"])
+            self._extra.append({name: job.get(name) for name in (*COLUMNS, "id")})
+            row = len(self) - 1
+            self._id_rows[job["id"]] = row
+            return row, previous
+
+    def remove(self, job_id: int) -> int | None:
+        """Unmaps a job. Returns the row it occupied, if any."""
+        with self._lock:
+            previous = self.row_for_id(job_id)
+            self._id_rows[job_id] = None
+            return previous
+
+def write_catalog(data_dir: str, df):
+    """Writes a jobs DataFrame in the columnar catalog format."""
+    catalog = JobCatalog.from_dataframe(df)
+    root = os.path.join(data_dir, CATALOG_DIR)
+    os.makedirs(root, exist_ok=True)
+    # Workers may have the current columns mapped, so files are replaced, never overwritten in place.
+    artifact_files.invalidate(os.path.join(root, "meta.json"))
+    artifact_files.save_array(os.path.join(root, "ids.npy"), catalog.ids)
+    for name, column in catalog.columns.items():
+        artifact_files.save_array(os.path.join(root, f"{name}.offsets.npy"), column.offsets)
+        artifact_files.save_array(os.path.join(root, f"{name}.nulls.npy"), column.nulls)
+        artifact_files.save_raw(os.path.join(root, f"{name}.blob"), column.blob)
+    meta = {
+        "version": FORMAT_VERSION,
+        "rows": len(catalog),
+        "columns": list(catalog.columns),
+        "blob_sizes": {name: int(column.blob.shape[0]) for name, column in catalog.columns.items()},
+    }
+    # meta.json goes last: a catalog without it is incomplete and won't be opened.
+    artifact_files.save_json(os.path.join(root, "meta.json"), meta, indent=2)
+    return root
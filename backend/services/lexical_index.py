@@ -0,0 +1,223 @@
+import json
+import math
+import os
+import threading
+from collections import Counter
+import numpy as np
+from dotenv import load_dotenv
+
+from services import artifact_files, text_utils
+
+load_dotenv()
+
+# --- Configuration ---
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# Query terms in more than this fraction of jobs ("team", "growth") are skipped: their postings are
+# the longest to read and, with a near-zero IDF, they barely change the ranking.
+BM25_MAX_DF_FRACTION = float(os.getenv("BM25_MAX_DF_FRACTION", "0.2"))
+LEXICAL_DIR = "job_lexical"
+BUILD_CHUNK_ROWS = 50000
+
+# --- File Format ---
+# data/job_lexical/meta.json            format version, row count, average length, BM25 k1 and b
+# data/job_lexical/terms.json           the vocabulary; a term's position is its id
+# data/job_lexical/postings.bin         per term, its rows as varint-encoded gaps, back to back
+# data/job_lexical/offsets.npy          int64 byte start of each term in postings.bin, + 1 end entry
+# data/job_lexical/tfs.npy              uint8 term frequency of every posting, in postings order
+# data/job_lexical/tf_offsets.npy       int64 start of each term in tfs.npy (its document frequency is the gap)
+# data/job_lexical/doc_lengths.npy      uint16 length of each job in terms
+# Rows within a term ascend, so each is stored as the gap from the previous one in 7-bit groups,
+# and most postings take a single byte instead of the four of an int32.
+FORMAT_VERSION = 1
+
+# --- 1. Varint Postings ---
+def encode_gaps(rows: np.ndarray, starts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Varint-encodes ascending `rows` split into lists at `starts`; each list's first row is its own gap.
+    Returns (bytes, byte offset of each list plus an end entry).
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    gaps = np.diff(rows, prepend=0)
+    gaps[starts[starts < len(rows)]] = rows[starts[starts < len(rows)]]
+    n_bytes = np.ones(len(gaps), dtype=np.int64)
+    for shift in (7, 14, 21, 28):
+        n_bytes += gaps >= (1 << shift)
+    positions = np.concatenate(([0], np.cumsum(n_bytes)))
+    out = np.empty(positions[-1], dtype=np.uint8)
+    for j in range(int(n_bytes.max(initial=1))):
+        has = n_bytes > j
+        group = (gaps[has] >> (7 * j)) & 0x7F
+        more = (n_bytes[has] - 1 > j).astype(np.int64) << 7  # continuation bit on all but the last byte
+        out[positions[:-1][has] + j] = group | more
+    return out, positions[np.append(starts, len(rows))]
+
+def decode_gaps(data: np.ndarray) -> np.ndarray:
+    """The ascending rows of one varint-encoded list."""
+    data = np.asarray(data, dtype=np.uint8)
+    if not len(data):
+        return np.empty(0, dtype=np.int64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shifts = 7 * (np.arange(len(data)) - np.repeat(starts, ends - starts + 1))
+    gaps = np.add.reduceat((data & 0x7F).astype(np.int64) << shifts, starts)
+    return np.cumsum(gaps)
+
+# --- 2. BM25 Index ---
+class BM25Index:
+    """
+    BM25 over job titles and descriptions, for pulling candidates cheaply before dense scoring.
+    A query only reads the postings of its own terms, and jobs ingested since the build are
+    kept in a small in-memory overlay scored against the base statistics.
+    """
+
+    def __init__(self, terms: list[str], postings, offsets, tfs, tf_offsets, doc_lengths,
+                 avg_length: float, k1: float = BM25_K1, b: float = BM25_B):
+        self.terms = terms
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.postings = postings
+        self.offsets = offsets
+        self.tfs = tfs
+        self.tf_offsets = tf_offsets
+        self.doc_lengths = doc_lengths
+        self.avg_length = avg_length or 1.0
+        self.k1 = k1
+        self.b = b
+        self._extra: dict[str, list[tuple[int, int]]] = {}  # term -> [(live row, tf)]
+        self._extra_lengths: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.doc_lengths.shape[0]
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.postings, self.offsets, self.tfs, self.tf_offsets, self.doc_lengths))
+
+    @staticmethod
+    def job_text(job: dict) -> str:
+        return f"{job.get('title') or ''}\n{job.get('description') or ''}"
+
+    @classmethod
+    def build(cls, catalog, k1: float = BM25_K1, b: float = BM25_B):
+        """Indexes a JobCatalog a chunk of rows at a time, keeping postings as compact arrays."""
+        title, description = catalog.columns["title"], catalog.columns["description"]
+        term_ids: dict[str, int] = {}
+        chunks, doc_lengths = [], np.zeros(len(catalog), dtype=np.int64)
+        for start in range(0, len(catalog), BUILD_CHUNK_ROWS):
+            ids, rows, tfs = [], [], []
+            for row in range(start, min(start + BUILD_CHUNK_ROWS, len(catalog))):
+                counts = Counter(text_utils.content_terms(cls.job_text({"title": title[row], "description": description[row]})))
+                doc_lengths[row] = sum(counts.values())
+                for term, tf in counts.items():
+                    ids.append(term_ids.setdefault(term, len(term_ids)))
+                    rows.append(row)
+                    tfs.append(tf)
+            chunks.append((np.asarray(ids, dtype=np.int32), np.asarray(rows, dtype=np.int32),
+                           np.minimum(np.asarray(tfs, dtype=np.int64), 255).astype(np.uint8)))
+
+        ids = np.concatenate([c[0] for c in chunks]) if chunks else np.empty(0, dtype=np.int32)
+        rows = np.concatenate([c[1] for c in chunks]) if chunks else np.empty(0, dtype=np.int32)
+        tfs = np.concatenate([c[2] for c in chunks]) if chunks else np.empty(0, dtype=np.uint8)
+        order = np.argsort(ids, kind="stable")  # rows stay ascending within each term
+        ids, rows, tfs = ids[order], rows[order], tfs[order]
+        tf_offsets = np.searchsorted(ids, np.arange(len(term_ids) + 1)).astype(np.int64)
+        postings, offsets = encode_gaps(rows, tf_offsets[:-1])
+        avg_length = float(doc_lengths.mean()) if len(catalog) else 1.0
+        return cls(list(term_ids), postings, offsets, tfs, tf_offsets,
+                   np.minimum(doc_lengths, np.iinfo(np.uint16).max).astype(np.uint16), avg_length, k1, b)
+
+    def save(self, data_dir: str) -> str:
+        root = os.path.join(data_dir, LEXICAL_DIR)
+        os.makedirs(root, exist_ok=True)
+        # Workers may have the current postings mapped, so files are replaced, never overwritten in place.
+        artifact_files.invalidate(os.path.join(root, "meta.json"))
+        artifact_files.save_raw(os.path.join(root, "postings.bin"), self.postings)
+        for name in ("offsets", "tfs", "tf_offsets", "doc_lengths"):
+            artifact_files.save_array(os.path.join(root, f"{name}.npy"), getattr(self, name))
+        artifact_files.save_json(os.path.join(root, "terms.json"), self.terms)
+        # meta.json goes last: an index without it is incomplete and won't be opened.
+        artifact_files.save_json(os.path.join(root, "meta.json"),
+                                 {"version": FORMAT_VERSION, "rows": len(self), "avg_length": self.avg_length,
+                                  "k1": self.k1, "b": self.b}, indent=2)
+        return root
+
+    @classmethod
+    def open(cls, data_dir: str):
+        root = os.path.join(data_dir, LEXICAL_DIR)
+        with open(os.path.join(root, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["version"] > FORMAT_VERSION:
+            raise ValueError(f"Lexical index format {meta['version']} is newer than this build reads ({FORMAT_VERSION}).")
+        with open(os.path.join(root, "terms.json")) as f:
+            terms = json.load(f)
+        load = lambda name: np.load(os.path.join(root, f"{name}.npy"), mmap_mode="r")
+        postings_path = os.path.join(root, "postings.bin")
+        postings = (np.memmap(postings_path, dtype=np.uint8, mode="r") if os.path.getsize(postings_path)
+                    else np.empty(0, dtype=np.uint8))
+        return cls(terms, postings, load("offsets"), load("tfs"), load("tf_offsets"), load("doc_lengths"),
+                   meta["avg_length"], meta["k1"], meta["b"])
+
+    def add(self, row: int, job: dict):
+        """Indexes a job appended to the live catalog (rows past the base catalog)."""
+        counts = Counter(text_utils.content_terms(self.job_text(job)))
+        with self._lock:
+            self._extra_lengths[row] = sum(counts.values())
+            for term, tf in counts.items():
+                self._extra.setdefault(term, []).append((row, tf))
+
+    def _idf(self, df: int) -> float:
+        return math.log(1 + (len(self) - df + 0.5) / (df + 0.5))
+
+    def _weights(self, idf: float, tfs: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        tfs = tfs.astype(np.float32)
+        norm = self.k1 * (1 - self.b + self.b * lengths.astype(np.float32) / self.avg_length)
+        return idf * tfs * (self.k1 + 1) / (tfs + norm)
+
+    def postings_for(self, term_id: int) -> tuple[np.ndarray, np.ndarray]:
+        rows = decode_gaps(self.postings[self.offsets[term_id]:self.offsets[term_id + 1]])
+        return rows, np.asarray(self.tfs[self.tf_offsets[term_id]:self.tf_offsets[term_id + 1]])
+
+    def search(self, terms: list[str], k: int, within: np.ndarray | None = None,
+               max_df_fraction: float = BM25_MAX_DF_FRACTION):
+        """
+        The k best rows by BM25 for the query `terms`, best first, as (rows, scores). `within`
+        (sorted rows) limits the result to a subset, e.g. the jobs matching a filter.
+        """
+        rows, weights = [], []
+        for term in dict.fromkeys(terms):
+            term_id = self.term_ids.get(term)
+            extra = self._extra.get(term, [])
+            df = (int(self.tf_offsets[term_id + 1] - self.tf_offsets[term_id]) if term_id is not None else 0) + len(extra)
+            if not df or df > max_df_fraction * len(self):
+                continue
+            idf = self._idf(df)
+            if term_id is not None:
+                term_rows, tfs = self.postings_for(term_id)
+                rows.append(term_rows)
+                weights.append(self._weights(idf, tfs, np.asarray(self.doc_lengths[term_rows])))
+            if extra:
+                extra_rows = np.asarray([row for row, _ in extra], dtype=np.int64)
+                rows.append(extra_rows)
+                weights.append(self._weights(idf, np.asarray([tf for _, tf in extra]),
+                                             np.asarray([self._extra_lengths[row] for row in extra_rows])))
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        # Sum each row's term weights. Few postings are grouped by sorting; many are summed into a
+        # per-row accumulator instead, which costs a pass over the catalog but no sort.
+        rows, weights = np.concatenate(rows), np.concatenate(weights)
+        if len(rows) * 16 < len(self):
+            unique_rows, inverse = np.unique(rows, return_inverse=True)
+            scores = np.bincount(inverse, weights=weights).astype(np.float32)
+        else:
+            totals = np.bincount(rows, weights=weights)
+            unique_rows = np.flatnonzero(totals)
+            scores = totals[unique_rows].astype(np.float32)
+        if within is not None:
+            keep = np.isin(unique_rows, within)
+            unique_rows, scores = unique_rows[keep], scores[keep]
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k] if 0 < k < len(scores) else np.arange(k)
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return unique_rows[best], scores[best]
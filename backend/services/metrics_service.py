@@ -0,0 +1,163 @@
+import os
+import random
+import threading
+import time
+import functools
+import contextlib
+import contextvars
+import asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Configuration ---
+# Fraction of requests whose per-stage timings are printed, e.g. 0.01 for one in a hundred.
+TIMING_LOG_SAMPLE_RATE = float(os.getenv("TIMING_LOG_SAMPLE_RATE", "0"))
+LATENCY_BUCKETS_SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# --- 1. Histograms ---
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus style) that is safe to observe from any thread."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # the last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        slot = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                slot = i
+                break
+        with self._lock:
+            self._counts[slot] += 1
+            self._sum += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative, running = {}, 0
+        for bound, count in zip((*self.buckets, float("inf")), counts):
+            running += count
+            cumulative["+Inf" if bound == float("inf") else f"{bound:g}"] = running
+        return {"count": running, "sum": total, "buckets": cumulative}
+
+# --- 2. Registry and Prometheus Exposition ---
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(labels: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+
+class HistogramFamily:
+    """A named histogram metric with one child Histogram per combination of label values."""
+
+    def __init__(self, name: str, help_text: str, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels) -> Histogram:
+        key = tuple(sorted(labels.items()))
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, Histogram(self.buckets))
+        return child
+
+    def attach(self, histogram: Histogram, **labels):
+        """Exposes a histogram that already exists elsewhere, e.g. a batcher's, under this family."""
+        with self._lock:
+            self._children[tuple(sorted(labels.items()))] = histogram
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            children = list(self._children.items())
+        for labels, histogram in children:
+            snapshot = histogram.snapshot()
+            prefix = _label_text(labels)
+            sep = "," if prefix else ""
+            for bound, count in snapshot["buckets"].items():
+                lines.append(f'{self.name}_bucket{{{prefix}{sep}le="{bound}"}} {count}')
+            suffix = f"{{{prefix}}}" if prefix else ""
+            lines.append(f"{self.name}_sum{suffix} {snapshot['sum']:.6g}")
+            lines.append(f"{self.name}_count{suffix} {snapshot['count']}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help_text: str, buckets=LATENCY_BUCKETS_SECONDS) -> HistogramFamily:
+        """Returns the family called `name`, creating it on first use."""
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = HistogramFamily(name, help_text, buckets)
+        return family
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        with self._lock:
+            families = list(self._families.values())
+        return "\n".join(line for family in families for line in family.render()) + "\n"
+
+registry = Registry()
+
+request_duration = registry.histogram("http_request_duration_seconds", "Time to handle an HTTP request, by route.")
+stage_duration = registry.histogram("stage_duration_seconds", "Time spent in each stage of request handling.")
+
+# --- 3. Stage Timers ---
+# The stage timings of the request being handled, for the sampled timing log. The middleware sets
+# it per request; threadpool and to_thread calls copy the context, so stages there are included.
+_request_stages: contextvars.ContextVar[dict | None] = contextvars.ContextVar("request_stages", default=None)
+
+def record_stage(name: str, seconds: float):
+    stage_duration.labels(stage=name).observe(seconds)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[name] = stages.get(name, 0.0) + seconds
+
+@contextlib.contextmanager
+def stage(name: str):
+    """Times the enclosed block as stage `name`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+def timed_stage(name: str):
+    """Decorator form of `stage` for sync and async functions."""
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with stage(name):
+                    return await fn(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with stage(name):
+                    return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# --- 4. Per-Request Timing ---
+def start_request() -> contextvars.Token:
+    """Starts collecting stage timings for a request; pass the result to finish_request."""
+    return _request_stages.set({})
+
+def finish_request(token: contextvars.Token, method: str, route: str, status: int, seconds: float):
+    stages = _request_stages.get()
+    _request_stages.reset(token)
+    request_duration.labels(method=method, route=route, status=str(status)).observe(seconds)
+    if TIMING_LOG_SAMPLE_RATE and random.random() < TIMING_LOG_SAMPLE_RATE:
+        detail = ", ".join(f"{name} {value * 1000:.1f} ms" for name, value in (stages or {}).items())
+        print(f"⏱️ {method} {route} {status} {seconds * 1000:.1f} ms" + (f" | {detail}" if detail else ""))
@@ -0,0 +1,110 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from dotenv import load_dotenv
+
+from services import artifact_files, index_service
+
+load_dotenv()
+
+# --- Configuration ---
+NEIGHBORS_K = int(os.getenv("NEIGHBORS_K", "10"))
+# Jobs whose neighbours one thread finds per pass over the catalog. Each thread holds a
+# query_rows x block_rows float32 score matrix: 64 MiB at the defaults.
+NEIGHBORS_QUERY_ROWS = int(os.getenv("NEIGHBORS_QUERY_ROWS", "1024"))
+NEIGHBORS_BLOCK_ROWS = int(os.getenv("NEIGHBORS_BLOCK_ROWS", "16384"))
+NEIGHBORS_DIR = "job_neighbors"
+
+# --- File Format ---
+# data/job_neighbors/meta.json      format version, row count, k, embedding dimension
+# data/job_neighbors/rows.npy       int32 (rows, k): each job's most similar catalog rows, best first
+# data/job_neighbors/scores.npy     float16 (rows, k): their cosine similarities
+# Six bytes per edge, so a million jobs at k=10 take 60 MB, memory-mapped and shared between workers.
+# Rows are positions in the catalog and embedding store the graph was built from.
+FORMAT_VERSION = 1
+
+class NeighborGraph:
+    """
+    The K nearest jobs of every catalog job, computed offline, so "more like this" reads one
+    row of an adjacency array instead of searching the catalog.
+    """
+
+    def __init__(self, rows: np.ndarray, scores: np.ndarray, dim: int):
+        self.rows = rows
+        self.scores = scores
+        self.dim = dim
+
+    def __len__(self):
+        return self.rows.shape[0]
+
+    @property
+    def k(self) -> int:
+        return self.rows.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.rows.nbytes + self.scores.nbytes)
+
+    def neighbors(self, row: int) -> tuple[np.ndarray, np.ndarray]:
+        """(rows, scores) of the jobs most similar to catalog `row`, best first."""
+        return np.asarray(self.rows[row], dtype=np.int64), np.asarray(self.scores[row], dtype=np.float32)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, k: int = NEIGHBORS_K, normalized: bool = False,
+              threads: int = index_service.SEARCH_THREADS, query_rows: int = NEIGHBORS_QUERY_ROWS,
+              block_rows: int = NEIGHBORS_BLOCK_ROWS, progress=None):
+        """
+        Exact top-k neighbours of every row of `vectors`, excluding the row itself. The catalog is
+        split into chunks of `query_rows` jobs, each searched as one batch (a blocked matrix multiply
+        against every job), and chunks run in parallel on `threads` threads; set
+        OPENBLAS_NUM_THREADS / OMP_NUM_THREADS=1 so BLAS doesn't oversubscribe the cores.
+        `progress(done, total)` is called as chunks finish.
+        """
+        if not normalized:
+            vectors = index_service.normalize(np.asarray(vectors, dtype=np.float32))
+        n_rows = vectors.shape[0]
+        k = max(0, min(k, n_rows - 1))
+        rows = np.empty((n_rows, k), dtype=np.int32)
+        scores = np.empty((n_rows, k), dtype=np.float16)
+
+        def chunk_neighbors(start: int) -> int:
+            queries = np.asarray(vectors[start:start + query_rows], dtype=np.float32)
+            found, found_scores = index_service.blocked_top_k(queries, vectors, k + 1, block_rows)
+            # Move each job itself to the end and cut it off. Among exact duplicates it may not have
+            # made the top k + 1 at all, and then the last neighbour goes instead.
+            own = np.arange(start, start + len(queries))[:, None]
+            order = np.argsort(found == own, axis=1, kind="stable")[:, :k]
+            rows[start:start + len(queries)] = np.take_along_axis(found, order, axis=1)
+            scores[start:start + len(queries)] = np.take_along_axis(found_scores, order, axis=1)
+            return len(queries)
+
+        done = 0
+        with ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="neighbors") as executor:
+            for n in executor.map(chunk_neighbors, range(0, n_rows, query_rows)):
+                done += n
+                if progress is not None:
+                    progress(done, n_rows)
+        return cls(rows, scores, vectors.shape[1])
+
+    def save(self, data_dir: str) -> str:
+        root = os.path.join(data_dir, NEIGHBORS_DIR)
+        os.makedirs(root, exist_ok=True)
+        # Workers may have the current arrays mapped, so they are replaced, never overwritten in place.
+        artifact_files.invalidate(os.path.join(root, "meta.json"))
+        artifact_files.save_array(os.path.join(root, "rows.npy"), self.rows)
+        artifact_files.save_array(os.path.join(root, "scores.npy"), self.scores)
+        # meta.json goes last: a graph without it is incomplete and won't be opened.
+        artifact_files.save_json(os.path.join(root, "meta.json"),
+                                 {"version": FORMAT_VERSION, "rows": len(self), "k": self.k, "dim": self.dim}, indent=2)
+        return root
+
+    @classmethod
+    def open(cls, data_dir: str):
+        root = os.path.join(data_dir, NEIGHBORS_DIR)
+        with open(os.path.join(root, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["version"] > FORMAT_VERSION:
+            raise ValueError(f"Neighbour graph format {meta['version']} is newer than this build reads ({FORMAT_VERSION}).")
+        load = lambda name: np.load(os.path.join(root, f"{name}.npy"), mmap_mode="r")
+        return cls(load("rows"), load("scores"), meta["dim"])
@@ -0,0 +1,107 @@
+import os
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from sqlalchemy import delete, func, insert, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+import models
+from services import index_service, text_utils
+
+load_dotenv()
+
+# --- Configuration ---
+PRECOMPUTE_TOP_N = int(os.getenv("PRECOMPUTE_TOP_N", "10"))
+PRECOMPUTE_CHUNK_SIZE = int(os.getenv("PRECOMPUTE_CHUNK_SIZE", "1024"))
+# Rankings older than this are ignored and the request falls back to a live search.
+PRECOMPUTED_MAX_AGE_HOURS = float(os.getenv("PRECOMPUTED_MAX_AGE_HOURS", "36"))
+# The batch ranks with the dense index only, so its rankings are served only to dense retrieval.
+PRECOMPUTE_RETRIEVAL_MODE = "dense"
+
+# --- 1. Batch Computation ---
+def precompute_recommendations(db: Session, index, catalog, catalog_version: int,
+                               top_n: int = PRECOMPUTE_TOP_N, chunk_size: int = PRECOMPUTE_CHUNK_SIZE) -> dict:
+    """
+    Ranks the catalog for every user's latest resume and replaces the precomputed_recommendations
+    rows. Resumes are read in id order, `chunk_size` at a time, and each chunk is searched as one
+    batch (a blocked matrix multiply for exact indexes), then committed, so memory stays bounded.
+    """
+    stats = {"users": 0, "rows": 0, "skipped": 0}
+    computed_at = datetime.now(timezone.utc)
+    # A user with several resume rows would write each (user_id, rank) more than once.
+    latest = select(func.max(models.Resume.id)).group_by(models.Resume.user_id)
+    last_id = 0
+    while True:
+        resumes = (db.query(models.Resume.id, models.Resume.user_id, models.Resume.raw_text, models.Resume.embedding)
+                   .filter(models.Resume.id > last_id, models.Resume.id.in_(latest))
+                   .order_by(models.Resume.id)
+                   .limit(chunk_size)
+                   .all())
+        if not resumes:
+            break
+        last_id = resumes[-1].id
+        usable = [r for r in resumes if r.embedding is not None and r.raw_text and r.user_id is not None]
+        stats["skipped"] += len(resumes) - len(usable)
+        if not usable:
+            continue
+
+        queries = np.asarray([r.embedding for r in usable], dtype=np.float32)
+        results = index_service.search_many(index, queries, top_n)
+        rows = [
+            {"user_id": resume.user_id, "rank": rank, "job_id": catalog.job_id(int(row)), "score": float(score),
+             "catalog_version": catalog_version, "resume_hash": text_utils.fingerprint(resume.raw_text),
+             "retrieval_mode": PRECOMPUTE_RETRIEVAL_MODE, "computed_at": computed_at}
+            for resume, (job_rows, scores) in zip(usable, results)
+            for rank, (row, score) in enumerate(zip(job_rows, scores))
+        ]
+        user_ids = [r.user_id for r in usable]
+        db.execute(delete(models.PrecomputedRecommendation)
+                   .where(models.PrecomputedRecommendation.user_id.in_(user_ids)))
+        if rows:
+            db.execute(insert(models.PrecomputedRecommendation), rows)
+        db.commit()
+        stats["users"] += len(usable)
+        stats["rows"] += len(rows)
+        print(f"  ...{stats['users']} users ranked")
+    return stats
+
+# --- 2. Serving ---
+async def load_precomputed(db: AsyncSession, user_id: int, resume_hash: str, catalog_version: int, top_n: int,
+                           retrieval_mode: str = PRECOMPUTE_RETRIEVAL_MODE):
+    """
+    The user's precomputed (job ids, scores), or None when there aren't `top_n` of them or they
+    are stale: computed against another catalog version, from an older resume, by another
+    retrieval pipeline than `retrieval_mode`, or too long ago.
+    """
+    if retrieval_mode != PRECOMPUTE_RETRIEVAL_MODE:
+        return None
+    entries = (await db.scalars(
+        select(models.PrecomputedRecommendation)
+        .where(models.PrecomputedRecommendation.user_id == user_id,
+               models.PrecomputedRecommendation.rank < top_n)
+        .order_by(models.PrecomputedRecommendation.rank)
+    )).all()
+    if len(entries) < top_n:
+        return None
+    computed_at = entries[0].computed_at
+    if computed_at.tzinfo is None:  # SQLite drops the timezone
+        computed_at = computed_at.replace(tzinfo=timezone.utc)
+    if (entries[0].catalog_version != catalog_version or entries[0].resume_hash != resume_hash
+            or entries[0].retrieval_mode != retrieval_mode
+            or datetime.now(timezone.utc) - computed_at > timedelta(hours=PRECOMPUTED_MAX_AGE_HOURS)):
+        return None
+    return [e.job_id for e in entries], [e.score for e in entries]
+
+# --- 3. Schema Migration ---
+def migrate_precomputed(engine) -> list[str]:
+    """Adds the retrieval_mode column. Rows written before it have none and aren't served. Safe to run more than once."""
+    applied = []
+    inspector = inspect(engine)
+    if not inspector.has_table("precomputed_recommendations"):
+        return applied
+    if "retrieval_mode" not in {c["name"] for c in inspector.get_columns("precomputed_recommendations")}:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE precomputed_recommendations ADD COLUMN retrieval_mode VARCHAR"))
+        applied.append("precomputed_recommendations.retrieval_mode added")
+    return applied
@@ -1,56 +1,435 @@
 import os
+import re
+import json
+import asyncio
+import hashlib
+import threading
 import joblib
+import orjson
 import numpy as np
-import pandas as pd
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema.output_parser import StrOutputParser
 from dotenv import load_dotenv
 
-import models
+import database, models
+from services import (embedding_store, facet_index, index_service, ingest_service, job_catalog, lexical_index,
+                      neighbor_graph, precompute_service, text_utils)
+from services.auth_service import Principal
+from services.encoder_service import BatchingEncoder
+from services.cache_service import TTLCache
+from services.explanation_cache import ExplanationCache, default_cache_path
+from services.metrics_service import stage, timed_stage
+from services.startup_service import ArtifactMissing, readiness
 
 load_dotenv()
 
-# --- 1. Load All Artifacts on Startup ---
-try:
-    print("Loading SBERT model...")
-    sbert_model_path = os.path.join('data', 'minilm_model')
-    sbert_model = SentenceTransformer(sbert_model_path)
-    print("✅ SBERT model loaded.")
+# --- Configuration ---
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "10000"))
+RECOMMENDATION_CACHE_TTL_SECONDS = float(os.getenv("RECOMMENDATION_CACHE_TTL_SECONDS", "900"))
+# "batch" explains every recommendation in one LLM call; "per_job" makes one call per job.
+EXPLANATION_MODE = os.getenv("EXPLANATION_MODE", "batch")
+RESUME_PROMPT_CHARS = int(os.getenv("RESUME_PROMPT_CHARS", "1200"))
+JOB_PROMPT_CHARS = int(os.getenv("JOB_PROMPT_CHARS", "600"))
+# Bump whenever a prompt changes so cached explanations from the old wording are not reused.
+EXPLANATION_PROMPT_VERSION = "1"
+EXPLANATION_CACHE_SIZE = int(os.getenv("EXPLANATION_CACHE_SIZE", "20000"))
+EXPLANATION_CACHE_TTL_SECONDS = float(os.getenv("EXPLANATION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+CATALOG_SYNC_INTERVAL_SECONDS = float(os.getenv("CATALOG_SYNC_INTERVAL_SECONDS", "30"))
+# "dense" scores every job with SBERT. "hybrid" first pulls LEXICAL_CANDIDATES jobs by BM25 over the
+# resume's key terms and only scores those, blending in the BM25 score by 1 - HYBRID_DENSE_WEIGHT.
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "dense")
+LEXICAL_CANDIDATES = int(os.getenv("LEXICAL_CANDIDATES", "2000"))
+LEXICAL_QUERY_TERMS = int(os.getenv("LEXICAL_QUERY_TERMS", "40"))
+HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "0.7"))
+# Explanation LLM calls this worker may have in flight, across all requests.
+EXPLANATION_CONCURRENCY = int(os.getenv("EXPLANATION_CONCURRENCY", "4"))
+# Jobs per LLM call in /recommendations/stream: small groups arrive sooner than one batch of
+# everything, and cost fewer calls than one job each.
+EXPLANATION_STREAM_BATCH_SIZE = int(os.getenv("EXPLANATION_STREAM_BATCH_SIZE", "3"))
+# Recommendations carry this much of the description; GET /jobs/{id} has all of it.
+RECOMMENDATION_SNIPPET_CHARS = int(os.getenv("RECOMMENDATION_SNIPPET_CHARS", "240"))
+# How long clients may reuse a job's details before revalidating them with its ETag.
+JOB_DETAIL_MAX_AGE_SECONDS = int(os.getenv("JOB_DETAIL_MAX_AGE_SECONDS", "300"))
+
+# Ranked (job indices, scores) per user, so repeat visits skip the search entirely.
+recommendation_cache = TTLCache(maxsize=RECOMMENDATION_CACHE_SIZE, ttl=RECOMMENDATION_CACHE_TTL_SECONDS)
+explanation_cache = ExplanationCache(default_cache_path('data'), maxsize=EXPLANATION_CACHE_SIZE,
+                                     ttl=EXPLANATION_CACHE_TTL_SECONDS)
+
+# --- 1. Load All Artifacts in the Background ---
+# Populated by load_artifacts(), which the app runs off the event loop at startup so
+# importing this module stays cheap. Until then these are None and readiness says "loading".
+sbert_model = job_catalog_store = job_embeddings = job_store = job_index = job_facets = job_lexical = None
+job_neighbors = llm = None
+# All request-path SBERT inference goes through this micro-batching queue.
+text_encoder: BatchingEncoder | None = None
+# Request-path dense searches are coalesced the same way.
+job_searcher: index_service.BatchingSearcher | None = None
+# The jobs-table catalog version this worker has applied; 0 means just the offline artifacts.
+catalog_version = 0
+_catalog_sync_lock = threading.Lock()
+
+for _name in ("job_catalog", "job_embeddings", "job_index", "sbert_model"):
+    readiness.register(_name)
+readiness.register("job_facets", required=False)
+if RETRIEVAL_MODE == "hybrid":
+    readiness.register("job_lexical", required=False)
+readiness.register("job_neighbors", required=False)
+readiness.register("llm", required=False)
+
+def _load_job_catalog():
+    if os.path.exists(os.path.join('data', job_catalog.CATALOG_DIR, 'meta.json')):
+        return job_catalog.LiveJobCatalog(job_catalog.JobCatalog.open('data'))
+    print("⚠️ Using legacy jobs_df.pkl. Run `python manage.py convert-jobs` to memory-map it.")
+    return job_catalog.LiveJobCatalog(
+        job_catalog.JobCatalog.from_dataframe(joblib.load(os.path.join('data', 'jobs_df.pkl')))
+    )
+
+def _load_job_embeddings():
+    if os.path.exists(os.path.join('data', embedding_store.EMBEDDINGS_FILE)):
+        # Memory-mapped and pre-normalized: shared between workers through the page cache.
+        store = embedding_store.EmbeddingStore.open('data')
+        return store, store.vectors
+    print("⚠️ Using legacy job_embeddings.pkl. Run `python manage.py convert-embeddings` to memory-map it.")
+    return None, joblib.load(os.path.join('data', 'job_embeddings.pkl'))
+
+def _load_job_index(kind: str | None = None):
+    normalized = job_store is not None and job_store.normalized
+    return index_service.LiveIndex(
+        index_service.load_or_build_index(job_embeddings, kind=kind, data_dir='data', normalized=normalized),
+        vectors=job_embeddings, normalized=normalized,
+    )
+
+def _load_job_facets():
+    if os.path.exists(os.path.join('data', facet_index.FACETS_DIR)):
+        facets = facet_index.JobFacets.open('data')
+        if facets.n_rows == len(job_catalog_store.base):
+            return facets
+        print(f"⚠️ Facet index covers {facets.n_rows} rows but the catalog has {len(job_catalog_store.base)}. Rebuilding.")
+    else:
+        print("⚠️ No prebuilt facet index. Run `python manage.py build-facets` to skip building it at startup.")
+    return facet_index.JobFacets.build(job_catalog_store.base)
+
+def _load_job_lexical():
+    if os.path.exists(os.path.join('data', lexical_index.LEXICAL_DIR, 'meta.json')):
+        index = lexical_index.BM25Index.open('data')
+        if len(index) == len(job_catalog_store.base):
+            return index
+        print(f"⚠️ Lexical index covers {len(index)} rows but the catalog has {len(job_catalog_store.base)}. Rebuilding.")
+    else:
+        print("⚠️ No prebuilt lexical index. Run `python manage.py build-lexical` to skip building it at startup.")
+    return lexical_index.BM25Index.build(job_catalog_store.base)
+
+def _load_job_neighbors():
+    # Unlike the facet and lexical indexes this is too slow to build at startup; without it,
+    # /jobs/{id}/similar runs a live search per request.
+    if not os.path.exists(os.path.join('data', neighbor_graph.NEIGHBORS_DIR, 'meta.json')):
+        raise ArtifactMissing("No job neighbour graph. Run `python manage.py build-neighbors`.")
+    graph = neighbor_graph.NeighborGraph.open('data')
+    if len(graph) != len(job_catalog_store.base):
+        raise ValueError(f"Job neighbour graph covers {len(graph)} rows but the catalog has "
+                         f"{len(job_catalog_store.base)}. Run `python manage.py build-neighbors`.")
+    return graph
+
+def _load_sbert_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(os.path.join('data', 'minilm_model'))
+
+def _load_llm():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model="models/gemini-2.5-flash", temperature=0.3)
+
+def load_search_artifacts(index_kind: str | None = None):
+    """Loads the job catalog, embeddings and search index: everything ranking needs, without the models."""
+    global job_catalog_store, job_embeddings, job_store, job_index, job_searcher, job_facets, job_lexical, job_neighbors
 
     print("Loading job data and embeddings...")
-    jobs_df_path = os.path.join('data', 'jobs_df.pkl')
-    job_embeddings_path = os.path.join('data', 'job_embeddings.pkl')
-    jobs_df = joblib.load(jobs_df_path)
-    job_embeddings = joblib.load(job_embeddings_path)
-    print("✅ Job data and embeddings loaded.")
+    job_catalog_store = readiness.run("job_catalog", _load_job_catalog)
+    loaded = readiness.run("job_embeddings", _load_job_embeddings)
+    if loaded is not None:
+        job_store, job_embeddings = loaded
+        if job_catalog_store is not None and len(job_catalog_store) != len(job_embeddings):
+            print(f"⚠️ Job catalog has {len(job_catalog_store)} rows but there are {len(job_embeddings)} embeddings.")
+
+    print("Preparing job search index...")
+    job_index = readiness.run("job_index", lambda: _load_job_index(index_kind), "job_embeddings")
+    if job_index is not None:
+        job_searcher = index_service.BatchingSearcher(job_index)
+    job_facets = readiness.run("job_facets", _load_job_facets, "job_catalog")
+    if RETRIEVAL_MODE == "hybrid":
+        job_lexical = readiness.run("job_lexical", _load_job_lexical, "job_catalog")
+    job_neighbors = readiness.run("job_neighbors", _load_job_neighbors, "job_catalog")
+
+def load_artifacts():
+    """Loads the job data, search index, SBERT model and LLM, recording each step in `readiness`."""
+    global sbert_model, text_encoder, llm
+
+    load_search_artifacts()
+
+    print("Loading SBERT model...")
+    sbert_model = readiness.run("sbert_model", _load_sbert_model)
+    if sbert_model is not None:
+        text_encoder = BatchingEncoder(sbert_model)
 
     print("Initializing LLM for explanations...")
-    llm = ChatGoogleGenerativeAI(model="models/gemini-2.5-flash", temperature=0.3)
-    print("✅ LLM initialized.")
+    llm = readiness.run("llm", _load_llm)
 
-except FileNotFoundError:
-    print("❌ Error: One or more data files not found. Ensure the 'data' folder is in the 'backend' directory.")
-    sbert_model, jobs_df, job_embeddings, llm = None, None, None, None
+    print(f"✅ Recommender artifacts finished loading ({readiness.state}).")
 
 # --- 2. Core Recommendation Logic ---
-def get_recommendations(user_text: str, top_n: int = 10):
-    """Generates a base list of recommendations with scores."""
-    if sbert_model is None or jobs_df is None or job_embeddings is None:
-        return pd.DataFrame()
+@timed_stage("recommend.search")
+def rank_jobs(user_embedding, top_n: int = 10, **search_params):
+    """
+    Returns the (job indices, scores) of the best matches for an embedding.
+    `search_params` (e.g. nprobe for IVF, ef for HNSW) set the index's recall/latency trade-off.
+    """
+    return job_index.search(np.asarray(user_embedding, dtype=np.float32), top_n, **search_params)
 
-    user_embedding = sbert_model.encode([user_text])
-    similarities = cosine_similarity(user_embedding, job_embeddings)[0]
-    top_n_indices = np.argsort(similarities)[-top_n:][::-1]
+@timed_stage("recommend.search")
+async def rank_jobs_async(user_embedding, top_n: int = 10):
+    """rank_jobs for request handlers: concurrent requests share one batched search, off the event loop."""
+    return await job_searcher.search_async(user_embedding, top_n)
 
-    recommended_jobs = jobs_df.iloc[top_n_indices].copy()
-    recommended_jobs['score'] = similarities[top_n_indices]
-    
+def normalize_filters(filters: dict[str, list[str]] | None) -> dict[str, tuple[str, ...]]:
+    """Drops empty facets and normalizes values, so equivalent filters share one cache entry."""
+    normalized = {}
+    for name, values in (filters or {}).items():
+        values = sorted({v for v in map(facet_index.normalize_value, values or []) if v is not None})
+        if values:
+            normalized[name] = tuple(values)
+    return normalized
+
+@timed_stage("recommend.filtered_search")
+def rank_filtered_jobs(user_embedding, filters: dict, top_n: int = 10, **search_params):
+    """
+    Like rank_jobs, but only over the jobs matching `filters` (facet -> accepted values). The
+    matching rows come from the facet bitmaps first and only they are scored, so a narrower
+    filter means less work. Raises ValueError for a facet that isn't indexed.
+    """
+    rows = job_facets.select(filters)
+    if not len(rows):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    return job_index.search_subset(np.asarray(user_embedding, dtype=np.float32), top_n, rows, **search_params)
+
+@timed_stage("recommend.build")
+def build_recommendations(top_n_indices, scores) -> list[dict]:
+    """Job dicts (id, title, description, company, location, score) read straight from the catalog columns."""
+    recommended_jobs = job_catalog_store.rows(top_n_indices)
+    for job, score in zip(recommended_jobs, scores):
+        job["score"] = float(score)
     return recommended_jobs
 
+def job_summary(job: dict) -> dict:
+    """A recommended job as the API returns it: the description cut to a snippet."""
+    summary = {key: job[key] for key in ("id", "title", "company", "location", "score", "explanation") if key in job}
+    summary["snippet"] = text_utils.truncate(job.get("description"), RECOMMENDATION_SNIPPET_CHARS)
+    return summary
+
+def get_job(job_id: int) -> dict | None:
+    """A job in the serving catalog by id (title, description, company, location), or None."""
+    if job_catalog_store is None:
+        raise HTTPException(status_code=503, detail="The job catalog is still loading. Please try again shortly.")
+    row = job_catalog_store.row_for_id(job_id)
+    return None if row is None else job_catalog_store.row(row)
+
+@timed_stage("recommend.similar")
+def get_similar_jobs(job_id: int, top_n: int = 10) -> list[dict] | None:
+    """
+    The jobs most like `job_id`, as build_recommendations returns them, or None if there's no such
+    job. They come from the precomputed neighbour graph, so at most its k; neighbours replaced or
+    removed since the build are skipped. A job ingested or updated since then isn't in the graph
+    and gets one live search instead.
+    """
+    if job_catalog_store is None:
+        raise HTTPException(status_code=503, detail="The job catalog is still loading. Please try again shortly.")
+    row = job_catalog_store.row_for_id(job_id)
+    if row is None:
+        return None
+    if job_neighbors is not None and row < len(job_neighbors):
+        rows, scores = job_neighbors.neighbors(row)
+    elif job_index is not None:
+        rows, scores = job_index.search(job_index.vector(row), top_n + 1)
+    else:
+        raise HTTPException(status_code=503, detail="The job search index is still loading. Please try again shortly.")
+    similar = [(r, score) for r, score in zip(rows.tolist(), scores.tolist())
+               if r != row and job_catalog_store.row_for_id(job_catalog_store.job_id(r)) == r][:top_n]
+    return build_recommendations([r for r, _ in similar], [score for _, score in similar])
+
+def job_etag(job: dict) -> str:
+    """A strong ETag for a job's content, so clients can revalidate details they already hold."""
+    return '"' + hashlib.sha256(orjson.dumps(job, option=orjson.OPT_SORT_KEYS)).hexdigest()[:32] + '"'
+
+@timed_stage("recommend.hybrid_search")
+def rank_hybrid_jobs(user_embedding, resume_text: str, top_n: int = 10, within: np.ndarray | None = None,
+                     **search_params):
+    """
+    Two-stage ranking: BM25 over the resume's key terms pulls LEXICAL_CANDIDATES jobs (only from
+    `within`, if given), and only those are scored with SBERT. Each candidate's score is its cosine
+    similarity blended with its BM25 score relative to the best candidate's. Returns None when the
+    resume matches fewer than `top_n` jobs lexically, so the caller can fall back to dense search.
+    """
+    terms = text_utils.extract_key_terms(resume_text, LEXICAL_QUERY_TERMS)
+    with stage("recommend.lexical"):
+        candidates, lexical_scores = job_lexical.search(terms, LEXICAL_CANDIDATES, within=within)
+    if len(candidates) < top_n:
+        return None
+    order = np.argsort(candidates)
+    candidates, lexical_scores = candidates[order], lexical_scores[order]
+    rows, dense_scores = job_index.search_subset(np.asarray(user_embedding, dtype=np.float32), len(candidates),
+                                                 candidates, **search_params)
+    lexical = lexical_scores[np.searchsorted(candidates, rows)] / lexical_scores.max()
+    fused = (HYBRID_DENSE_WEIGHT * dense_scores + (1 - HYBRID_DENSE_WEIGHT) * lexical).astype(np.float32)
+    best = index_service.top_k(fused, top_n)
+    return rows[best], fused[best]
+
+def _rank_hybrid_within(user_embedding, resume_text: str, filters: dict, top_n: int):
+    within = job_facets.select(filters) if filters else None
+    return rank_hybrid_jobs(user_embedding, resume_text, top_n, within=within)
+
+def get_recommendations(user_text: str, top_n: int = 10, **search_params):
+    """Generates a base list of recommendations with scores."""
+    if text_encoder is None or job_catalog_store is None or job_index is None:
+        return []
+
+    user_embedding = text_encoder.encode(user_text)
+    return build_recommendations(*rank_jobs(user_embedding, top_n, **search_params))
+
+@timed_stage("recommend.precomputed_lookup")
+async def _precomputed_ranking(db: AsyncSession, user_id: int, resume_hash: str, top_n: int):
+    """The nightly ranking from `manage.py precompute` as (rows, scores), if it is still fresh."""
+    # The pipeline a live search would use: hybrid only once the lexical index has loaded.
+    mode = "hybrid" if RETRIEVAL_MODE == "hybrid" and job_lexical is not None else "dense"
+    found = await precompute_service.load_precomputed(db, user_id, resume_hash, catalog_version, top_n, mode)
+    if found is None:
+        return None
+    rows = [job_catalog_store.row_for_id(job_id) for job_id in found[0]]
+    if any(row is None for row in rows):
+        return None
+    return np.asarray(rows, dtype=np.int64), np.asarray(found[1], dtype=np.float32)
+
+async def get_recommendations_for_resume(resume: models.Resume, top_n: int = 10, db: AsyncSession | None = None,
+                                         filters: dict[str, list[str]] | None = None):
+    """
+    Recommendations for a stored resume. Serves repeat requests from the per-user cache, then
+    from the precomputed table when `db` is given, and only then searches, using the persisted
+    embedding instead of re-encoding the text. `filters` (facet -> accepted values, e.g.
+    {"location": ["Remote"]}) restricts the search to matching jobs.
+    """
+    if job_catalog_store is None or job_index is None:
+        return []
+    filters = normalize_filters(filters)
+    if filters and job_facets is None:
+        return []
+
+    # The fingerprint catches resumes replaced through another worker, whose cache we can't invalidate;
+    # the catalog version catches jobs ingested since the ranking was cached.
+    fingerprint = (text_utils.fingerprint(resume.raw_text), catalog_version)
+    cache_key = (resume.user_id, top_n, tuple(sorted(filters.items())))
+    cached = recommendation_cache.get(cache_key)
+    if cached is not None and cached[0] == fingerprint:
+        return build_recommendations(*cached[1])
+
+    # The precomputed rankings are unfiltered.
+    if db is not None and not filters:
+        ranked = await _precomputed_ranking(db, resume.user_id, fingerprint[0], top_n)
+        if ranked is not None:
+            recommendation_cache.set(cache_key, (fingerprint, ranked))
+            return build_recommendations(*ranked)
+
+    if resume.embedding is not None:
+        user_embedding = np.asarray(resume.embedding, dtype=np.float32)
+    elif text_encoder is not None:
+        with stage("recommend.encode"):
+            user_embedding = await text_encoder.encode_async(resume.raw_text)
+    else:
+        return []
+
+    # Hybrid and filtered searches are CPU-bound like the dense one, so they run off the event loop too.
+    ranked = None
+    if RETRIEVAL_MODE == "hybrid" and job_lexical is not None:
+        ranked = await asyncio.to_thread(_rank_hybrid_within, user_embedding, resume.raw_text, filters, top_n)
+    if ranked is None:
+        if filters:
+            ranked = await asyncio.to_thread(rank_filtered_jobs, user_embedding, filters, top_n)
+        else:
+            ranked = await rank_jobs_async(user_embedding, top_n)
+    recommendation_cache.set(cache_key, (fingerprint, ranked))
+    return build_recommendations(*ranked)
+
+def invalidate_user_recommendations(user_id: int):
+    """Drops a user's cached rankings, e.g. after they upload a new resume."""
+    recommendation_cache.invalidate_where(lambda key: key[0] == user_id)
+
+def sync_catalog(db: Session) -> int:
+    """
+    Applies jobs added, changed or deleted in the jobs table since this worker's catalog version
+    to the in-memory catalog and search index. Cheap when nothing changed: one single-row query.
+    Serialized: the periodic sync and /jobs/ingest may call it at once, and must not both apply
+    the same changes.
+    """
+    with _catalog_sync_lock:
+        return _sync_catalog(db)
+
+def _sync_catalog(db: Session) -> int:
+    global catalog_version
+    if job_catalog_store is None or job_index is None:
+        return catalog_version
+    latest = ingest_service.current_catalog_version(db)
+    if latest <= catalog_version:
+        return catalog_version
+    seeded = ingest_service.seeded_max_id(db)
+    if len(job_catalog_store.base) and (seeded is None or seeded < int(np.max(job_catalog_store.base.ids))):
+        # Jobs ingested into an unseeded table may have taken catalog jobs' ids; applying them
+        # would replace unrelated jobs.
+        print(f"⚠️ Not syncing to catalog version {latest}: the jobs table hasn't been seeded from this catalog "
+              "(run `python manage.py seed-jobs`).")
+        return catalog_version
+
+    changed = (db.query(models.Job)
+               .filter(models.Job.catalog_version > catalog_version, models.Job.catalog_version <= latest)
+               .order_by(models.Job.catalog_version, models.Job.id)
+               .yield_per(1000))
+    added_rows, added_vectors, removed_rows = [], [], []
+    for job in changed:
+        if job.is_deleted or job.embedding is None:
+            previous = job_catalog_store.remove(job.id)
+        else:
+            fields = {
+                "id": job.id, "title": job.title, "description": job.description,
+                "company": job.company, "location": job.location,
+            }
+            row, previous = job_catalog_store.upsert(fields)
+            if job_facets is not None:
+                job_facets.add(row, fields)
+            if job_lexical is not None:
+                job_lexical.add(row, fields)
+            added_rows.append(row)
+            added_vectors.append(job.embedding)
+        if previous is not None:
+            removed_rows.append(previous)
+
+    # A job changed twice in one sync is added and then superseded; only its last row goes in.
+    superseded = set(removed_rows)
+    added = [(row, vector) for row, vector in zip(added_rows, added_vectors) if row not in superseded]
+    if removed_rows:
+        job_index.remove(removed_rows)
+    if added:
+        job_index.add([row for row, _ in added], np.asarray([vector for _, vector in added], dtype=np.float32))
+    print(f"✅ Catalog synced to version {latest}: {len(added)} jobs added or updated, {len(removed_rows)} replaced or removed.")
+    catalog_version = latest
+    return catalog_version
+
+def sync_catalog_from_db() -> int:
+    db = database.SessionLocal()
+    try:
+        return sync_catalog(db)
+    finally:
+        db.close()
+
 # --- 3. Explanation Generation Logic ---
 async def get_explanation(user_text: str, job_title: str, job_description: str):
     """Uses an LLM to explain why a job is a good match."""
@@ -80,32 +459,219 @@ async def get_explanation(user_text: str, job_title: str, job_description: str):
     })
     return explanation
 
-# --- 4. Main Service Function for Explained Recommendations ---
-async def get_explained_recommendations(db: Session, user: models.User, top_n: int = 10):
-    """The main function called by the API to get recommendations with explanations."""
-    user_resume = db.query(models.Resume).filter(models.Resume.user_id == user.id).first()
-    if not user_resume or not user_resume.raw_text:
-        raise HTTPException(status_code=404, detail="No resume found. Please upload one on the Profile page.")
+batch_prompt_template = ChatPromptTemplate.from_template(
+    """
+    You are an expert career coach. For each numbered job below, explain in one concise paragraph why it is a good match for the candidate.
+    Focus on highlighting the specific keywords and concepts that overlap.
+
+    Candidate's Profile:
+    {user_text}
+
+    Jobs:
+    {jobs}
+
+    Respond with only a JSON array, one object per job, in the form
+    [{{"job": <job number>, "explanation": "<paragraph>"}}]
+    """
+)
+
+_JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+
+def _json_items(output: str) -> list:
+    match = _JSON_ARRAY_RE.search(output)
+    if match:
+        try:
+            items = json.loads(match.group(0))
+            if isinstance(items, list):
+                return items
+        except json.JSONDecodeError:
+            pass
+    # A response cut off by the token limit never closes its array; keep the objects that are complete.
+    decoder, items, position = json.JSONDecoder(), [], output.find("{")
+    while position != -1:
+        try:
+            item, end = decoder.raw_decode(output, position)
+            items.append(item)
+            position = output.find("{", end)
+        except json.JSONDecodeError:
+            position = output.find("{", position + 1)
+    return items
+
+def parse_batch_explanations(output: str, n_jobs: int) -> list[str | None]:
+    """Maps the model's JSON array back onto job positions. Jobs it skipped come back as None."""
+    explanations = [None] * n_jobs
+    for item in _json_items(output):
+        if not isinstance(item, dict):
+            continue
+        try:
+            position = int(item.get("job")) - 1
+        except (TypeError, ValueError):
+            continue
+        text = item.get("explanation")
+        if 0 <= position < n_jobs and isinstance(text, str) and text.strip():
+            explanations[position] = text.strip()
+    return explanations
+
+async def get_batch_explanations(user_text: str, jobs: list[dict]) -> list[str]:
+    """
+    Explains every job in a single LLM request. The resume is compacted once and job
+    descriptions are truncated, so input tokens no longer scale with one resume copy per job.
+    """
+    if llm is None:
+        return ["Explanation model is not available."] * len(jobs)
+    if not jobs:
+        return []
+
+    compact_profile = text_utils.compact_resume(user_text, max_chars=RESUME_PROMPT_CHARS)
+    jobs_block = "\n\n".join(
+        f"Job {i}: {job['title']}\nDescription: {text_utils.truncate(job['description'], JOB_PROMPT_CHARS)}"
+        for i, job in enumerate(jobs, start=1)
+    )
+    chain = batch_prompt_template | llm | StrOutputParser()
+    output = await chain.ainvoke({"user_text": compact_profile, "jobs": jobs_block})
+    explanations = parse_batch_explanations(output, len(jobs))
+
+    # Anything the model dropped or garbled falls back to a single-job call.
+    for i, explanation in enumerate(explanations):
+        if explanation is None:
+            explanations[i] = await get_explanation(compact_profile, jobs[i]['title'],
+                                                    text_utils.truncate(jobs[i]['description'], JOB_PROMPT_CHARS))
+    return explanations
+
+@timed_stage("recommend.llm")
+async def generate_explanations(user_text: str, jobs: list[dict]) -> list[str]:
+    """Generates one explanation per job using the configured EXPLANATION_MODE."""
+    if EXPLANATION_MODE == "batch":
+        return await get_batch_explanations(user_text, jobs)
+    return [await get_explanation(user_text, job['title'], job['description']) for job in jobs]
+
+def explanation_cache_key(resume_hash: str, job_id, job: dict) -> str:
+    # The content hash keeps a re-ingested job with the same id from reusing a stale explanation.
+    job_hash = text_utils.fingerprint(f"{job['title']}\n{job['description']}")[:16]
+    return f"v{EXPLANATION_PROMPT_VERSION}:{resume_hash}:{job_id}:{job_hash}"
+
+_llm_slots: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
 
+def llm_slots() -> asyncio.Semaphore:
+    """The worker-wide cap of EXPLANATION_CONCURRENCY explanation calls, shared by every request."""
+    global _llm_slots
+    loop = asyncio.get_running_loop()
+    if _llm_slots is None or _llm_slots[0] is not loop:
+        _llm_slots = (loop, asyncio.Semaphore(max(1, EXPLANATION_CONCURRENCY)))
+    return _llm_slots[1]
+
+def explanation_keys(user_text: str, jobs: list[dict]) -> list[str]:
+    resume_hash = text_utils.fingerprint(user_text)
+    return [explanation_cache_key(resume_hash, job['id'], job) for job in jobs]
+
+async def explain_jobs(user_text: str, jobs: list[dict]) -> list[str]:
+    """
+    Explanations for each job, served from the explanation cache where possible. A slot of
+    llm_slots() is held only while the LLM is called, so cache hits never wait for one.
+    """
+    if llm is None:
+        return ["Explanation model is not available."] * len(jobs)
+
+    async def generate(positions):
+        async with llm_slots():
+            return await generate_explanations(user_text, [jobs[i] for i in positions])
+
+    return await explanation_cache.get_or_compute_many(explanation_keys(user_text, jobs), generate)
+
+async def explain_jobs_as_completed(user_text: str, jobs: list[dict], group_size: int = EXPLANATION_STREAM_BATCH_SIZE):
+    """
+    Yields (position, explanation) for each job as soon as it is ready: cached ones at once, the
+    rest `group_size` jobs per LLM call, best-ranked groups first, within the llm_slots() cap.
+    """
+    if llm is None:
+        for position in range(len(jobs)):
+            yield position, "Explanation model is not available."
+        return
+    cached = await explanation_cache.get_cached_many(explanation_keys(user_text, jobs))
+    for position, explanation in enumerate(cached):
+        if explanation is not None:
+            yield position, explanation
+    missing = [i for i, explanation in enumerate(cached) if explanation is None]
+    group_size = max(1, group_size)
+
+    async def explain_group(group):
+        return group, await explain_jobs(user_text, [jobs[i] for i in group])
+
+    tasks = [asyncio.create_task(explain_group(missing[start:start + group_size]))
+             for start in range(0, len(missing), group_size)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            group, explanations = await next_done
+            for position, explanation in zip(group, explanations):
+                yield position, explanation
+    finally:
+        # The client went away or a call failed: don't leave the other calls running.
+        for task in tasks:
+            task.cancel()
+
+# --- 4. Main Service Functions for Explained Recommendations ---
+async def get_ranked_recommendations(db: AsyncSession, user: Principal, top_n: int = 10,
+                                     filters: dict[str, list[str]] | None = None) -> tuple[str, list[dict]]:
+    """The user's resume text and ranked jobs, without explanations. Raises HTTPException for the API."""
+    if job_index is None or job_catalog_store is None:
+        raise HTTPException(status_code=503, detail="The recommendation engine is still loading. Please try again shortly.")
+    if normalize_filters(filters) and job_facets is None:
+        raise HTTPException(status_code=503, detail="Filtering is unavailable until the facet index has loaded.")
+
+    try:
+        with stage("recommend.resume_query"):
+            user_resume = (await db.scalars(select(models.Resume).where(models.Resume.user_id == user.id).order_by(models.Resume.id.desc()).limit(1))).first()
+        if not user_resume or not user_resume.raw_text:
+            raise HTTPException(status_code=404, detail="No resume found. Please upload one on the Profile page.")
+
+        try:
+            jobs = await get_recommendations_for_resume(user_resume, top_n, db=db, filters=filters)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        # Hand the connection back to the pool before the explanations: they take seconds of LLM
+        # latency, and the request's session (shared with get_current_user) otherwise stays open
+        # until the response, or the whole stream, has been sent.
+        await db.close()
+    return user_resume.raw_text, jobs
+
+async def get_explained_recommendations(db: AsyncSession, user: Principal, top_n: int = 10,
+                                        filters: dict[str, list[str]] | None = None):
+    """The main function called by the API to get recommendations with explanations."""
     # Step 1: Get base recommendations
-    recommended_jobs_df = get_recommendations(user_resume.raw_text, top_n)
-
-    # Step 2: Generate explanations for each recommendation
-    explained_jobs = []
-    for _, row in recommended_jobs_df.iterrows():
-        explanation_text = await get_explanation(
-            user_text=user_resume.raw_text,
-            job_title=row['title'],
-            job_description=row['description']
-        )
-        job_data = {
-            "title": row['title'],
-            "description": row['description'],
-            "score": row['score'],
-            "explanation": explanation_text,
-            "company": row.get('company'),
-            "location": row.get('location')
-        }
-        explained_jobs.append(job_data)
-        
-    return {"jobs": explained_jobs}
\ No newline at end of file
+    resume_text, explained_jobs = await get_ranked_recommendations(db, user, top_n, filters)
+
+    # Step 2: Generate explanations for the recommendations
+    with stage("recommend.explain"):
+        explanations = await explain_jobs(resume_text, explained_jobs)
+    for job_data, explanation_text in zip(explained_jobs, explanations):
+        job_data["explanation"] = explanation_text
+
+    return {"jobs": [job_summary(job) for job in explained_jobs]}
+
+async def stream_explained_recommendations(db: AsyncSession, user: Principal, top_n: int = 10,
+                                           filters: dict[str, list[str]] | None = None):
+    """
+    Ranks the jobs up front, so errors are still plain HTTP errors, and returns an async iterator
+    of NDJSON lines: {"type": "jobs", "jobs": [...]} at once, then {"type": "explanation",
+    "index": i, "explanation": ...} per job as it finishes, and {"type": "done"} last.
+    """
+    resume_text, jobs = await get_ranked_recommendations(db, user, top_n, filters)
+
+    def line(event: dict) -> bytes:
+        return orjson.dumps(event) + b"\n"
+
+    async def events():
+        yield line({"type": "jobs", "jobs": [job_summary(job) for job in jobs]})
+        try:
+            with stage("recommend.explain_stream"):
+                async for position, explanation in explain_jobs_as_completed(resume_text, jobs):
+                    yield line({"type": "explanation", "index": position, "explanation": explanation})
+        except Exception as e:
+            # The status line has already gone out, so the error travels in the stream.
+            print(f"⚠️ Streaming explanations failed: {e}")
+            yield line({"type": "error", "detail": "Explanations are unavailable right now."})
+            return
+        yield line({"type": "done"})
+
+    return events()
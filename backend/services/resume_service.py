@@ -1,40 +1,167 @@
 import io
+import os
+import signal
+import uuid
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING
 import pdfplumber
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sentence_transformers import SentenceTransformer
-import models
+from dotenv import load_dotenv
 
-def parse_and_embed_resume(file_content: bytes, user: models.User, db: Session, sbert_model: SentenceTransformer):
+import database, models
+from services.metrics_service import stage
+
+if TYPE_CHECKING:
+    from services.encoder_service import BatchingEncoder
+
+load_dotenv()
+
+# --- Configuration ---
+MAX_RESUME_BYTES = int(os.getenv("MAX_RESUME_BYTES", str(5 * 1024 * 1024)))
+MAX_RESUME_PAGES = int(os.getenv("MAX_RESUME_PAGES", "20"))
+PAGE_TIMEOUT_SECONDS = float(os.getenv("RESUME_PAGE_TIMEOUT_SECONDS", "5"))
+RESUME_WORKERS = int(os.getenv("RESUME_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# --- 1. PDF Text Extraction (runs in worker processes) ---
+class PageTimeout(Exception):
+    pass
+
+def _raise_page_timeout(signum, frame):
+    raise PageTimeout()
+
+def extract_resume_text(file_content: bytes, max_pages: int = MAX_RESUME_PAGES,
+                        page_timeout: float = PAGE_TIMEOUT_SECONDS) -> str:
     """
-    Parses text from a PDF, generates an embedding, and saves it to the user's profile.
+    Extracts the text of a PDF, calling extract_text() once per page. A page that takes longer than
+    `page_timeout` seconds is skipped, so one pathological page can't hold a worker indefinitely.
+    Runs in a process-pool worker's main thread, which is what lets it use SIGALRM as the timer.
     """
+    previous_handler = signal.signal(signal.SIGALRM, _raise_page_timeout)
     try:
-        # Use an in-memory buffer to read the PDF content
         with pdfplumber.open(io.BytesIO(file_content)) as pdf:
-            raw_text = "".join(page.extract_text() for page in pdf.pages if page.extract_text())
+            if len(pdf.pages) > max_pages:
+                raise ValueError(f"Resume has {len(pdf.pages)} pages; the limit is {max_pages}.")
+            parts = []
+            for page in pdf.pages:
+                signal.setitimer(signal.ITIMER_REAL, page_timeout)
+                try:
+                    text = page.extract_text()
+                except PageTimeout:
+                    text = None
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+                if text:
+                    parts.append(text)
+                page.close()
+        return "".join(parts)
+    finally:
+        signal.signal(signal.SIGALRM, previous_handler)
+
+_process_pool = None
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    The PDF worker pool. Workers come from a forkserver rather than forking the server, which by
+    then has torch and the batcher threads loaded, so a pool recreated later starts just as clean.
+    """
+    global _process_pool
+    if _process_pool is None:
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["pdfplumber"])
+        _process_pool = ProcessPoolExecutor(max_workers=RESUME_WORKERS, mp_context=context)
+    return _process_pool
+
+def start_process_pool():
+    """Creates the pool and starts a worker at startup, so the first upload doesn't wait for the forkserver."""
+    get_process_pool().submit(int).result()
+
+def _discard_process_pool(pool: ProcessPoolExecutor):
+    # A worker that dies (OOM kill, a crash in the PDF parser) breaks its pool for good: every
+    # later submit raises BrokenProcessPool. Drop it so the next extraction creates a new one.
+    global _process_pool
+    if _process_pool is pool:
+        _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
 
+async def extract_text_in_pool(file_content: bytes) -> str:
+    """Runs extract_resume_text in the process pool, retrying once on a new pool if the pool breaks."""
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = get_process_pool()
+        try:
+            return await loop.run_in_executor(pool, functools.partial(extract_resume_text, file_content))
+        except BrokenProcessPool:
+            _discard_process_pool(pool)
+            if attempt:
+                raise ValueError("The PDF parser crashed on this file.")
+
+# --- 2. Persistence ---
+def save_resume(db: Session, user_id: int, raw_text: str, embedding: list[float]):
+    """Saves the user's resume, replacing any previous one."""
+    existing_resume = (db.query(models.Resume).filter(models.Resume.user_id == user_id)
+                       .order_by(models.Resume.id.desc()).first())
+    if existing_resume:
+        existing_resume.raw_text = raw_text
+        existing_resume.embedding = embedding
+    else:
+        db.add(models.Resume(raw_text=raw_text, embedding=embedding, user_id=user_id))
+    db.commit()
+
+def create_upload(db: Session, user_id: int) -> models.ResumeUpload:
+    upload = models.ResumeUpload(id=uuid.uuid4().hex, user_id=user_id, status="queued")
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+    return upload
+
+def get_upload(db: Session, upload_id: str, user_id: int) -> models.ResumeUpload | None:
+    return (db.query(models.ResumeUpload)
+            .filter(models.ResumeUpload.id == upload_id, models.ResumeUpload.user_id == user_id)
+            .first())
+
+def _update_upload(upload_id: str, status: str, message: str | None = None, raw_text: str | None = None,
+                   embedding: list[float] | None = None, user_id: int | None = None):
+    # Runs on the threadpool with its own session: the request's session is closed by now.
+    db = database.SessionLocal()
+    try:
+        if raw_text is not None:
+            save_resume(db, user_id, raw_text, embedding)
+        upload = db.query(models.ResumeUpload).filter(models.ResumeUpload.id == upload_id).first()
+        if upload:
+            upload.status = status
+            upload.message = message
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+# --- 3. Upload Pipeline ---
+async def process_resume_upload(upload_id: str, file_content: bytes, user_id: int,
+                                encoder: "BatchingEncoder", on_success=None):
+    """
+    Parses a resume in the process pool, embeds it through the batching encoder and saves it,
+    recording progress on the upload row so clients can poll for the result.
+    """
+    try:
+        await run_in_threadpool(_update_upload, upload_id, "processing")
+        with stage("resume.extract_text"):
+            raw_text = await extract_text_in_pool(file_content)
         if not raw_text:
             raise ValueError("Could not extract text from the PDF.")
 
-        # Generate the embedding for the resume text
-        embedding = sbert_model.encode(raw_text).tolist()
-
-        # Check if the user already has a resume, if so update it, otherwise create a new one
-        existing_resume = db.query(models.Resume).filter(models.Resume.user_id == user.id).first()
-        if existing_resume:
-            existing_resume.raw_text = raw_text
-            existing_resume.embedding = embedding
-        else:
-            new_resume = models.Resume(
-                raw_text=raw_text,
-                embedding=embedding,
-                user_id=user.id
-            )
-            db.add(new_resume)
-        
-        db.commit()
-        return {"status": "success", "message": "Resume processed and saved."}
-
+        with stage("resume.encode"):
+            embedding = (await encoder.encode_async(raw_text)).tolist()
+        with stage("resume.save"):
+            await run_in_threadpool(_update_upload, upload_id, "done", "Resume processed and saved.",
+                                    raw_text=raw_text, embedding=embedding, user_id=user_id)
+        if on_success:
+            on_success(user_id)
     except Exception as e:
-        db.rollback()
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        await run_in_threadpool(_update_upload, upload_id, "error", str(e))
@@ -0,0 +1,119 @@
+import os
+from sqlalchemy import case, func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+
+import models
+
+load_dotenv()
+
+# --- Configuration ---
+SAVED_JOBS_PAGE_SIZE = int(os.getenv("SAVED_JOBS_PAGE_SIZE", "20"))
+SAVED_JOBS_MAX_PAGE_SIZE = int(os.getenv("SAVED_JOBS_MAX_PAGE_SIZE", "100"))
+ANALYTICS_TOP_GROUPS = int(os.getenv("ANALYTICS_TOP_GROUPS", "10"))
+SCORE_BUCKETS = 10  # score distribution in steps of 0.1
+
+# The list view leaves out the long description and explanation; the detail endpoint has them.
+SUMMARY_COLUMNS = (models.SavedJob.id, models.SavedJob.job_id, models.SavedJob.title, models.SavedJob.company,
+                   models.SavedJob.location, models.SavedJob.score)
+
+# --- 1. Queries ---
+async def list_saved_jobs(db: AsyncSession, user_id: int, limit: int = SAVED_JOBS_PAGE_SIZE, before_id: int | None = None) -> dict:
+    """
+    One page of a user's saved jobs, newest first. Pages are keyed on the last id seen rather than
+    an offset, so every page is a single range scan of the (user_id, id) index however deep it is.
+    """
+    limit = max(1, min(limit, SAVED_JOBS_MAX_PAGE_SIZE))
+    query = select(*SUMMARY_COLUMNS).where(models.SavedJob.user_id == user_id)
+    if before_id is not None:
+        query = query.where(models.SavedJob.id < before_id)
+    rows = (await db.execute(query.order_by(models.SavedJob.id.desc()).limit(limit + 1))).all()
+    jobs = [row._asdict() for row in rows[:limit]]
+    return {"jobs": jobs, "next_cursor": jobs[-1]["id"] if len(rows) > limit else None}
+
+async def get_saved_job(db: AsyncSession, user_id: int, saved_job_id: int) -> models.SavedJob | None:
+    return (await db.scalars(
+        select(models.SavedJob).where(models.SavedJob.id == saved_job_id, models.SavedJob.user_id == user_id)
+    )).first()
+
+async def save_job(db: AsyncSession, user_id: int, job: dict, score: float | None, explanation: str | None) -> models.SavedJob:
+    """
+    Saves a catalog job by reference. The description stays in the catalog; only the short fields
+    the list and the analytics group by are copied.
+    """
+    saved_job = models.SavedJob(user_id=user_id, job_id=job["id"], title=job["title"], company=job.get("company"),
+                                location=job.get("location"), score=score, explanation=explanation)
+    db.add(saved_job)
+    await db.commit()
+    return saved_job
+
+# --- 2. Analytics ---
+async def _group_counts(db: AsyncSession, user_id: int, column) -> list[dict]:
+    rows = (await db.execute(
+        select(column.label("name"), func.count().label("count"), func.avg(models.SavedJob.score).label("average_score"))
+        .where(models.SavedJob.user_id == user_id)
+        .group_by(column)
+        .order_by(func.count().desc(), column)
+        .limit(ANALYTICS_TOP_GROUPS)
+    )).all()
+    return [{"name": r.name or "Unknown", "count": r.count, "average_score": r.average_score} for r in rows]
+
+async def analytics_summary(db: AsyncSession, user_id: int) -> dict:
+    """
+    Aggregates over a user's saved jobs, computed in the database so only the small result
+    leaves it: totals, the score distribution and the most saved companies and locations.
+    """
+    saved = models.SavedJob
+    totals = (await db.execute(
+        select(func.count(saved.id), func.avg(saved.score), func.min(saved.score), func.max(saved.score))
+        .where(saved.user_id == user_id)
+    )).one()
+    # A portable floor(score * 10): CASE works the same on PostgreSQL and SQLite.
+    bucket = case(*[(saved.score < (i + 1) / SCORE_BUCKETS, i) for i in range(SCORE_BUCKETS - 1)],
+                  else_=SCORE_BUCKETS - 1)
+    bucket_counts = dict((await db.execute(
+        select(bucket, func.count())
+        .where(saved.user_id == user_id, saved.score.isnot(None))
+        .group_by(bucket)
+    )).all())
+    return {
+        "total": totals[0],
+        "average_score": totals[1],
+        "min_score": totals[2],
+        "max_score": totals[3],
+        "score_distribution": [
+            {"low": i / SCORE_BUCKETS, "high": (i + 1) / SCORE_BUCKETS, "count": bucket_counts.get(i, 0)}
+            for i in range(SCORE_BUCKETS)
+        ],
+        "by_company": await _group_counts(db, user_id, saved.company),
+        "by_location": await _group_counts(db, user_id, saved.location),
+    }
+
+# --- 3. Schema Migration ---
+def migrate_saved_jobs(engine) -> list[str]:
+    """
+    Brings an existing saved_jobs table up to the current model: converts the old string score
+    column to a float, adds the job_id column and the (user_id, id) index. Safe to run more than once.
+    """
+    applied = []
+    inspector = inspect(engine)
+    if not inspector.has_table("saved_jobs"):
+        return applied
+    with engine.begin() as conn:
+        columns = {c["name"]: c for c in inspector.get_columns("saved_jobs")}
+        score_type = columns["score"]["type"]
+        if score_type.python_type is str:
+            if engine.dialect.name != "postgresql":
+                raise RuntimeError("Converting saved_jobs.score in place is only supported on PostgreSQL.")
+            conn.execute(text(
+                "ALTER TABLE saved_jobs ALTER COLUMN score TYPE double precision "
+                "USING NULLIF(trim(score), '')::double precision"
+            ))
+            applied.append("saved_jobs.score converted to double precision")
+        if "job_id" not in columns:
+            conn.execute(text("ALTER TABLE saved_jobs ADD COLUMN job_id INTEGER"))
+            applied.append("saved_jobs.job_id added")
+        if "ix_saved_jobs_user_id_id" not in {ix["name"] for ix in inspector.get_indexes("saved_jobs")}:
+            conn.execute(text("CREATE INDEX ix_saved_jobs_user_id_id ON saved_jobs (user_id, id)"))
+            applied.append("index ix_saved_jobs_user_id_id created")
+    return applied
@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Configuration ---
+# Whether an optional artifact that hasn't been built (e.g. the neighbour graph) makes the state
+# "degraded". Off by default: the features it speeds up fall back to live searches.
+MISSING_OPTIONAL_DEGRADES = os.getenv("READINESS_MISSING_OPTIONAL_DEGRADES", "false").lower() in ("1", "true", "yes")
+
+class ArtifactMissing(Exception):
+    """Raised by a loader whose artifact hasn't been built, as opposed to one that failed to load."""
+
+class Readiness:
+    """
+    Tracks background startup steps. The state is "loading" until every registered step has
+    finished, then "ready" if all succeeded or "degraded" if any failed. An optional step whose
+    artifact is missing is "skipped" and, unless MISSING_OPTIONAL_DEGRADES is set, leaves the
+    state "ready". The worker only takes traffic once every *required* step has loaded.
+    """
+
+    def __init__(self, missing_optional_degrades: bool = MISSING_OPTIONAL_DEGRADES):
+        self._steps = {}
+        self._required = set()
+        self._lock = threading.Lock()
+        self.missing_optional_degrades = missing_optional_degrades
+        self.started_at = time.time()
+
+    def register(self, name: str, required: bool = True):
+        with self._lock:
+            self._steps.setdefault(name, {"status": "pending"})
+            if required:
+                self._required.add(name)
+
+    def run(self, name: str, loader, *depends_on: str):
+        """Runs one loading step, recording its status and duration. Returns None if it failed."""
+        missing = [dep for dep in depends_on if self.status(dep) != "loaded"]
+        if missing:
+            self._set(name, {"status": "failed", "error": f"requires {', '.join(missing)}"})
+            return None
+        self._set(name, {"status": "loading"})
+        started = time.perf_counter()
+        try:
+            value = loader()
+        except ArtifactMissing as e:
+            print(f"⚠️ Skipping {name}: {e}")
+            self._set(name, {"status": "skipped", "error": str(e), "seconds": round(time.perf_counter() - started, 3)})
+            return None
+        except Exception as e:
+            print(f"❌ Failed to load {name}: {e}")
+            self._set(name, {"status": "failed", "error": str(e), "seconds": round(time.perf_counter() - started, 3)})
+            return None
+        self._set(name, {"status": "loaded", "seconds": round(time.perf_counter() - started, 3)})
+        return value
+
+    def _set(self, name: str, entry: dict):
+        with self._lock:
+            self._steps[name] = entry
+
+    def status(self, name: str) -> str | None:
+        return self._steps.get(name, {}).get("status")
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            statuses = {name: step["status"] for name, step in self._steps.items()}
+            required = set(self._required)
+        if any(s in ("pending", "loading") for s in statuses.values()):
+            return "loading"
+        degraded = any(s == "failed" or (s == "skipped" and (name in required or self.missing_optional_degrades))
+                       for name, s in statuses.items())
+        return "degraded" if degraded else "ready"
+
+    @property
+    def serving(self) -> bool:
+        with self._lock:
+            return all(self._steps[name]["status"] == "loaded" for name in self._required)
+
+    def report(self) -> dict:
+        with self._lock:
+            artifacts = {name: dict(entry) for name, entry in self._steps.items()}
+        for name, entry in artifacts.items():
+            entry["required"] = name in self._required
+        return {
+            "state": self.state,
+            "serving": self.serving,
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "artifacts": artifacts,
+        }
+
+readiness = Readiness()
@@ -0,0 +1,55 @@
+import hashlib
+import re
+from collections import Counter
+
+_WORD_RE = re.compile(r"[a-z][a-z0-9+#.\-]*[a-z0-9+#]|[a-z]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each etc few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just me more most my
+myself no nor not now of off on once only or other our ours ourselves out over own per same she should
+so some such than that the their theirs them themselves then there these they this those through to too
+under until up us using very via was we well were what when where which while who whom why will with
+within work worked working would you your yours yourself yourselves year years team teams experience
+responsible responsibilities including strong ability role job company candidate new ensure various
+""".split())
+
+def fingerprint(text: str) -> str:
+    """SHA-256 of the text. Precomputed rankings and cached explanations are keyed by the resume's."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased word tokens. Keeps tech spellings like c++, c#, node.js and scikit-learn intact."""
+    return _WORD_RE.findall(text.lower())
+
+def content_terms(text: str) -> list[str]:
+    """Tokens worth matching on: no stopwords, single characters or bare numbers."""
+    return [t for t in tokenize(text) if len(t) > 1 and t not in STOPWORDS and not t.isdigit()]
+
+def extract_key_terms(text: str, limit: int = 40) -> list[str]:
+    """The most frequent non-stopword terms, a cheap stand-in for a skills list."""
+    counts = Counter(content_terms(text))
+    return [term for term, _ in counts.most_common(limit)]
+
+def truncate(text: str, max_chars: int) -> str:
+    """Collapses whitespace and cuts at a word boundary, scanning only as much of `text` as the cut needs."""
+    text = text or ""
+    window = 2 * max_chars + 2
+    while True:
+        # Collapsing only shortens text, so once a prefix collapses to more than max_chars the
+        # rest can't change the cut.
+        head = _WHITESPACE_RE.sub(" ", text[:window]).strip()
+        if len(head) > max_chars:
+            break
+        if window >= len(text):
+            return head
+        window *= 2
+    cut = head[:max_chars].rsplit(" ", 1)[0]
+    return f"{cut}…"
+
+def compact_resume(text: str, max_chars: int = 1200, term_limit: int = 40) -> str:
+    """A short profile for LLM prompts: the candidate's key terms plus the opening of the resume."""
+    terms = ", ".join(extract_key_terms(text, term_limit))
+    return f"Key skills and terms: {terms}\nResume excerpt: {truncate(text, max_chars)}"
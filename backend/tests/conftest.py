@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# Modules are imported flat (`from services import ...`), as when running from backend/.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# database.py builds its engines at import time; tests that touch it get a throwaway SQLite file.
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='jobrec_tests_'), 'test.db')}")
@@ -0,0 +1,41 @@
+from services.recommender_service import parse_batch_explanations
+
+def test_well_formed_output():
+    output = '[{"job": 1, "explanation": "Python overlap."}, {"job": 2, "explanation": " SQL and Spark. "}]'
+    assert parse_batch_explanations(output, 2) == ["Python overlap.", "SQL and Spark."]
+
+def test_array_wrapped_in_prose_and_code_fences():
+    output = 'Here you go:\n```json\n[\n  {"job": 2, "explanation": "Second."},\n  {"job": 1, "explanation": "First."}\n]\n```\nHope this helps!'
+    assert parse_batch_explanations(output, 2) == ["First.", "Second."]
+
+def test_skipped_jobs_come_back_as_none():
+    output = '[{"job": 3, "explanation": "Only the third."}]'
+    assert parse_batch_explanations(output, 4) == [None, None, "Only the third.", None]
+
+def test_unusable_items_are_ignored():
+    output = """[
+        "not an object",
+        {"job": "2", "explanation": "Numeric string positions count."},
+        {"job": 0, "explanation": "Out of range."},
+        {"job": 9, "explanation": "Out of range."},
+        {"job": "first", "explanation": "Not a position."},
+        {"explanation": "No position."},
+        {"job": 1, "explanation": "   "},
+        {"job": 3, "explanation": ["not", "text"]},
+        {"job": 4}
+    ]"""
+    assert parse_batch_explanations(output, 4) == [None, "Numeric string positions count.", None, None]
+
+def test_malformed_or_missing_json():
+    for output in ["", "Sorry, I can't help with that.", '[{"job": 1, "explanation": "cut off mid',
+                   '[{"job": 1, explanation: unquoted}]', "[1, 2, 3]"]:
+        assert parse_batch_explanations(output, 2) == [None, None], output
+
+def test_truncated_output_keeps_complete_items():
+    # A response cut off by the token limit: the array never closes.
+    output = '```json\n[{"job": 1, "explanation": "Complete {with braces}."}, {"job": 2, "explanation": "Cut'
+    assert parse_batch_explanations(output, 2) == ["Complete {with braces}.", None]
+
+def test_bare_objects_without_an_array():
+    output = '{"job": 2, "explanation": "Second."}\n{"job": 1, "explanation": "First."}'
+    assert parse_batch_explanations(output, 3) == ["First.", "Second.", None]
@@ -0,0 +1,56 @@
+import os
+import numpy as np
+import pytest
+
+from services.embedding_store import EMBEDDINGS_FILE, EmbeddingStore, write_store
+
+@pytest.fixture
+def embeddings():
+    vectors = np.random.default_rng(0).standard_normal((300, 24)).astype(np.float32)
+    vectors[7] = 0  # a zero row must survive normalization
+    return vectors
+
+def unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def test_float32_round_trip(tmp_path, embeddings):
+    ids = np.arange(1000, 1300, dtype=np.int64)
+    write_store(str(tmp_path), embeddings, ids)
+    store = EmbeddingStore.open(str(tmp_path))
+    assert isinstance(store.vectors, np.memmap)
+    assert (len(store), store.dim, store.normalized) == (300, 24, True)
+    assert store.ids.tolist() == ids.tolist()
+    np.testing.assert_allclose(store.get(slice(None)), unit(embeddings), rtol=1e-6)
+    assert not store.get([7]).any()
+
+def test_float16_round_trip(tmp_path, embeddings):
+    write_store(str(tmp_path), embeddings, dtype="float16")
+    store = EmbeddingStore.open(str(tmp_path))
+    assert store.vectors.dtype == np.float16
+    assert store.ids.tolist() == list(range(300))
+    rows = store.get([0, 5, 299])
+    assert rows.dtype == np.float32
+    np.testing.assert_allclose(rows, unit(embeddings)[[0, 5, 299]], atol=1e-3)
+
+def test_unnormalized_round_trip(tmp_path, embeddings):
+    write_store(str(tmp_path), embeddings, normalize=False)
+    store = EmbeddingStore.open(str(tmp_path))
+    assert not store.normalized
+    np.testing.assert_array_equal(store.get(slice(None)), embeddings)
+
+def test_chunked_write(tmp_path, embeddings, monkeypatch):
+    monkeypatch.setattr("services.embedding_store.WRITE_CHUNK_ROWS", 64)
+    write_store(str(tmp_path), embeddings)
+    np.testing.assert_allclose(EmbeddingStore.open(str(tmp_path)).get(slice(None)), unit(embeddings), rtol=1e-6)
+
+def test_rejects_bad_input(tmp_path, embeddings):
+    with pytest.raises(ValueError):
+        write_store(str(tmp_path), embeddings, ids=np.arange(10))
+    with pytest.raises(ValueError):
+        write_store(str(tmp_path), embeddings, dtype="float64")
+    with open(os.path.join(tmp_path, EMBEDDINGS_FILE), "wb") as f:
+        f.write(b"\x00" * 64)
+    with pytest.raises(ValueError):
+        EmbeddingStore.open(str(tmp_path))
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+
+from services.explanation_cache import ExplanationCache
+
+def test_cancelled_owner_releases_its_keys():
+    async def scenario():
+        cache = ExplanationCache(None)
+        started = asyncio.Event()
+
+        async def hang(positions):
+            started.set()
+            await asyncio.sleep(3600)
+
+        owner = asyncio.create_task(cache.get_or_compute_many(["a", "b"], hang))
+        await started.wait()
+        owner.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        assert not cache._in_flight
+
+        async def compute(positions):
+            return [f"fresh {i}" for i in positions]
+
+        return await asyncio.wait_for(cache.get_or_compute_many(["a", "b"], compute), timeout=1)
+
+    assert asyncio.run(scenario()) == ["fresh 0", "fresh 1"]
+
+def test_waiter_takes_over_when_owner_is_cancelled():
+    async def scenario():
+        cache = ExplanationCache(None)
+        started = asyncio.Event()
+
+        async def hang(positions):
+            started.set()
+            await asyncio.sleep(3600)
+
+        async def compute(positions):
+            return ["from waiter" for _ in positions]
+
+        owner = asyncio.create_task(cache.get_or_compute_many(["a"], hang))
+        await started.wait()
+        waiter = asyncio.create_task(cache.get_or_compute_many(["a"], compute))
+        await asyncio.sleep(0.05)  # let it find the key in flight
+        owner.cancel()
+        return await asyncio.wait_for(waiter, timeout=1)
+
+    assert asyncio.run(scenario()) == ["from waiter"]
+
+def test_cancelled_waiter_leaves_owner_unaffected():
+    async def scenario():
+        cache = ExplanationCache(None)
+        release = asyncio.Event()
+
+        async def slow(positions):
+            await release.wait()
+            return ["done" for _ in positions]
+
+        owner = asyncio.create_task(cache.get_or_compute_many(["a"], slow))
+        while "a" not in cache._in_flight:
+            await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(cache.get_or_compute_many(["a"], slow))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        release.set()
+        return await asyncio.wait_for(owner, timeout=1)
+
+    assert asyncio.run(scenario()) == ["done"]
+
+def test_expired_rows_are_purged_on_write(tmp_path, monkeypatch):
+    cache = ExplanationCache(str(tmp_path / "cache.sqlite3"), ttl=3000)
+    monkeypatch.setattr("services.explanation_cache.time.time", lambda: 1000.0)
+    cache._disk_put_many({"old": "stale"})
+    monkeypatch.setattr("services.explanation_cache.time.time", lambda: 2000.0)
+    cache._disk_put_many({"recent": "kept"})
+    assert cache._conn.execute("SELECT COUNT(*) FROM explanations").fetchone()[0] == 2
+
+    # Past the purge interval, a write deletes what has expired, and only that.
+    monkeypatch.setattr("services.explanation_cache.time.time", lambda: 1000.0 + 3600)
+    cache._disk_put_many({"new": "fresh"})
+    rows = cache._conn.execute("SELECT key FROM explanations ORDER BY key").fetchall()
+    assert [key for key, in rows] == ["new", "recent"]
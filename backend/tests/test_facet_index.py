@@ -0,0 +1,76 @@
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.facet_index import JobFacets, normalize_value
+from services.job_catalog import JobCatalog
+
+N_ROWS = 3000
+# Common values get bitmaps and rare ones row lists, so filters mix both.
+LOCATIONS = ["Remote", "Pune", "Berlin", "Lagos", "Tiny Town"]
+LOCATION_WEIGHTS = [0.5, 0.3, 0.15, 0.045, 0.005]
+COMPANIES = ["Acme", "Initech", "Globex", "Umbrella", "Hooli", "Stark"]
+COMPANY_WEIGHTS = [0.4, 0.3, 0.2, 0.08, 0.015, 0.005]
+
+@pytest.fixture(scope="module")
+def catalog_values():
+    rng = np.random.default_rng(0)
+    locations = rng.choice(LOCATIONS, N_ROWS, p=LOCATION_WEIGHTS).astype(object)
+    companies = rng.choice(COMPANIES, N_ROWS, p=COMPANY_WEIGHTS).astype(object)
+    # Spelling variants normalize to the same value, and some jobs have none.
+    locations[::7] = " remote  "
+    companies[::11] = None
+    return {"location": list(locations), "company": list(companies)}
+
+@pytest.fixture(scope="module")
+def facets(catalog_values):
+    df = pd.DataFrame({"title": ["t"] * N_ROWS, "description": ["d"] * N_ROWS, **catalog_values})
+    return JobFacets.build(JobCatalog.from_dataframe(df))
+
+def brute_force(values: dict[str, list], filters: dict[str, list[str]]) -> list[int]:
+    keep = np.ones(len(values["location"]), dtype=bool)
+    for name, accepted in filters.items():
+        if accepted:
+            normalized = np.array([normalize_value(v) for v in values[name]], dtype=object)
+            keep &= np.isin(normalized, [normalize_value(v) for v in accepted])
+    return np.flatnonzero(keep).tolist()
+
+def filter_combinations():
+    for n_locations, n_companies in itertools.product(range(3), range(3)):
+        if n_locations or n_companies:
+            for locations in itertools.combinations(LOCATIONS, n_locations):
+                for companies in itertools.combinations(COMPANIES, n_companies):
+                    yield {"location": list(locations), "company": list(companies)}
+
+def test_select_matches_brute_force(facets, catalog_values):
+    for filters in filter_combinations():
+        assert facets.select(filters).tolist() == brute_force(catalog_values, filters), filters
+
+def test_values_match_case_and_whitespace_insensitively(facets, catalog_values):
+    expected = brute_force(catalog_values, {"location": ["Remote"]})
+    assert facets.select({"location": ["  REMOTE"]}).tolist() == expected
+    assert facets.select({"location": ["Nowhere"]}).tolist() == []
+
+def test_select_includes_added_jobs(catalog_values):
+    df = pd.DataFrame({"title": ["t"] * N_ROWS, "description": ["d"] * N_ROWS, **catalog_values})
+    facets = JobFacets.build(JobCatalog.from_dataframe(df))
+    values = {name: list(column) for name, column in catalog_values.items()}
+    for row, (location, company) in enumerate([("Tiny Town", "Stark"), ("remote", "Hooli"), ("Mars", None)], N_ROWS):
+        facets.add(row, {"location": location, "company": company})
+        values["location"].append(location)
+        values["company"].append(company)
+    for filters in [*filter_combinations(), {"location": ["Mars"]}]:
+        assert facets.select(filters).tolist() == brute_force(values, filters), filters
+
+def test_saved_facets_select_the_same_rows(tmp_path, facets):
+    facets.save(str(tmp_path))
+    opened = JobFacets.open(str(tmp_path))
+    for filters in filter_combinations():
+        assert opened.select(filters).tolist() == facets.select(filters).tolist()
+
+def test_rejects_unknown_or_empty_filters(facets):
+    with pytest.raises(ValueError, match="Unknown filter"):
+        facets.select({"salary": ["100k"]})
+    with pytest.raises(ValueError):
+        facets.select({"location": [], "company": []})
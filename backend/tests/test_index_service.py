@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from services.index_service import ExactIndex, Int8Index, IVFIndex
+
+N_ROWS, DIM = 2000, 32
+
+@pytest.fixture(scope="module")
+def embeddings():
+    # Clustered, like real job embeddings, so IVF lists are meaningful.
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((20, DIM))
+    return (centers[rng.integers(0, 20, N_ROWS)] + 0.3 * rng.standard_normal((N_ROWS, DIM))).astype(np.float32)
+
+@pytest.fixture(scope="module")
+def queries(embeddings):
+    rng = np.random.default_rng(1)
+    return embeddings[rng.choice(N_ROWS, 20, replace=False)] + 0.1 * rng.standard_normal((20, DIM)).astype(np.float32)
+
+def recall(found: np.ndarray, expected: np.ndarray) -> float:
+    return len(np.intersect1d(found, expected)) / len(expected)
+
+def test_ivf_probing_every_list_is_exact(embeddings, queries):
+    exact, ivf = ExactIndex.build(embeddings), IVFIndex.build(embeddings, n_lists=16)
+    for query in queries:
+        assert ivf.search(query, 10, nprobe=16)[0].tolist() == exact.search(query, 10)[0].tolist()
+
+def test_ivf_recall_grows_with_nprobe(embeddings, queries):
+    exact, ivf = ExactIndex.build(embeddings), IVFIndex.build(embeddings, n_lists=16)
+    recalls = [np.mean([recall(ivf.search(q, 10, nprobe=nprobe)[0], exact.search(q, 10)[0]) for q in queries])
+               for nprobe in (1, 4, 16)]
+    assert recalls[0] <= recalls[1] <= recalls[2] == 1.0
+    assert recalls[1] >= 0.8
+
+def test_ivf_search_subset_small_subset_is_exact(embeddings, queries):
+    # Smaller than what the probed lists hold on average: scored exactly.
+    exact, ivf = ExactIndex.build(embeddings), IVFIndex.build(embeddings, n_lists=16, nprobe=1)
+    subset = np.sort(np.random.default_rng(2).choice(N_ROWS, 50, replace=False))
+    for query in queries:
+        rows, scores = ivf.search_subset(query, 10, subset)
+        expected_rows, expected_scores = exact.search_subset(query, 10, subset)
+        assert rows.tolist() == expected_rows.tolist()
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+
+def test_ivf_search_subset_large_subset_stays_in_subset(embeddings, queries):
+    exact, ivf = ExactIndex.build(embeddings), IVFIndex.build(embeddings, n_lists=16)
+    subset = np.arange(0, N_ROWS, 2)
+    for query in queries:
+        rows, _ = ivf.search_subset(query, 10, subset, nprobe=4)
+        assert len(rows) == 10 and np.isin(rows, subset).all()
+        # Probing every list makes the masked search exact.
+        rows, _ = ivf.search_subset(query, 10, subset, nprobe=16)
+        assert rows.tolist() == exact.search_subset(query, 10, subset)[0].tolist()
+
+def test_ivf_search_subset_falls_back_when_probed_lists_miss_it(embeddings):
+    ivf = IVFIndex.build(embeddings, n_lists=16)
+    # A large subset drawn from lists far from the query: the probed lists hold none of it.
+    query = ivf.centroids[0]
+    far_lists = np.argsort(ivf.centroids @ query)[:8]
+    subset = np.sort(np.concatenate([ivf.ids[ivf.offsets[lst]:ivf.offsets[lst + 1]] for lst in far_lists]))
+    rows, _ = ivf.search_subset(query, 10, subset, nprobe=1)
+    assert rows.tolist() == ExactIndex.build(embeddings).search_subset(query, 10, subset)[0].tolist()
+
+def test_int8_recall_against_exact(embeddings, queries):
+    exact, int8 = ExactIndex.build(embeddings), Int8Index.build(embeddings)
+    assert int8.codes.dtype == np.int8 and int8.nbytes < embeddings.nbytes / 3
+    for rerank, min_recall in ((10, 0.8), (100, 1.0)):
+        found = [int8.search(q, 10, rerank=rerank)[0] for q in queries]
+        assert np.mean([recall(f, exact.search(q, 10)[0]) for f, q in zip(found, queries)]) >= min_recall
+    # Re-ranked scores are exact cosine similarities, not the quantized estimates.
+    rows, scores = int8.search(queries[0], 10)
+    np.testing.assert_allclose(scores, exact.score(queries[0])[rows], rtol=1e-5)
+
+def test_int8_search_subset(embeddings, queries):
+    exact, int8 = ExactIndex.build(embeddings), Int8Index.build(embeddings, rerank=50)
+    subset = np.arange(1, N_ROWS, 3)
+    for query in queries:
+        rows, _ = int8.search_subset(query, 10, subset)
+        assert np.isin(rows, subset).all()
+        assert recall(rows, exact.search_subset(query, 10, subset)[0]) >= 0.9
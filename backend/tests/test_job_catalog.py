@@ -0,0 +1,60 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.job_catalog import CATALOG_DIR, JobCatalog, LiveJobCatalog, write_catalog
+
+@pytest.fixture
+def jobs_df():
+    return pd.DataFrame({
+        "title": ["Data Engineer", "Développeur Python", "ML Engineer", "Analyst"],
+        "description": ["Pipelines.\nSpark, SQL.", "Équipe à Paris — 日本語 too", "", "Dashboards"],
+        "company": ["Acme", None, "Initech", np.nan],
+        "location": ["Remote", "Paris", None, "Pune"],
+    }, index=[10, 20, 30, 40])
+
+def expected_rows(df) -> list[dict]:
+    return [{name: (None if pd.isna(value) else value) for name, value in row.items()} | {"id": job_id}
+            for job_id, row in df.iterrows()]
+
+def test_round_trip(tmp_path, jobs_df):
+    write_catalog(str(tmp_path), jobs_df)
+    catalog = JobCatalog.open(str(tmp_path))
+    assert len(catalog) == 4
+    assert catalog.rows(range(4)) == expected_rows(jobs_df)
+    # Empty strings stay empty strings, distinct from missing values.
+    assert catalog.row(2)["description"] == ""
+
+def test_in_memory_catalog_matches_written_one(tmp_path, jobs_df):
+    write_catalog(str(tmp_path), jobs_df)
+    assert JobCatalog.from_dataframe(jobs_df).rows(range(4)) == JobCatalog.open(str(tmp_path)).rows(range(4))
+
+def test_column_of_only_missing_values(tmp_path, jobs_df):
+    # A column with no bytes at all has nothing to memory-map.
+    jobs_df["company"] = None
+    write_catalog(str(tmp_path), jobs_df)
+    assert [job["company"] for job in JobCatalog.open(str(tmp_path)).rows(range(4))] == [None] * 4
+
+def test_rewrite_replaces_the_catalog(tmp_path, jobs_df):
+    write_catalog(str(tmp_path), jobs_df)
+    old = JobCatalog.open(str(tmp_path))
+    write_catalog(str(tmp_path), jobs_df.iloc[:2].assign(title=["A", "B"]))
+    # A worker holding the old files keeps reading them intact.
+    assert old.rows(range(4)) == expected_rows(jobs_df)
+    assert [job["title"] for job in JobCatalog.open(str(tmp_path)).rows(range(2))] == ["A", "B"]
+    assert not [name for name in os.listdir(tmp_path / CATALOG_DIR) if name.endswith(".tmp")]
+
+def test_live_catalog_upsert_and_remove(jobs_df):
+    catalog = LiveJobCatalog(JobCatalog.from_dataframe(jobs_df))
+    assert catalog.row_for_id(30) == 2 and catalog.row_for_id(99) is None
+
+    row, previous = catalog.upsert({"id": 30, "title": "Senior ML Engineer", "company": "Initech"})
+    assert (row, previous) == (4, 2)
+    assert catalog.row_for_id(30) == 4 and catalog.job_id(4) == 30
+    assert catalog.row(4)["title"] == "Senior ML Engineer" and catalog.row(4)["location"] is None
+
+    assert catalog.upsert({"id": 50, "title": "New"}) == (5, None)
+    assert catalog.remove(30) == 4 and catalog.row_for_id(30) is None
+    assert catalog.remove(30) is None
+    assert len(catalog) == 6 and catalog.row_for_id(10) == 0
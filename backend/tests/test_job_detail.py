@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from services import auth_service, recommender_service
+from services.job_catalog import JobCatalog, LiveJobCatalog
+
+@pytest.fixture
+def client(monkeypatch):
+    df = pd.DataFrame({"title": ["Data Engineer", "Analyst"], "description": ["Pipelines and SQL.", "Dashboards."],
+                       "company": ["Acme", None], "location": ["Remote", "Pune"]}, index=[7, 8])
+    monkeypatch.setattr(recommender_service, "job_catalog_store", LiveJobCatalog(JobCatalog.from_dataframe(df)))
+    app.dependency_overrides[auth_service.get_current_user] = lambda: auth_service.Principal(id=1, username="ada")
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+def test_job_detail_carries_etag_and_max_age(client):
+    response = client.get("/jobs/7")
+    assert response.status_code == 200
+    assert response.json() == {"id": 7, "title": "Data Engineer", "description": "Pipelines and SQL.",
+                               "company": "Acme", "location": "Remote"}
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["cache-control"] == f"private, max-age={recommender_service.JOB_DETAIL_MAX_AGE_SECONDS}"
+    assert client.get("/jobs/7").headers["etag"] == response.headers["etag"]
+    assert client.get("/jobs/8").headers["etag"] != response.headers["etag"]
+
+def test_matching_if_none_match_gets_304(client):
+    etag = client.get("/jobs/7").headers["etag"]
+    for header in [etag, f"W/{etag}", f'"stale", {etag}', "*"]:
+        response = client.get("/jobs/7", headers={"If-None-Match": header})
+        assert response.status_code == 304, header
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+def test_stale_etag_gets_the_new_job(client):
+    etag = client.get("/jobs/7").headers["etag"]
+    recommender_service.job_catalog_store.upsert({"id": 7, "title": "Senior Data Engineer", "description": "More SQL."})
+    response = client.get("/jobs/7", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Senior Data Engineer"
+    assert response.headers["etag"] != etag
+
+def test_unknown_or_removed_job_is_404(client):
+    assert client.get("/jobs/99").status_code == 404
+    recommender_service.job_catalog_store.remove(8)
+    assert client.get("/jobs/8", headers={"If-None-Match": "*"}).status_code == 404
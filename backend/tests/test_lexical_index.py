@@ -0,0 +1,34 @@
+import numpy as np
+
+from services.lexical_index import decode_gaps, encode_gaps
+
+def round_trip(lists: list[list[int]]) -> list[list[int]]:
+    rows = np.asarray([row for rows in lists for row in rows], dtype=np.int64)
+    starts = np.cumsum([0] + [len(rows) for rows in lists[:-1]]).astype(np.int64)
+    data, offsets = encode_gaps(rows, starts)
+    assert len(offsets) == len(lists) + 1
+    return [decode_gaps(data[offsets[i]:offsets[i + 1]]).tolist() for i in range(len(lists))]
+
+def test_single_byte_gaps():
+    lists = [[0, 1, 5, 127], [3, 4]]
+    assert round_trip(lists) == lists
+
+def test_multi_byte_gaps():
+    # Gaps just below and above each 7-bit boundary, up to five bytes.
+    lists = [[127, 128 + 127, 128 + 127 + 128], [16383, 16384 + 16383], [2**21 - 1, 2**21 + 2**21 - 1], [2**31 - 1],
+             [2**28, 2**28 + 1]]
+    assert round_trip(lists) == lists
+
+def test_empty_lists():
+    lists = [[], [7, 300], [], [], [1], []]
+    assert round_trip(lists) == lists
+    assert decode_gaps(np.empty(0, dtype=np.uint8)).tolist() == []
+
+def test_random_lists():
+    rng = np.random.default_rng(0)
+    lists = [sorted(set(rng.integers(0, 10**7, size=rng.integers(0, 50)).tolist())) for _ in range(200)]
+    assert round_trip(lists) == lists
+
+def test_multi_byte_gaps_are_longer():
+    data, _ = encode_gaps(np.asarray([1, 1 + 200, 1 + 200 + 20000], dtype=np.int64), np.asarray([0]))
+    assert len(data) == 1 + 2 + 3
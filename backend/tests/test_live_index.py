@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from services.index_service import ExactIndex, IVFIndex, LiveIndex, ShardedExactIndex, normalize
+
+N_ROWS, DIM = 400, 16
+
+def brute_force(vectors: dict[int, np.ndarray], query: np.ndarray, k: int, rows=None) -> list[int]:
+    """Best-first rows of `vectors` (row -> vector), optionally only among `rows`."""
+    candidates = sorted(r for r in vectors if rows is None or r in rows)
+    scores = normalize(np.stack([vectors[r] for r in candidates])) @ normalize(query)[0]
+    return [candidates[i] for i in np.argsort(-scores, kind="stable")[:k]]
+
+def build_base(kind: str, embeddings: np.ndarray):
+    if kind == "ivf":
+        # Probing every list makes IVF exact, so results can be compared row for row.
+        return IVFIndex.build(embeddings, n_lists=8, nprobe=8)
+    if kind == "sharded":
+        return ShardedExactIndex.build(embeddings, threads=2)
+    return ExactIndex.build(embeddings)
+
+@pytest.fixture(params=["exact", "sharded", "ivf"])
+def live(request):
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((N_ROWS, DIM)).astype(np.float32)
+    index = LiveIndex(build_base(request.param, embeddings), vectors=embeddings)
+    return index, {row: embeddings[row] for row in range(N_ROWS)}, rng
+
+def assert_matches(index: LiveIndex, vectors: dict, queries: np.ndarray, k: int = 10):
+    for query, (rows, _) in zip(queries, index.search_batch(queries, k)):
+        assert rows.tolist() == brute_force(vectors, query, k)
+    rows, _ = index.search(queries[0], k)
+    assert rows.tolist() == brute_force(vectors, queries[0], k)
+
+def test_add(live):
+    index, vectors, rng = live
+    added = rng.standard_normal((5, DIM)).astype(np.float32)
+    index.add(np.arange(N_ROWS, N_ROWS + 5), added)
+    vectors.update({N_ROWS + i: added[i] for i in range(5)})
+    assert len(index) == N_ROWS + 5
+    # Queries right next to the added jobs must find them.
+    assert_matches(index, vectors, added + 0.01 * rng.standard_normal(added.shape).astype(np.float32))
+
+def test_remove(live):
+    index, vectors, rng = live
+    queries = rng.standard_normal((4, DIM)).astype(np.float32)
+    # Remove each query's whole current top 10, so every result comes from past the tombstones.
+    top = {int(r) for rows, _ in index.search_batch(queries, 10) for r in rows}
+    index.remove(sorted(top))
+    for row in top:
+        del vectors[row]
+    assert len(index) == N_ROWS - len(top)
+    assert_matches(index, vectors, queries)
+
+def test_remove_then_re_add(live):
+    index, vectors, rng = live
+    query = rng.standard_normal((1, DIM)).astype(np.float32)
+    best = int(index.search(query, 1)[0][0])
+    index.remove([best])
+    assert best not in index.search(query, 10)[0]
+    # An edited posting comes back under a new row, and an added row can itself be removed.
+    index.add([N_ROWS], vectors[best][None, :])
+    vectors[N_ROWS] = vectors.pop(best)
+    assert index.search(query, 1)[0].tolist() == [N_ROWS]
+    assert_matches(index, vectors, query)
+    index.remove([N_ROWS])
+    del vectors[N_ROWS]
+    assert len(index) == N_ROWS - 1
+    assert_matches(index, vectors, query)
+
+def test_search_subset(live):
+    index, vectors, rng = live
+    added = rng.standard_normal((3, DIM)).astype(np.float32)
+    index.add(np.arange(N_ROWS, N_ROWS + 3), added)
+    vectors.update({N_ROWS + i: added[i] for i in range(3)})
+    index.remove([1, 3, 5])
+    for row in (1, 3, 5):
+        del vectors[row]
+    subset = np.asarray(list(range(0, 60)) + [N_ROWS, N_ROWS + 2])
+    query = added[0] + 0.1 * rng.standard_normal(DIM).astype(np.float32)
+    rows, _ = index.search_subset(query, 10, subset)
+    assert rows.tolist() == brute_force(vectors, query, 10, set(subset.tolist()))
+
+def test_many_removals_keep_k_results(live):
+    index, vectors, rng = live
+    removed = rng.choice(N_ROWS, size=N_ROWS - 20, replace=False)
+    index.remove(removed)
+    for row in removed:
+        del vectors[int(row)]
+    queries = rng.standard_normal((3, DIM)).astype(np.float32)
+    for rows, _ in index.search_batch(queries, 10):
+        assert len(rows) == 10 and not np.isin(rows, removed).any()
+    assert_matches(index, vectors, queries)
+    # Only the survivors are left once k exceeds them.
+    assert len(index.search(queries[0], 50)[0]) == 20
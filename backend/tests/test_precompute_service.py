@@ -0,0 +1,70 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+import models
+from services import precompute_service, text_utils
+from services.index_service import ExactIndex
+from services.job_catalog import JobCatalog, LiveJobCatalog
+
+N_JOBS, DIM = 50, 8
+
+@pytest.fixture
+def setup(tmp_path):
+    """A database file with two users, plus a catalog and index to rank against."""
+    path = tmp_path / "precompute.db"
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([models.User(id=1, username="ada"), models.User(id=2, username="grace")])
+    db.commit()
+    embeddings = np.random.default_rng(0).standard_normal((N_JOBS, DIM)).astype(np.float32)
+    df = pd.DataFrame({"title": [f"Job {i}" for i in range(N_JOBS)], "description": ["d"] * N_JOBS},
+                      index=range(100, 100 + N_JOBS))
+    catalog = LiveJobCatalog(JobCatalog.from_dataframe(df))
+    yield db, f"sqlite+aiosqlite:///{path}", ExactIndex.build(embeddings), catalog, embeddings
+    db.close()
+    engine.dispose()
+
+def add_resume(db, user_id: int, text: str, embedding: np.ndarray):
+    db.add(models.Resume(user_id=user_id, raw_text=text, embedding=[float(x) for x in embedding]))
+    db.commit()
+
+def load(async_url: str, user_id: int, text: str, **kwargs):
+    async def main():
+        engine = create_async_engine(async_url)
+        async with async_sessionmaker(engine)() as db:
+            found = await precompute_service.load_precomputed(db, user_id, text_utils.fingerprint(text), 3, 5, **kwargs)
+        await engine.dispose()
+        return found
+    return asyncio.run(main())
+
+def test_served_only_to_the_retrieval_mode_it_was_built_with(setup):
+    db, async_url, index, catalog, embeddings = setup
+    add_resume(db, 1, "python resume", embeddings[4])
+    stats = precompute_service.precompute_recommendations(db, index, catalog, catalog_version=3, top_n=5)
+    assert stats == {"users": 1, "rows": 5, "skipped": 0}
+
+    job_ids, scores = load(async_url, 1, "python resume")
+    assert job_ids[0] == 104 and scores[0] == pytest.approx(1.0)
+    assert load(async_url, 1, "python resume", retrieval_mode="hybrid") is None
+    # Rows written before the mode was recorded aren't served either.
+    db.query(models.PrecomputedRecommendation).update({"retrieval_mode": None})
+    db.commit()
+    assert load(async_url, 1, "python resume") is None
+
+def test_users_with_several_resumes_get_their_latest_ranked(setup):
+    db, async_url, index, catalog, embeddings = setup
+    add_resume(db, 1, "old resume", embeddings[1])
+    add_resume(db, 2, "grace resume", embeddings[2])
+    add_resume(db, 1, "new resume", embeddings[7])
+    # Small chunks, so the user's two resumes are read in different chunks.
+    stats = precompute_service.precompute_recommendations(db, index, catalog, catalog_version=3, top_n=5, chunk_size=1)
+    assert stats == {"users": 2, "rows": 10, "skipped": 0}
+    assert load(async_url, 1, "old resume") is None
+    assert load(async_url, 1, "new resume")[0][0] == 107
+    assert load(async_url, 2, "grace resume")[0][0] == 102
@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import models
+from services import saved_jobs_service
+
+def run_with_db(scenario):
+    """Runs `scenario(db)` against a fresh in-memory database holding two users."""
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            db.add_all([models.User(id=1, username="ada"), models.User(id=2, username="grace")])
+            await db.commit()
+            result = await scenario(db)
+        await engine.dispose()
+        return result
+    return asyncio.run(main())
+
+async def save(db, user_id: int, n: int, **fields):
+    for i in range(n):
+        job = {"id": 100 + i, "title": f"Job {i}", **fields}
+        await saved_jobs_service.save_job(db, user_id, job, fields.get("score", 0.5), "because")
+
+def test_keyset_pages_cover_every_job_once_newest_first():
+    async def scenario(db):
+        await save(db, 1, 7)
+        await save(db, 2, 3)  # another user's jobs never show up
+        pages, cursor = [], None
+        while True:
+            page = await saved_jobs_service.list_saved_jobs(db, 1, limit=3, before_id=cursor)
+            pages.append([job["id"] for job in page["jobs"]])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return pages
+
+    pages = run_with_db(scenario)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    ids = [i for page in pages for i in page]
+    assert ids == sorted(ids, reverse=True) and len(set(ids)) == 7
+
+def test_exactly_full_last_page_has_no_cursor():
+    async def scenario(db):
+        await save(db, 1, 4)
+        first = await saved_jobs_service.list_saved_jobs(db, 1, limit=2)
+        second = await saved_jobs_service.list_saved_jobs(db, 1, limit=2, before_id=first["next_cursor"])
+        return first, second
+
+    first, second = run_with_db(scenario)
+    assert first["next_cursor"] == first["jobs"][-1]["id"]
+    assert len(second["jobs"]) == 2 and second["next_cursor"] is None
+
+def test_page_rows_leave_out_long_fields_and_clamp_limit(monkeypatch):
+    monkeypatch.setattr(saved_jobs_service, "SAVED_JOBS_MAX_PAGE_SIZE", 5)
+
+    async def scenario(db):
+        await save(db, 1, 8, company="Acme")
+        return (await saved_jobs_service.list_saved_jobs(db, 1, limit=1000),
+                await saved_jobs_service.list_saved_jobs(db, 1, limit=0))
+
+    large, small = run_with_db(scenario)
+    assert len(large["jobs"]) == 5 and len(small["jobs"]) == 1
+    assert set(large["jobs"][0]) == {"id", "job_id", "title", "company", "location", "score"}
+
+def test_empty_list():
+    page = run_with_db(lambda db: saved_jobs_service.list_saved_jobs(db, 1))
+    assert page == {"jobs": [], "next_cursor": None}
+
+def test_analytics_buckets_and_groups():
+    scores = [0.0, 0.05, 0.1, 0.15, 0.55, 0.899, 0.9, 0.95, 1.0, None]
+    companies = ["Acme", "Acme", "Acme", "Globex", "Globex", None, "Initech", "Acme", "Globex", "Acme"]
+
+    async def scenario(db):
+        for i, (score, company) in enumerate(zip(scores, companies)):
+            job = {"id": i, "title": f"Job {i}", "company": company, "location": "Remote" if i % 2 else "Pune"}
+            await saved_jobs_service.save_job(db, 1, job, score, None)
+        await save(db, 2, 3, score=0.35, company="Acme")
+        return await saved_jobs_service.analytics_summary(db, 1)
+
+    summary = run_with_db(scenario)
+    assert summary["total"] == 10
+    assert summary["min_score"] == 0.0 and summary["max_score"] == 1.0
+    assert summary["average_score"] == pytest.approx(sum(s for s in scores if s is not None) / 9)
+    # Buckets are [low, high); a perfect 1.0 lands in the top one, and unscored jobs in none.
+    distribution = summary["score_distribution"]
+    assert [(b["low"], b["high"]) for b in distribution][:2] == [(0.0, 0.1), (0.1, 0.2)]
+    assert [b["count"] for b in distribution] == [2, 2, 0, 0, 0, 1, 0, 0, 1, 3]
+    assert summary["by_company"][0] == {"name": "Acme", "count": 5, "average_score": pytest.approx((0.0 + 0.05 + 0.1 + 0.95) / 4)}
+    # Most saved first; where ties fall relative to missing companies depends on the database.
+    groups = [(g["name"], g["count"]) for g in summary["by_company"]]
+    assert groups[:2] == [("Acme", 5), ("Globex", 3)] and sorted(groups[2:]) == [("Initech", 1), ("Unknown", 1)]
+    assert sorted((g["name"], g["count"]) for g in summary["by_location"]) == [("Pune", 5), ("Remote", 5)]
+
+def test_analytics_without_saved_jobs():
+    summary = run_with_db(lambda db: saved_jobs_service.analytics_summary(db, 1))
+    assert summary["total"] == 0 and summary["average_score"] is None
+    assert sum(b["count"] for b in summary["score_distribution"]) == 0
+    assert summary["by_company"] == [] and summary["by_location"] == []
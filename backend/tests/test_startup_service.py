@@ -0,0 +1,51 @@
+import pytest
+
+from services.startup_service import ArtifactMissing, Readiness
+
+def missing():
+    raise ArtifactMissing("not built")
+
+def broken():
+    raise ValueError("corrupt")
+
+def test_missing_optional_artifact_is_skipped_without_degrading():
+    readiness = Readiness(missing_optional_degrades=False)
+    readiness.register("catalog")
+    readiness.register("neighbors", required=False)
+    readiness.run("catalog", lambda: "ok")
+    assert readiness.state == "loading"
+    assert readiness.run("neighbors", missing, "catalog") is None
+    report = readiness.report()
+    assert report["state"] == "ready" and report["serving"]
+    assert report["artifacts"]["neighbors"]["status"] == "skipped"
+    assert report["artifacts"]["neighbors"]["error"] == "not built"
+
+def test_missing_optional_artifact_degrades_when_configured():
+    readiness = Readiness(missing_optional_degrades=True)
+    readiness.register("neighbors", required=False)
+    readiness.run("neighbors", missing)
+    assert readiness.state == "degraded" and readiness.serving
+
+@pytest.mark.parametrize("loader", [missing, broken])
+def test_required_artifact_that_fails_or_is_missing_degrades(loader):
+    readiness = Readiness()
+    readiness.register("catalog")
+    readiness.run("catalog", loader)
+    assert readiness.state == "degraded" and not readiness.serving
+
+def test_optional_artifact_that_fails_to_load_degrades():
+    readiness = Readiness()
+    readiness.register("catalog")
+    readiness.register("facets", required=False)
+    readiness.run("catalog", lambda: "ok")
+    readiness.run("facets", broken, "catalog")
+    assert readiness.state == "degraded" and readiness.serving
+    assert readiness.report()["artifacts"]["facets"]["status"] == "failed"
+
+def test_dependents_of_a_skipped_step_do_not_run():
+    readiness = Readiness()
+    readiness.register("graph", required=False)
+    readiness.register("graph_cache", required=False)
+    readiness.run("graph", missing)
+    assert readiness.run("graph_cache", lambda: "never", "graph") is None
+    assert readiness.report()["artifacts"]["graph_cache"]["error"] == "requires graph"
@@ -1,6 +1,8 @@
 import streamlit as st
 import requests
 
+import api_client
+
 # --- Page Configuration ---
 st.set_page_config(
     page_title="Welcome - AI Job Recommender",
@@ -8,10 +10,6 @@ st.set_page_config(
     layout="centered"
 )
 
-# --- API URL ---
-# This points to your locally running FastAPI backend
-API_URL = "http://127.0.0.1:8000"
-
 # --- Main Page Content ---
 st.title("Welcome to the 🤖 AI Job Recommender")
 st.markdown("An exceptional, AI-powered platform to find your perfect job match.")
@@ -34,18 +32,11 @@ else:
         if st.button("Login"):
             if login_username and login_password:
                 try:
-                    response = requests.post(
-                        f"{API_URL}/auth/token",
-                        data={"username": login_username, "password": login_password}
-                    )
-                    if response.status_code == 200:
-                        st.session_state.access_token = response.json().get("access_token")
-                        st.session_state.username = login_username
-                        st.rerun() # Rerun the script to show the logged-in state
-                    else:
-                        st.error(f"Login failed: {response.json().get('detail')}")
+                    st.session_state.access_token = api_client.login(login_username, login_password)
+                    st.session_state.username = login_username
+                    st.rerun() # Rerun the script to show the logged-in state
                 except requests.exceptions.RequestException as e:
-                    st.error(f"Could not connect to the backend server. Is it running?")
+                    st.error(f"Login failed: {api_client.error_detail(e)}")
             else:
                 st.warning("Please enter both username and password.")
 
@@ -57,15 +48,9 @@ else:
         if st.button("Sign Up"):
             if signup_username and signup_password:
                 try:
-                    response = requests.post(
-                        f"{API_URL}/auth/register",
-                        json={"username": signup_username, "password": signup_password}
-                    )
-                    if response.status_code == 200:
-                        st.success("Account created successfully! Please log in to continue.")
-                    else:
-                        st.error(f"Sign-up failed: {response.json().get('detail')}")
+                    api_client.register(signup_username, signup_password)
+                    st.success("Account created successfully! Please log in to continue.")
                 except requests.exceptions.RequestException as e:
-                    st.error(f"Could not connect to the backend server.")
+                    st.error(f"Sign-up failed: {api_client.error_detail(e)}")
             else:
                 st.warning("Please choose a username and password.")
\ No newline at end of file
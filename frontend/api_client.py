@@ -0,0 +1,193 @@
+"""
+The one place the Streamlit pages talk to the backend from.
+
+All calls share a pooled, keep-alive requests.Session with timeouts and retries, and read
+endpoints are cached per user for a short TTL, so a page rerun that changes nothing doesn't hit
+the backend. Mutations drop the cached reads they affect.
+"""
+import json
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = os.getenv("API_URL", "http://127.0.0.1:8000")
+CONNECT_TIMEOUT_SECONDS = float(os.getenv("API_CONNECT_TIMEOUT_SECONDS", "3"))
+# Recommendations wait on the LLM, so reads get a generous timeout.
+READ_TIMEOUT_SECONDS = float(os.getenv("API_READ_TIMEOUT_SECONDS", "120"))
+CACHE_TTL_SECONDS = float(os.getenv("API_CACHE_TTL_SECONDS", "60"))
+
+# --- 1. Pooled Session ---
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    # Only idempotent requests are retried; a POST could otherwise be applied twice.
+    retries = Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset({"GET", "HEAD"}))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Module level, so it outlives page reruns and is shared by every browser session of this server.
+session = _build_session()
+
+def _request(method: str, path: str, token: str | None = None, headers: dict | None = None, **kwargs) -> requests.Response:
+    headers = {**(headers or {}), **({"Authorization": f"Bearer {token}"} if token else {})}
+    response = session.request(method, f"{API_URL}{path}", headers=headers,
+                               timeout=(CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS), **kwargs)
+    response.raise_for_status()
+    return response
+
+def error_detail(error: requests.exceptions.RequestException) -> str:
+    """The backend's `detail` message for a failed request, or a generic connection message."""
+    if error.response is None:
+        return "Could not connect to the backend server. Is it running?"
+    try:
+        return error.response.json().get("detail") or str(error)
+    except ValueError:
+        return str(error)
+
+# --- 2. Per-User Response Cache ---
+class ResponseCache:
+    """Parsed responses keyed by (token, endpoint, path, params), each expiring `ttl` seconds after it was fetched."""
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        return entry[1] if entry is not None and entry[0] > time.monotonic() else None
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def get_or_fetch(self, key, fetch):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            # Expired entries of other users are dropped lazily here rather than by a timer.
+            if len(self._data) > 1000:
+                self._data = {k: v for k, v in self._data.items() if v[0] > now}
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        value = fetch()
+        with self._lock:
+            self._data[key] = (now + self.ttl, value)
+        return value
+
+    def invalidate(self, token: str, *endpoints: str):
+        with self._lock:
+            for key in [k for k in self._data if k[0] == token and k[1] in endpoints]:
+                del self._data[key]
+
+cache = ResponseCache()
+
+def _cached_get(token: str, endpoint: str, path: str, params: dict | None = None):
+    key = (token, endpoint, path, tuple(sorted((params or {}).items())))
+    return cache.get_or_fetch(key, lambda: _request("GET", path, token, params=params).json())
+
+# path -> (ETag, parsed body) of responses the backend tagged. Once the TTL cache lets an entry
+# go, it is revalidated with If-None-Match, and an unchanged one costs a bodyless 304.
+_tagged: dict[str, tuple[str, object]] = {}
+
+def _revalidated_get(token: str, path: str):
+    held = _tagged.get(path)
+    response = _request("GET", path, token, headers={"If-None-Match": held[0]} if held else None)
+    if response.status_code == 304 and held:
+        return held[1]
+    body = response.json()
+    if response.headers.get("ETag"):
+        if len(_tagged) > 5000:
+            _tagged.clear()
+        _tagged[path] = (response.headers["ETag"], body)
+    return body
+
+# --- 3. Endpoints ---
+def login(username: str, password: str) -> str:
+    return _request("POST", "/auth/token", data={"username": username, "password": password}).json()["access_token"]
+
+def register(username: str, password: str) -> dict:
+    return _request("POST", "/auth/register", json={"username": username, "password": password}).json()
+
+def _recommendation_params(token: str, filters: dict[str, list[str]] | None):
+    params = {name: list(values) for name, values in (filters or {}).items() if values}
+    # A POST on the backend, but it only reads, so it is cached like the GET endpoints.
+    key = (token, "recommendations", "/recommendations", tuple(sorted((k, tuple(v)) for k, v in params.items())))
+    return params, key
+
+def get_recommendations(token: str, filters: dict[str, list[str]] | None = None) -> list[dict]:
+    """`filters` maps a facet ("location", "company") to the values to accept, e.g. {"location": ["Remote"]}."""
+    params, key = _recommendation_params(token, filters)
+    return cache.get_or_fetch(key, lambda: _request("POST", "/recommendations", token, params=params).json().get("jobs", []))
+
+def stream_recommendations(token: str, filters: dict[str, list[str]] | None = None):
+    """
+    Yields the events of /recommendations/stream: {"type": "jobs", "jobs": [...]}, one
+    {"type": "explanation", "index": i, "explanation": ...} per job, then {"type": "done"}
+    (or {"type": "error", "detail": ...}). A complete stream is cached with get_recommendations,
+    and a cached result is replayed as one "jobs" event with the explanations filled in.
+    """
+    params, key = _recommendation_params(token, filters)
+    cached = cache.get(key)
+    if cached is not None:
+        yield {"type": "jobs", "jobs": cached}
+        yield {"type": "done"}
+        return
+    jobs = []
+    with _request("POST", "/recommendations/stream", token, params=params, stream=True) as response:
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["type"] == "jobs":
+                jobs = event["jobs"]
+            elif event["type"] == "explanation":
+                jobs[event["index"]]["explanation"] = event["explanation"]
+            elif event["type"] == "done":
+                cache.set(key, jobs)
+            yield event
+
+def upload_resume(token: str, filename: str, file) -> dict:
+    upload = _request("POST", "/resumes/upload", token, files={"file": (filename, file, "application/pdf")}).json()
+    cache.invalidate(token, "recommendations")
+    return upload
+
+def get_upload_status(token: str, upload_id: str) -> dict:
+    upload = _request("GET", f"/resumes/upload/{upload_id}", token).json()
+    if upload["status"] == "done":
+        # The new resume changes every recommendation.
+        cache.invalidate(token, "recommendations")
+    return upload
+
+def get_job(token: str, job_id: int) -> dict:
+    """A catalog job's full details (the description recommendations only carry a snippet of)."""
+    path = f"/jobs/{job_id}"
+    return cache.get_or_fetch((token, "jobs", path, ()), lambda: _revalidated_get(token, path))
+
+def get_similar_jobs(token: str, job_id: int, limit: int = 5) -> list[dict]:
+    """Jobs like `job_id` (id, title, snippet, score, company, location), precomputed by the backend."""
+    return _cached_get(token, "jobs", f"/jobs/{job_id}/similar", {"limit": limit})["jobs"]
+
+def save_job(token: str, job: dict) -> dict:
+    """Saves a recommended job by its id, with the score and explanation it was recommended with."""
+    payload = {"job_id": job["id"], "score": job.get("score"), "explanation": job.get("explanation")}
+    result = _request("POST", "/jobs/save", token, json=payload).json()
+    cache.invalidate(token, "saved_jobs", "analytics")
+    return result
+
+def list_saved_jobs(token: str, limit: int = 20, before_id: int | None = None) -> dict:
+    params = {"limit": limit}
+    if before_id is not None:
+        params["before_id"] = before_id
+    return _cached_get(token, "saved_jobs", "/jobs/saved", params)
+
+def get_saved_job(token: str, saved_job_id: int) -> dict:
+    return _cached_get(token, "saved_jobs", f"/jobs/saved/{saved_job_id}")
+
+def get_analytics_summary(token: str) -> dict:
+    return _cached_get(token, "analytics", "/analytics/summary")
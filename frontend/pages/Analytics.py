@@ -3,35 +3,41 @@ import requests
 import pandas as pd
 import plotly.express as px
 
+import api_client
+
 st.set_page_config(page_title="Analytics", page_icon="📈", layout="wide")
 
 if 'access_token' not in st.session_state:
     st.warning("You must be logged in."); st.page_link("Home.py", label="Go to Login"); st.stop()
 
-API_URL = "http://127.0.0.1:8000"
-HEADERS = {"Authorization": f"Bearer {st.session_state.access_token}"}
 st.title(f"📈 Your Analytics Dashboard")
 
-@st.cache_data
-def fetch_data():
-    try:
-        response = requests.get(f"{API_URL}/jobs/saved", headers=HEADERS)
-        response.raise_for_status()
-        return pd.DataFrame(response.json())
-    except:
-        return pd.DataFrame()
-
-df = fetch_data()
+# Cached per user by the client and dropped whenever this user saves a job.
+try:
+    summary = api_client.get_analytics_summary(st.session_state.access_token)
+except requests.exceptions.RequestException:
+    summary = None
 
-if df.empty:
+if summary is None:
+    st.error("Could not load your analytics. Please try again shortly.")
+elif summary['total'] == 0:
     st.info("No saved jobs found. Save some jobs to see your analytics.")
 else:
-    df['score'] = pd.to_numeric(df['score'])
     st.header("Your Saved Job Analytics")
     
     col1, col2 = st.columns(2)
-    with col1: st.metric("Total Jobs Saved", len(df))
-    with col2: st.metric("Average Match Score", f"{df['score'].mean():.2%}")
+    with col1: st.metric("Total Jobs Saved", summary['total'])
+    with col2: st.metric("Average Match Score", f"{summary['average_score'] or 0:.2%}")
+
+    fig_pie = px.pie(pd.DataFrame(summary['by_company']), names='name', values='count', title='Saved Jobs by Company')
+    st.plotly_chart(fig_pie, use_container_width=True)
+
+    distribution = pd.DataFrame(summary['score_distribution'])
+    distribution['range'] = [f"{low:.0%}–{high:.0%}" for low, high in zip(distribution['low'], distribution['high'])]
+    fig_scores = px.bar(distribution, x='range', y='count', title='Match Score Distribution',
+                        labels={'range': 'Match score', 'count': 'Saved jobs'})
+    st.plotly_chart(fig_scores, use_container_width=True)
 
-    fig_pie = px.pie(df, names='company', title='Saved Jobs by Company')
-    st.plotly_chart(fig_pie, use_container_width=True)
\ No newline at end of file
+    fig_locations = px.bar(pd.DataFrame(summary['by_location']), x='name', y='count', title='Saved Jobs by Location',
+                           labels={'name': 'Location', 'count': 'Saved jobs'})
+    st.plotly_chart(fig_locations, use_container_width=True)
@@ -1,6 +1,9 @@
+import time
 import streamlit as st
 import requests
 
+import api_client
+
 # --- Page Configuration ---
 st.set_page_config(
     page_title="Your Profile - AI Job Recommender",
@@ -16,10 +19,6 @@ if 'access_token' not in st.session_state:
     st.stop()
 # --- End of Check ---
 
-# --- API URL and Headers ---
-API_URL = "http://127.0.0.1:8000"
-HEADERS = {"Authorization": f"Bearer {st.session_state.access_token}"}
-
 # --- Page Content ---
 st.title(f"👤 Welcome to Your Profile, {st.session_state.username}!")
 st.markdown("Here, you can manage your resume. Upload your latest resume to get personalized job recommendations based on your unique skills and experience.")
@@ -43,14 +42,25 @@ uploaded_file = st.file_uploader(
 if st.button("Process Resume"):
     if uploaded_file is not None:
         with st.spinner('Reading and processing your resume... This may take a moment.'):
-            files = {'file': (uploaded_file.name, uploaded_file, 'application/pdf')}
             try:
-                response = requests.post(f"{API_URL}/resumes/upload", files=files, headers=HEADERS)
-                response.raise_for_status() # Raise an error for bad status codes (4xx or 5xx)
-                
-                # Update the status and rerun to show the new state
-                st.session_state.resume_status = "Resume processed successfully! You can now get recommendations."
-                st.rerun()
+                upload = api_client.upload_resume(st.session_state.access_token, uploaded_file.name, uploaded_file)
+                job_id = upload["job_id"]
+
+                # The backend processes the resume in the background; poll until it's done.
+                for _ in range(120):
+                    if upload["status"] in ("done", "error"):
+                        break
+                    time.sleep(1)
+                    upload = api_client.get_upload_status(st.session_state.access_token, job_id)
+
+                if upload["status"] == "done":
+                    # Update the status and rerun to show the new state
+                    st.session_state.resume_status = "Resume processed successfully! You can now get recommendations."
+                    st.rerun()
+                elif upload["status"] == "error":
+                    st.error(f"Error processing resume: {upload.get('message')}")
+                else:
+                    st.warning("Your resume is still being processed. Please check back in a moment.")
 
             except requests.exceptions.RequestException as e:
                 st.error(f"Error processing resume: {e}. Is the backend server running?")
@@ -1,6 +1,8 @@
 import streamlit as st
 import requests
 
+import api_client
+
 st.set_page_config(page_title="Your Recommendations", page_icon="🎯", layout="wide")
 
 if 'access_token' not in st.session_state:
@@ -8,41 +10,106 @@ if 'access_token' not in st.session_state:
     st.page_link("Home.py", label="Go to Login Page")
     st.stop()
 
-API_URL = "http://127.0.0.1:8000"
-HEADERS = {"Authorization": f"Bearer {st.session_state.access_token}"}
-
 st.title("🎯 Your Personalized Job Recommendations")
 
-if st.button("Get My Job Recommendations"):
-    with st.spinner("Analyzing your profile and finding the best job matches..."):
-        try:
-            response = requests.post(f"{API_URL}/recommendations", headers=HEADERS)
-            response.raise_for_status()
-            st.session_state.recommendations = response.json().get("jobs", [])
-        except requests.exceptions.RequestException as e:
-            st.error(f"Error fetching recommendations: {e}")
-
-if 'recommendations' in st.session_state and st.session_state.recommendations:
-    st.header("Top Job Matches for You")
-    for i, job in enumerate(st.session_state.recommendations):
-        with st.container(border=True):
-            st.subheader(job['title'])
-            score_percentage = int(job['score'] * 100)
-            st.progress(score_percentage, text=f"Match Score: {score_percentage}%")
-            
-            col1, col2 = st.columns(2)
-            with col1: st.write(f"**Company:** {job.get('company', 'N/A')}")
-            with col2: st.write(f"**Location:** {job.get('location', 'N/A')}")
-
-            # --- ADD THIS 'SAVE JOB' BUTTON ---
-            if st.button("❤️ Save Job", key=f"save_{i}"):
+def split_values(text: str) -> list[str]:
+    return [value.strip() for value in text.split(",") if value.strip()]
+
+col1, col2 = st.columns(2)
+with col1: locations = st.text_input("Locations (optional)", placeholder="e.g. Remote, Bengaluru")
+with col2: companies = st.text_input("Companies (optional)", placeholder="Comma-separated")
+
+PENDING_EXPLANATION = "⏳ Writing the explanation..."
+if 'open_jobs' not in st.session_state:
+    st.session_state.open_jobs = set()
+if 'similar_open' not in st.session_state:
+    st.session_state.similar_open = set()
+
+def show_explanation(placeholder, job: dict):
+    if job.get('explanation'):
+        placeholder.info(f"**AI Explanation:** {job['explanation']}")
+    else:
+        placeholder.caption(PENDING_EXPLANATION)
+
+def show_similar_jobs(i: int, job_id: int):
+    """A "More like this" list, looked up in the backend's precomputed neighbour graph."""
+    if job_id not in st.session_state.similar_open:
+        if st.button("More like this", key=f"similar_{i}"):
+            st.session_state.similar_open.add(job_id)
+            st.rerun()
+        return
+    try:
+        similar = api_client.get_similar_jobs(st.session_state.access_token, job_id)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error fetching similar jobs: {api_client.error_detail(e)}")
+        return
+    st.write("**More like this:**")
+    for other in similar:
+        st.write(f"- **{other['title']}** at {other.get('company') or 'N/A'}, {other.get('location') or 'N/A'} "
+                 f"({int(other['score'] * 100)}% similar)")
+
+def render_job(i: int, job: dict):
+    """Draws one job card and returns the placeholder its explanation goes in."""
+    with st.container(border=True):
+        st.subheader(job['title'])
+        score_percentage = int(job['score'] * 100)
+        st.progress(score_percentage, text=f"Match Score: {score_percentage}%")
+
+        col1, col2 = st.columns(2)
+        with col1: st.write(f"**Company:** {job.get('company', 'N/A')}")
+        with col2: st.write(f"**Location:** {job.get('location', 'N/A')}")
+
+        # --- ADD THIS 'SAVE JOB' BUTTON ---
+        if st.button("❤️ Save Job", key=f"save_{i}"):
+            try:
+                api_client.save_job(st.session_state.access_token, job)
+                st.toast("Job saved successfully!")
+            except requests.exceptions.RequestException as e:
+                st.error(f"Error saving job: {e}")
+
+        with st.expander("Why is this a good match? (View Details)"):
+            explanation = st.empty()
+            show_explanation(explanation, job)
+            # The full description is fetched only for the jobs the user opens.
+            if job['id'] in st.session_state.open_jobs:
                 try:
-                    response = requests.post(f"{API_URL}/jobs/save", json=job, headers=HEADERS)
-                    response.raise_for_status()
-                    st.toast("Job saved successfully!")
+                    details = api_client.get_job(st.session_state.access_token, job['id'])
+                    st.write("**Full Job Description:**", details['description'])
                 except requests.exceptions.RequestException as e:
-                    st.error(f"Error saving job: {e}")
+                    st.error(f"Error fetching the job description: {api_client.error_detail(e)}")
+            else:
+                st.write(job['snippet'])
+                if st.button("Show full description", key=f"details_{i}"):
+                    st.session_state.open_jobs.add(job['id'])
+                    st.rerun()
+            show_similar_jobs(i, job['id'])
+    return explanation
 
-            with st.expander("Why is this a good match? (View Details)"):
-                st.info(f"**AI Explanation:** {job['explanation']}")
-                st.write("**Full Job Description:**", job['description'])
\ No newline at end of file
+rendered = False
+if st.button("Get My Job Recommendations"):
+    # The cards appear as soon as the jobs are ranked; each explanation fills in when it is ready.
+    st.session_state.recommendations = []
+    filters = {"location": split_values(locations), "company": split_values(companies)}
+    try:
+        with st.spinner("Analyzing your profile and finding the best job matches..."):
+            events = api_client.stream_recommendations(st.session_state.access_token, filters)
+            first = next(events)
+        jobs, placeholders = first["jobs"], []
+        st.session_state.recommendations = jobs
+        if jobs:
+            st.header("Top Job Matches for You")
+            placeholders = [render_job(i, job) for i, job in enumerate(jobs)]
+        rendered = True
+        for event in events:
+            if event["type"] == "explanation":
+                jobs[event["index"]]["explanation"] = event["explanation"]
+                show_explanation(placeholders[event["index"]], jobs[event["index"]])
+            elif event["type"] == "error":
+                st.warning(event["detail"])
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error fetching recommendations: {api_client.error_detail(e)}")
+
+if not rendered and st.session_state.get('recommendations'):
+    st.header("Top Job Matches for You")
+    for i, job in enumerate(st.session_state.recommendations):
+        render_job(i, job)
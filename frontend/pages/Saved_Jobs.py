@@ -1,19 +1,45 @@
 import streamlit as st
 import requests
 
+import api_client
+
 st.set_page_config(page_title="Saved Jobs", page_icon="❤️", layout="wide")
 
 if 'access_token' not in st.session_state:
     st.warning("You must be logged in."); st.page_link("Home.py", label="Go to Login"); st.stop()
 
-API_URL = "http://127.0.0.1:8000"
-HEADERS = {"Authorization": f"Bearer {st.session_state.access_token}"}
+PAGE_SIZE = 20
 st.title("❤️ Your Saved Jobs")
 
+# How many pages the user has asked for; the pages themselves come from the client's cache,
+# so reruns don't hit the backend until a save invalidates them.
+if 'saved_jobs_pages' not in st.session_state:
+    st.session_state.saved_jobs_pages = 1
+if 'open_saved_jobs' not in st.session_state:
+    st.session_state.open_saved_jobs = set()
+
+def show_similar_jobs(job_id: int):
+    """Jobs like a saved one, from the backend's precomputed neighbour graph."""
+    try:
+        similar = api_client.get_similar_jobs(st.session_state.access_token, job_id)
+    except requests.exceptions.RequestException as e:
+        if e.response is not None and e.response.status_code == 404:
+            return
+        raise
+    if similar:
+        st.write("**More like this:**")
+        for other in similar:
+            st.write(f"- **{other['title']}** at {other.get('company') or 'N/A'}, {other.get('location') or 'N/A'} "
+                     f"({int(other['score'] * 100)}% similar)")
+
 try:
-    response = requests.get(f"{API_URL}/jobs/saved", headers=HEADERS)
-    response.raise_for_status()
-    saved_jobs = response.json()
+    saved_jobs, cursor = [], None
+    for _ in range(st.session_state.saved_jobs_pages):
+        page = api_client.list_saved_jobs(st.session_state.access_token, limit=PAGE_SIZE, before_id=cursor)
+        saved_jobs.extend(page['jobs'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
 
     if not saved_jobs:
         st.info("You haven't saved any jobs yet.")
@@ -21,13 +47,32 @@ try:
         for job in saved_jobs:
             with st.container(border=True):
                 st.subheader(job['title'])
-                score_percentage = int(float(job['score']) * 100)
+                score_percentage = int(float(job['score'] or 0) * 100)
                 st.progress(score_percentage, text=f"Match Score: {score_percentage}%")
                 col1, col2 = st.columns(2); 
                 with col1: st.write(f"**Company:** {job.get('company', 'N/A')}")
                 with col2: st.write(f"**Location:** {job.get('location', 'N/A')}")
-                with st.expander("View Details"):
-                    st.info(f"**AI Explanation:** {job['explanation']}")
-                    st.write("**Full Job Description:**", job['description'])
+                if job['id'] not in st.session_state.open_saved_jobs:
+                    if st.button("View Details", key=f"details_{job['id']}"):
+                        st.session_state.open_saved_jobs.add(job['id'])
+                        st.rerun()
+                else:
+                    details = api_client.get_saved_job(st.session_state.access_token, job['id'])
+                    st.info(f"**AI Explanation:** {details['explanation']}")
+                    description = details['description']
+                    if description is None and details['job_id'] is not None:
+                        # Saved by reference: the description comes from the job catalog.
+                        try:
+                            description = api_client.get_job(st.session_state.access_token, details['job_id'])['description']
+                        except requests.exceptions.RequestException as e:
+                            if e.response is None or e.response.status_code != 404:
+                                raise
+                            description = "This job is no longer listed."
+                    st.write("**Full Job Description:**", description)
+                    if details['job_id'] is not None:
+                        show_similar_jobs(details['job_id'])
+        if cursor is not None and st.button("Load more"):
+            st.session_state.saved_jobs_pages += 1
+            st.rerun()
 except requests.exceptions.RequestException as e:
-    st.error(f"Error fetching saved jobs: {e}")
\ No newline at end of file
+    st.error(f"Error fetching saved jobs: {e}")